@@ -1,13 +1,20 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import Optional, List
+from typing import Optional, List, Literal
 from datetime import datetime
+import hashlib
+import sqlite3
+
+from ..models.admission import Admission, Intervention
+from ..services.live_updates import live_bus
+from ..services.ward_occupancy import ward_occupancy
+from ..storage.admission_store import TS_FORMAT, create_repository, parse_id
 
 router = APIRouter()
 
-# 🧠 simulăm o bază de date temporară (în memorie)
-admissions_db = []
-next_id = 1  # va fi incrementat automat
+# 🧠 internările sunt persistate în SQLite (data/admissions.db)
+admissions_repo = create_repository()
 
 
 class AdmissionIn(BaseModel):
@@ -23,27 +30,162 @@ class AdmissionIn(BaseModel):
 class AdmissionOut(AdmissionIn):
     id: str
     timestamp: str
+    status: str = "active"
+    bed_label: Optional[str] = None
+
+
+class InterventionIn(BaseModel):
+    author: str
+    description: str
+
+
+def _to_out(adm: Admission) -> AdmissionOut:
+    return AdmissionOut(
+        id=adm.id,
+        timestamp=adm.created_at.strftime(TS_FORMAT),
+        first_name=adm.first_name or "",
+        last_name=adm.last_name or "",
+        triage_level=adm.triage_level or 0,
+        triage_color=adm.triage_color or "",
+        reason=adm.reason,
+        ward=adm.ward,
+        bed=adm.bed,
+        bed_label=adm.bed_label,
+        status=adm.status,
+    )
+
+
+def _active_snapshot() -> List[dict]:
+    return [_to_out(a).model_dump() for a in admissions_repo.iter_filtered(active_only=True)]
+
+
+live_bus.register_snapshot("admissions", _active_snapshot)
+
+# ocuparea paturilor: internările active la pornire, apoi jurnalul paturilor
+# din aceeași bază (vede și internările/externările celorlalți workeri)
+ward_occupancy.attach(admissions_repo.occupied_beds, admissions_repo.bed_events)
+
+
+def _publish_bed(label: str) -> None:
+    ward, room, bed, status = ward_occupancy.bed(label)
+    live_bus.publish("bed.updated", {
+        "bed": label, "room": room, "status": status,
+        **ward_occupancy.ward_status(ward),
+    })
+
+
+def _create_with_bed(data: dict) -> Admission:
+    ward = data.get("ward")
+    if not ward_occupancy.has_ward(ward):
+        return admissions_repo.create(data)
+    taken: List[str] = []
+    while True:
+        label = ward_occupancy.next_free(ward, exclude=taken)
+        if label is None:
+            # secție plină: internăm fără pat alocat
+            return admissions_repo.create(data)
+        try:
+            admission = admissions_repo.create({**data, "bed_label": label})
+        except sqlite3.IntegrityError:
+            # patul a fost ocupat între timp de alt worker; încercăm următorul
+            taken.append(label)
+            continue
+        _publish_bed(label)
+        return admission
 
 
 @router.post("/admissions", response_model=AdmissionOut)
 def create_admission(adm: AdmissionIn):
-    global next_id
+    # codul unic de internare (INT-xxxx) e alocat atomic de baza de date
+    admission = _create_with_bed(adm.model_dump())
+    out = _to_out(admission)
+    live_bus.publish("admission.created", out.model_dump())
+    return out
+
 
-    # generează un cod unic de internare
-    internal_id = f"INT-{next_id:04d}"
-    next_id += 1
+def _etag(request: Request) -> str:
+    # versiunea bazei + parametrii cererii: se schimbă doar când se schimbă datele
+    query = str(request.query_params).encode("utf-8")
+    digest = hashlib.sha1(query).hexdigest()[:16]
+    return f'W/"{admissions_repo.version()}-{digest}"'
 
-    admission = AdmissionOut(
-        id=internal_id,
-        timestamp=datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-        **adm.dict(),
+
+@router.get("/admissions", response_model=List[AdmissionOut])
+def list_admissions(
+    request: Request,
+    response: Response,
+    ward: Optional[str] = None,
+    triage_level: Optional[int] = Query(default=None, ge=1, le=5),
+    triage_color: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    active_only: bool = False,
+    cursor: Optional[str] = None,
+    limit: int = Query(default=500, ge=1, le=2000),
+    order: Literal["asc", "desc"] = "asc",
+    format: Literal["json", "ndjson"] = "json",
+):
+    """
+    Returnează internările, filtrate și paginate după cursor.
+    Următorul cursor vine în header-ul `X-Next-Cursor` (lipsește la ultima pagină).
+    Cu `format=ndjson`, toate rezultatele sunt trimise în flux, câte una pe linie.
+    Suportă `If-None-Match`: dacă nu s-a schimbat nimic, răspunde cu 304.
+    """
+    if cursor is not None and parse_id(cursor) is None:
+        raise HTTPException(status_code=400, detail="Cursor invalid.")
+
+    etag = _etag(request)
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+
+    filters = dict(
+        ward=ward, triage_level=triage_level, triage_color=triage_color,
+        since=since, until=until, active_only=active_only, order=order,
     )
 
-    admissions_db.append(admission)
+    if format == "ndjson":
+        def stream():
+            for adm in admissions_repo.iter_filtered(after=cursor, **filters):
+                yield _to_out(adm).model_dump_json() + "\n"
+
+        return StreamingResponse(
+            stream(), media_type="application/x-ndjson", headers={"ETag": etag}
+        )
+
+    page = admissions_repo.list_page(after=cursor, limit=limit, **filters)
+    response.headers["ETag"] = etag
+    if len(page) == limit:
+        response.headers["X-Next-Cursor"] = page[-1].id
+    return [_to_out(a) for a in page]
+
+
+@router.get("/admissions/{admission_id}", response_model=Admission)
+def get_admission(admission_id: str):
+    admission = admissions_repo.get(admission_id)
+    if not admission:
+        raise HTTPException(status_code=404, detail="Internare inexistentă.")
     return admission
 
 
-@router.get("/admissions", response_model=List[AdmissionOut])
-def list_admissions():
-    """Returnează toate internările active"""
-    return admissions_db
+@router.post("/admissions/{admission_id}/interventions", response_model=Admission)
+def add_intervention(admission_id: str, payload: InterventionIn):
+    intervention = Intervention(timestamp=datetime.now(), **payload.model_dump())
+    admission = admissions_repo.add_intervention(admission_id, intervention)
+    if not admission:
+        raise HTTPException(status_code=404, detail="Internare inexistentă.")
+    live_bus.publish("admission.updated", _to_out(admission).model_dump())
+    return admission
+
+
+@router.post("/admissions/{admission_id}/discharge", response_model=AdmissionOut)
+def discharge_admission(admission_id: str):
+    admission, changed = admissions_repo.set_status(admission_id, "discharged")
+    if not admission:
+        raise HTTPException(status_code=404, detail="Internare inexistentă.")
+    if not changed:
+        raise HTTPException(status_code=409, detail="Internarea nu mai este activă.")
+    if admission.bed_label:
+        _publish_bed(admission.bed_label)
+    out = _to_out(admission)
+    live_bus.publish("admission.updated", out.model_dump())
+    return out
@@ -1,15 +1,16 @@
 from fastapi import APIRouter, Response, Depends, HTTPException, Cookie
 from pydantic import BaseModel
-from typing import Optional, Dict
-import uuid
+from typing import Optional
 
 from ..services.security import verify_pin, hash_pin
+from ..storage import doctor_store
 from ..storage.doctor_store import find_by_pin_hash, get_by_id
+from ..storage.session_store import create_store
 
 router = APIRouter()
 
-# Sesiuni simple in-memorie (dev). Cheia = session_id, valoarea = doctor_id
-_SESSIONS: Dict[str, int] = {}
+# Sesiuni cu expirare: session_id -> doctor_id (SQLite partajat sau în memorie)
+_SESSIONS = create_store()
 
 class LoginIn(BaseModel):
     pin: str
@@ -48,21 +49,20 @@ def login(payload: LoginIn, response: Response):
     if not d:
         raise HTTPException(status_code=401, detail="PIN greșit.")
     # creăm sesiune și setăm cookie httpOnly
-    sid = uuid.uuid4().hex
-    _SESSIONS[sid] = d["id"]
+    sid = _SESSIONS.create(d["id"])
     response.set_cookie(
         key="session_id",
         value=sid,
         httponly=True,
         samesite="lax",
-        max_age=60*60*12  # 12h
+        max_age=_SESSIONS.ttl  # 12h
     )
     return _to_public(d)
 
 @router.post("/auth/logout")
 def logout(response: Response, session_id: Optional[str] = Cookie(default=None)):
-    if session_id and session_id in _SESSIONS:
-        _SESSIONS.pop(session_id, None)
+    if session_id:
+        _SESSIONS.delete(session_id)
     response.delete_cookie("session_id")
     return {"ok": True}
 
@@ -71,3 +71,18 @@ def me(current: Optional[DoctorPublic] = Depends(get_current_doctor)):
     if not current:
         raise HTTPException(status_code=401, detail="Neautentificat.")
     return current
+
+@router.post("/auth/doctors/reload")
+def reload_doctors(current: Optional[DoctorPublic] = Depends(get_current_doctor)):
+    """Reîncarcă imediat doctors.json (fără să aștepte detectarea schimbării)."""
+    if not current:
+        raise HTTPException(status_code=401, detail="Neautentificat.")
+    doctor_store.reload()
+    return doctor_store.stats()
+
+@router.get("/auth/doctors/stats")
+def doctor_stats(current: Optional[DoctorPublic] = Depends(get_current_doctor)):
+    # `misses` numără și PIN-urile greșite: doar pentru utilizatori autentificați
+    if not current:
+        raise HTTPException(status_code=401, detail="Neautentificat.")
+    return doctor_store.stats()
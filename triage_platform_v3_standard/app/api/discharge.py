@@ -1,15 +1,22 @@
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
-from typing import Optional, List
+from typing import Optional, List, Tuple
 import os
-import json
+import threading
+
+from ..services.discharge_index import DischargeSuggestionIndex
+from ..storage.jsonl_journal import JsonlJournal
 
 router = APIRouter()
 
 # 📂 unde salvăm "experiența" AI-ului
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 DATA_DIR = os.path.join(BASE_DIR, "data")
-LEARN_FILE = os.path.join(DATA_DIR, "discharge_learning.json")
+LEARN_FILE = os.path.join(DATA_DIR, "discharge_learning.json")  # format vechi (array JSON), migrat o singură dată
+JOURNAL_FILE = os.path.join(DATA_DIR, "discharge_learning.jsonl")
+SNAPSHOT_FILE = os.path.join(DATA_DIR, "discharge_learning.snapshot.jsonl")
+
+_JOURNAL = JsonlJournal(JOURNAL_FILE, SNAPSHOT_FILE, legacy_path=LEARN_FILE)
 
 
 class DischargeSuggestIn(BaseModel):
@@ -31,23 +38,50 @@ class DischargeConfirmIn(BaseModel):
     recommendations_final: str
 
 
-def _load_learning() -> List[dict]:
-    if not os.path.exists(LEARN_FILE):
-        return []
+def _load_learning() -> Tuple[List[dict], Tuple[Optional[int], int]]:
     try:
-        with open(LEARN_FILE, "r", encoding="utf-8") as f:
-            return json.load(f)
+        return _JOURNAL.load_with_position()
     except Exception:
         # dacă s-a corupt fișierul, nu omorâm serverul
-        return []
+        return [], (None, 0)
 
 
 def _append_learning(entry: dict) -> None:
-    data = _load_learning()
-    data.append(entry)
-    os.makedirs(DATA_DIR, exist_ok=True)
-    with open(LEARN_FILE, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    # o singură linie adăugată în jurnal, indiferent de mărimea istoricului
+    _JOURNAL.append(entry)
+
+
+def close_learning() -> None:
+    _JOURNAL.close()
+
+
+# 🧠 indexul de sugestii e construit o dată și urmărește jurnalul: la fiecare
+# cerere comparăm (inode, mărime) jurnal + mtime snapshot; liniile adăugate de
+# orice worker sunt citite incremental, iar după o compactare indexul e refăcut
+_INDEX: Optional[DischargeSuggestionIndex] = None
+_INDEX_STATE: Tuple[Optional[int], int, Optional[int]] = (None, 0, None)
+_INDEX_LOCK = threading.Lock()
+
+
+def get_suggestion_index() -> DischargeSuggestionIndex:
+    global _INDEX, _INDEX_STATE
+    state = _JOURNAL.state()
+    if _INDEX is not None and state == _INDEX_STATE:
+        return _INDEX
+    with _INDEX_LOCK:
+        ino, offset, snapshot = _INDEX_STATE
+        if _INDEX is not None and state[0] == ino and state[2] == snapshot and ino is not None:
+            tail = _JOURNAL.read_tail(ino, offset)
+            if tail is not None:
+                rows, offset = tail
+                for row in rows:
+                    _INDEX.add(row)
+                _INDEX_STATE = (ino, offset, snapshot)
+                return _INDEX
+        rows, (ino, offset) = _load_learning()
+        _INDEX = DischargeSuggestionIndex(rows)
+        _INDEX_STATE = (ino, offset, state[2])
+    return _INDEX
 
 
 def _default_templates(level: int, reason: Optional[str]) -> DischargeSuggestion:
@@ -89,23 +123,14 @@ def suggest_discharge(payload: DischargeSuggestIn):
     if payload.triage_level < 1 or payload.triage_level > 5:
         raise HTTPException(status_code=400, detail="Nivel de triaj invalid (1–5).")
 
-    learned = _load_learning()
-    reason_lower = (payload.reason or "").lower().strip()
-
-    for row in reversed(learned):
-        if row.get("triage_level") != payload.triage_level:
-            continue
-
-        # dacă motivul e asemănător, preferăm acest caz
-        prev_reason = (row.get("reason") or "").lower().strip()
-        if reason_lower and prev_reason and (
-            reason_lower in prev_reason or prev_reason in reason_lower
-        ):
-            return DischargeSuggestion(
-                diagnosis=row.get("diagnosis_final", ""),
-                evolution=row.get("evolution_final", ""),
-                recommendations=row.get("recommendations_final", ""),
-            )
+    # cel mai recent caz cu același nivel și motiv asemănător (subșir într-un sens sau altul)
+    row = get_suggestion_index().find(payload.triage_level, payload.reason)
+    if row is not None:
+        return DischargeSuggestion(
+            diagnosis=row.get("diagnosis_final", ""),
+            evolution=row.get("evolution_final", ""),
+            recommendations=row.get("recommendations_final", ""),
+        )
 
     # nu avem nimic potrivit în "memorie" -> șablon implicit
     return _default_templates(payload.triage_level, payload.reason)
@@ -118,5 +143,6 @@ def confirm_discharge(payload: DischargeConfirmIn):
     ca să poată fi propusă la cazuri similare în viitor.
     """
     entry = payload.model_dump()
+    # indexul preia intrarea din jurnal, la fel ca pe ceilalți workeri
     _append_learning(entry)
     return {"ok": True}
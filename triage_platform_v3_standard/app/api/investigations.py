@@ -0,0 +1,27 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import Optional
+
+from .auth import get_current_doctor, DoctorPublic
+from ..storage.investigation_index import investigation_index
+
+router = APIRouter()
+
+# Căutare în textul investigațiilor încărcate (storage/investigation_index.py).
+# Indexarea rulează în fundal: un upload apare în rezultate după câteva
+# secunde (vezi "lag_seconds" în /investigations/index/stats).
+
+@router.get("/investigations/search")
+def search_investigations(
+    q: str = Query(..., min_length=2, max_length=200, description="cuvinte din text sau din numele fișierului"),
+    limit: int = Query(default=20, ge=1, le=100),
+    days: Optional[int] = Query(default=None, ge=1, le=3650, description="doar investigațiile din ultimele N zile"),
+    doctor: Optional[DoctorPublic] = Depends(get_current_doctor),
+):
+    if not doctor:
+        raise HTTPException(status_code=401, detail="Neautentificat")
+    results = investigation_index.search(q, limit=limit, days=days)
+    return {"query": q, "count": len(results), "results": results}
+
+@router.get("/investigations/index/stats")
+def investigation_index_stats():
+    return investigation_index.stats()
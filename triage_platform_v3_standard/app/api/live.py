@@ -0,0 +1,74 @@
+from fastapi import APIRouter, Request, Header
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from typing import Optional
+import asyncio
+import json
+
+from ..services.live_updates import live_bus
+
+router = APIRouter()
+
+HEARTBEAT_SECONDS = 15
+
+
+def _sse(event: dict) -> str:
+    # același eveniment pleacă la toți clienții workerului: îl serializăm o singură dată
+    frame = event.get("_sse")
+    if frame is None:
+        data = json.dumps({k: event[k] for k in ("seq", "type", "data")}, ensure_ascii=False, default=str)
+        head = f"id: {event['seq']}\n" if event["seq"] is not None else ""
+        frame = event["_sse"] = f"{head}event: {event['type']}\ndata: {data}\n\n"
+    return frame
+
+
+@router.get("/live/stream")
+async def live_stream(
+    request: Request,
+    since: Optional[int] = None,
+    last_event_id: Optional[str] = Header(default=None),
+):
+    """
+    Server-Sent Events cu modificările la internări și paturi.
+    La conectare se trimite fie un `snapshot` complet, fie (dacă clientul
+    trimite `since` / `Last-Event-ID`) doar evenimentele ratate.
+    """
+    if since is None and last_event_id and last_event_id.isdigit():
+        since = int(last_event_id)
+
+    sub, backlog, seq = await run_in_threadpool(live_bus.subscribe, since, asyncio.get_running_loop())
+
+    async def events():
+        try:
+            if backlog is None:
+                snapshot = await run_in_threadpool(live_bus.snapshot)
+                yield _sse({"seq": seq, "type": "snapshot", "data": snapshot})
+            else:
+                for event in backlog:
+                    yield _sse(event)
+
+            while True:
+                try:
+                    event = await asyncio.wait_for(sub.queue.get(), timeout=HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield ": ping\n\n"
+                    continue
+                yield _sse(event)
+                if event["type"] == "resync":
+                    # clientul se reconectează și primește snapshot
+                    break
+        finally:
+            live_bus.unsubscribe(sub)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/live/stats")
+def live_stats():
+    return live_bus.stats()
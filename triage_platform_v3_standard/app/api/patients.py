@@ -1,7 +1,41 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException, Query, Response
+from typing import List, Optional
+
+from ..models.patient import PatientCreate, Patient
+from ..services.patient_registry import get_registry, with_age
 
 router = APIRouter()
 
-@router.get("/patients")
-def list_patients():
-    return []
+@router.get("/patients", response_model=List[Patient])
+def list_patients(
+    q: Optional[str] = Query(default=None, description="nume (prefix/subșir) sau început de CNP"),
+    limit: int = Query(default=50, ge=1, le=500),
+    offset: int = Query(default=0, ge=0),
+):
+    registry = get_registry()
+    records = registry.search(q, limit=limit) if q else registry.list(limit=limit, offset=offset)
+    return [with_age(r) for r in records]
+
+@router.post("/patients", response_model=Patient)
+def create_patient(payload: PatientCreate, response: Response):
+    # 🔹 pacient care revine (același CNP) → întoarcem înregistrarea existentă
+    try:
+        record, created = get_registry().register(payload.cnp, payload.name, payload.phone, payload.address)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="CNP invalid")
+    response.status_code = 201 if created else 200
+    return with_age(record)
+
+@router.get("/patients/by-cnp/{cnp}", response_model=Patient)
+def get_patient_by_cnp(cnp: str):
+    record = get_registry().get_by_cnp(cnp)
+    if record is None:
+        raise HTTPException(status_code=404, detail="Pacient inexistent")
+    return with_age(record)
+
+@router.get("/patients/{patient_id}", response_model=Patient)
+def get_patient(patient_id: str):
+    record = get_registry().get(patient_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail="Pacient inexistent")
+    return with_age(record)
@@ -1,364 +1,508 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException, Depends
-from fastapi.responses import StreamingResponse
-from pydantic import BaseModel
-from typing import List, Optional
+from fastapi import APIRouter, HTTPException, Depends, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
 from pathlib import Path
-from io import BytesIO
-import unicodedata
-
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import A4
-from reportlab.lib.utils import ImageReader
-
-from PyPDF2 import PdfMerger
-from PyPDF2.errors import PdfReadError
+from typing import List, Optional, Set, Tuple
+import asyncio
+import io
+import os
+import re
+import shutil
+import time
+import uuid
+import zipfile
 
 from .auth import get_current_doctor, DoctorPublic
+from ..models.externare import BulkExportIn, ExternareIn
+from ..services.pdf_cache import BULK_GRACE, export_cache
+from ..services.pdf_pool import render_pool, PoolSaturated
+from ..services.pdf_layout import strip_accents
+from ..services.pdf_render import attachment_names, concat_pdfs, render_externare
+from ..services.upload_stream import PDF_UPLOAD_OPENAPI, save_attachment
+from ..storage.attachment_store import attachment_store
+from ..storage.export_jobs import export_jobs
+from ..storage.investigation_index import investigation_index
 
 router = APIRouter()
 
+
 # -------------------------------------------------------------------------
-# CONFIG SPITAL + PATH-URI
+# UPLOAD PDF INVESTIGAȚII
 # -------------------------------------------------------------------------
-HOSPITAL_NAME = "ArmoniaLife Hospital"
-HOSPITAL_ADDRESS = "Str. Bld Serantei, 110, Iasi, Iasi"
-
-BASE_DIR = Path(__file__).resolve().parents[2]
-STATIC_DIR = BASE_DIR / "static"
-IMG_DIR = STATIC_DIR / "img"
-UPLOAD_DIR = BASE_DIR / "data" / "uploads"
-UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
-
-LOGO_PATH = IMG_DIR / "logo.png"
+@router.post("/uploads/investigatie", openapi_extra=PDF_UPLOAD_OPENAPI)
+async def upload_investigatie(
+    request: Request,
+    doctor: DoctorPublic = Depends(get_current_doctor),
+):
+    """
+    Upload pentru un singur PDF de investigații (câmpul `file`).
+    Returnează numele sub care a fost salvat pe server (<sha256>.pdf).
+    """
+    # citit direct din cerere, în bucăți, în store-ul adresat după conținut:
+    # două fișiere cu același nume nu se mai suprascriu, iar același PDF e
+    # păstrat o singură dată; peste limită răspundem 413 fără să citim tot
+    return await save_attachment(request, doctor.full_name if doctor else None)
+    # frontend-ul va folosi stored_name în lista de investigations
 
 
 # -------------------------------------------------------------------------
-# UTILS
+# GENERARE PDF FINAL (foaie + investigatii atasate)
 # -------------------------------------------------------------------------
-def strip_accents(text: str) -> str:
-    """Elimina diacriticele pentru a evita probleme cu fonturile din PDF."""
-    if not text:
-        return ""
-    text = unicodedata.normalize("NFD", text)
-    return "".join(c for c in text if not unicodedata.combining(c))
-
-
-def split_text(text: str, max_len: int = 100):
-    """Împarte un text lung în linii scurte pentru PDF."""
-    text = text or ""
-    text = text.replace("\r\n", "\n").replace("\r", "\n")
-    parts = []
-    for paragraph in text.split("\n"):
-        p = paragraph.strip()
-        if not p:
-            parts.append("")   # linie goală
-            continue
-        while len(p) > max_len:
-            cut = p.rfind(" ", 0, max_len)
-            if cut == -1:
-                cut = max_len
-            parts.append(p[:cut])
-            p = p[cut:].lstrip()
-        if p:
-            parts.append(p)
-    return parts
-
-
-def url_to_fs_path(url: str) -> Optional[Path]:
-    """Transformă ceva de genul '/static/img/parafa.png' în cale pe disc."""
-    if not url:
-        return None
-    if not url.startswith("/static/"):
-        return None
-    rel = url.replace("/static/", "")
-    return STATIC_DIR / rel
+_REF_PREFIX = "externare:"
 
+# o foaie scoasă din cache nu mai ține investigațiile ei departe de GC;
+# GC-ul periodic verifică și referințele rămase (alt worker, versiuni vechi)
+export_cache.add_listener(lambda key: attachment_store.remove_refs(_REF_PREFIX + key))
+attachment_store.track_owners(_REF_PREFIX, lambda key: export_cache.path_for(key).exists())
 
-# -------------------------------------------------------------------------
-# MODEL DE INPUT
-# -------------------------------------------------------------------------
-class ExternareIn(BaseModel):
-    # date pacient
-    patient_name: str
-    cnp: Optional[str] = None
-    age: Optional[int] = None
-    sex: Optional[str] = None
 
-    # conținut medical
-    diagnosis: str
-    evolution: str
-    recommendations: str
+async def _prepare(data: ExternareIn, doctor: DoctorPublic) -> Tuple[dict, dict, List[str], str]:
+    """
+    Rezolvă investigațiile prin store-ul de atașamente și calculează cheia
+    din cache; blob-urile folosite sunt marcate ca referite (nu intră la GC)
+    cât timp foaia e în cache.
+    """
+    data_dump, doctor_dump = data.model_dump(), doctor.model_dump()
+    resolved = await run_in_threadpool(attachment_store.resolve_many, attachment_names(data))
+    paths = [path for _, path in resolved]
+    key = export_cache.key_for(data_dump, doctor_dump, resolved)
+    await run_in_threadpool(attachment_store.add_refs, [sha for sha, _ in resolved], _REF_PREFIX + key)
+    return data_dump, doctor_dump, [str(p) for p in paths], key
 
-    # info triage
-    triage_level: Optional[int] = None
-    triage_color: Optional[str] = None
-    reason: Optional[str] = None
 
-    # lista de fișiere PDF salvate la upload
-    investigations: List[str] = []          # numele din frontend
-    attached_pdfs: List[str] = []          # fallback dacă mai folosești numele vechi
+async def _render_to_cache(key: str, data: dict, doctor: dict, attachments: List[str]):
+    """
+    Randează în pool direct într-un fișier temporar din cache, apoi îl
+    redenumește în cache. PDF-ul nu trece prin memoria serverului; e servit
+    de pe disc, în bucăți, cu Content-Length corect.
+    """
+    tmp = export_cache.temp_path(key)
+    try:
+        await render_pool.submit(
+            render_externare, data, doctor, attachments, str(tmp),
+            abandoned=lambda: export_cache.discard(tmp),
+        )
+    except asyncio.CancelledError:
+        # procesul poate scrie încă în tmp; pool-ul îl șterge când jobul se oprește
+        raise
+    except BaseException:
+        export_cache.discard(tmp)
+        raise
+    try:
+        path = await run_in_threadpool(export_cache.commit, key, tmp)
+    except BaseException:
+        export_cache.discard(tmp)
+        raise
+    if attachments:
+        # reînnoite după commit: un alt worker le-ar fi putut șterge evacuând aceeași cheie
+        await run_in_threadpool(attachment_store.add_refs, [Path(a).stem for a in attachments], _REF_PREFIX + key)
+    return path
+
+
+@router.post("/pdf/externare")
+async def generate_pdf(
+    data: ExternareIn,
+    doctor: DoctorPublic = Depends(get_current_doctor),
+):
+    """
+    Genereaza foaia de externare si, daca exista,
+    ataseaza PDF-urile de investigatii ca pagini suplimentare.
+    Randarea rulează în pool-ul de procese; când e plin răspundem 429.
+    """
 
-    class Config:
-        orm_mode = True
+    if not doctor:
+        raise HTTPException(status_code=401, detail="Neautentificat")
 
+    data_dump, doctor_dump, attachments, key = await _prepare(data, doctor)
 
-# -------------------------------------------------------------------------
-# HEADER (logo + nume spital + titlu)
-# -------------------------------------------------------------------------
-def draw_header(c: canvas.Canvas):
-    width, height = A4
-    y = height - 40
+    # aceeași cerere a mai fost randată → servim fișierul direct de pe disc
+    cached = export_cache.get(key)
+    if cached:
+        return FileResponse(cached, media_type="application/pdf", filename="externare.pdf")
 
-    # logo
-    if LOGO_PATH.exists():
-        try:
-            c.drawImage(
-                str(LOGO_PATH),
-                40, y - 55,
-                width=70, height=70,
-                preserveAspectRatio=True,
-                mask="auto",
-            )
-        except Exception:
-            pass
-
-    # nume spital
-    c.setFont("Helvetica-Bold", 16)
-    c.drawString(130, y, strip_accents(HOSPITAL_NAME))
-
-    c.setFont("Helvetica", 10)
-    c.drawString(130, y - 20, strip_accents(HOSPITAL_ADDRESS))
-
-    # titlu
-    c.setFont("Helvetica-Bold", 14)
-    c.drawCentredString(
-        width / 2,
-        y - 70,
-        strip_accents("FOAIE DE EXTERNARE – AMBULATORIU"),
-    )
+    try:
+        path = await _render_to_cache(key, data_dump, doctor_dump, attachments)
+    except PoolSaturated as e:
+        raise HTTPException(
+            status_code=429,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)},
+        )
 
-    # linie sub titlu
-    c.setLineWidth(1.2)
-    c.line(40, y - 85, width - 40, y - 85)
+    return FileResponse(path, media_type="application/pdf", filename="externare.pdf")
 
 
 # -------------------------------------------------------------------------
-# SEMNĂTURĂ + PARAFA
+# JOBURI ASINCRONE (id job = cheia din cache)
 # -------------------------------------------------------------------------
-def draw_signature(c: canvas.Canvas, doctor: DoctorPublic):
-    width, height = A4
-
-    base_x = 70
-    base_y = 150
-
-    # text "medic curant"
-    c.setFont("Helvetica", 10)
-    c.drawString(base_x, base_y + 50, "Medic curant:")
-    c.setFont("Helvetica-Bold", 11)
-    c.drawString(base_x, base_y + 35, strip_accents(doctor.full_name))
-    c.setFont("Helvetica", 9)
-    c.drawString(base_x, base_y + 22, strip_accents(doctor.specialty or ""))
-
-    # parafa la ~2px de text
-    stamp_path = url_to_fs_path(getattr(doctor, "stamp_url", None))
-    stamp_x = base_x + 90   # puțin în dreapta de text
-    stamp_y = base_y + 18
-
-    if stamp_path and stamp_path.exists():
-        try:
-            img_stamp = ImageReader(str(stamp_path))
-            c.drawImage(
-                img_stamp,
-                stamp_x,
-                stamp_y,
-                width=90,
-                height=55,
-                preserveAspectRatio=True,
-                mask="auto",
-            )
-        except Exception:
-            pass
+MAX_PENDING_JOBS = 100
+MAX_TRACKED_JOBS = 1000
+# cât de des își reînnoiește workerul semnul de viață pe jobul pe care îl randează
+JOB_HEARTBEAT = 60
+
+# starea joburilor e în SQLite (export_jobs), comună workerilor; aici doar task-urile locale
+_TASKS: Set[asyncio.Task] = set()
+_JOB_ID = re.compile(r"^[0-9a-f]{64}$")
+# identitatea acestui worker pe joburile pe care le randează
+_OWNER = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+
+
+def _job_view(job_id: str, job: Optional[dict]) -> dict:
+    if export_cache.path_for(job_id).exists():
+        return {
+            "job_id": job_id,
+            "status": "done",
+            "result_url": f"/api/pdf/externare/jobs/{job_id}/result",
+        }
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job inexistent.")
+    return {"job_id": job_id, "status": job["status"], "error": job.get("error")}
+
+
+async def _heartbeat(job_id: str) -> None:
+    while True:
+        await asyncio.sleep(JOB_HEARTBEAT)
+        await run_in_threadpool(export_jobs.touch, job_id, _OWNER)
+
+
+async def _run_job(job_id: str, data: dict, doctor: dict, attachments: List[str]) -> None:
+    heartbeat = asyncio.create_task(_heartbeat(job_id))
+    try:
+        while True:
+            try:
+                await run_in_threadpool(export_jobs.set_status, job_id, _OWNER, "running")
+                await _render_to_cache(job_id, data, doctor, attachments)
+                break
+            except PoolSaturated as e:
+                # jobul rămâne în coadă până se eliberează pool-ul
+                await run_in_threadpool(export_jobs.set_status, job_id, _OWNER, "queued")
+                await asyncio.sleep(e.retry_after)
+        await run_in_threadpool(export_jobs.finish, job_id, _OWNER)
+    except Exception as e:
+        await run_in_threadpool(export_jobs.set_status, job_id, _OWNER, "failed", str(e))
+    finally:
+        heartbeat.cancel()
+
+
+@router.post("/pdf/externare/jobs")
+async def create_pdf_job(
+    data: ExternareIn,
+    doctor: DoctorPublic = Depends(get_current_doctor),
+):
+    """
+    Pornește generarea foii de externare în fundal și întoarce imediat id-ul
+    jobului. O cerere identică cu una deja randată e gata instantaneu.
+    """
+    if not doctor:
+        raise HTTPException(status_code=401, detail="Neautentificat")
 
-    # semnatura sub parafă
-    sign_path = url_to_fs_path(getattr(doctor, "signature_url", None))
-    sign_x = stamp_x + 10
-    sign_y = stamp_y - 55
+    data_dump, doctor_dump, attachments, job_id = await _prepare(data, doctor)
 
-    if sign_path and sign_path.exists():
-        try:
-            img_sign = ImageReader(str(sign_path))
-            c.drawImage(
-                img_sign,
-                sign_x,
-                sign_y,
-                width=120,
-                height=60,
-                preserveAspectRatio=True,
-                mask="auto",
-            )
-        except Exception:
-            pass
+    if export_cache.get(job_id):
+        return _job_view(job_id, None)
 
+    job = await run_in_threadpool(export_jobs.get, job_id)
+    if job is None or job["status"] == "failed":
+        if await run_in_threadpool(export_jobs.pending) >= MAX_PENDING_JOBS:
+            raise HTTPException(status_code=429, detail="Prea multe joburi în așteptare.", headers={"Retry-After": "5"})
+        await run_in_threadpool(export_jobs.prune, MAX_TRACKED_JOBS)
+        # un singur worker câștigă jobul; ceilalți doar raportează starea lui
+        if await run_in_threadpool(export_jobs.claim, job_id, _OWNER):
+            task = asyncio.create_task(_run_job(job_id, data_dump, doctor_dump, attachments))
+            _TASKS.add(task)
+            task.add_done_callback(_TASKS.discard)
+        job = await run_in_threadpool(export_jobs.get, job_id)
 
-# -------------------------------------------------------------------------
-# BODY (conținut foaie externare)
-# -------------------------------------------------------------------------
-def draw_body(c: canvas.Canvas, data: ExternareIn, doctor: DoctorPublic):
-    width, height = A4
-    y = height - 150
-
-    c.setFont("Helvetica", 11)
-
-    # pacient
-    c.drawString(40, y, strip_accents(f"Pacient: {data.patient_name or '-'}"))
-    y -= 15
-
-    if data.cnp:
-        c.drawString(40, y, strip_accents(f"CNP: {data.cnp}"))
-        y -= 15
-
-    if data.age is not None or data.sex:
-        c.drawString(
-            40,
-            y,
-            strip_accents(
-                f"Varsta/Sex: {data.age if data.age is not None else '-'} / "
-                f"{data.sex or '-'}"
-            ),
-        )
-        y -= 15
+    return JSONResponse(status_code=202, content=_job_view(job_id, job))
 
-    if data.triage_level:
-        c.drawString(
-            40,
-            y,
-            strip_accents(f"Nivel triaj: {data.triage_level}"),
-        )
-        y -= 25
-
-    # Diagnostic
-    c.setFont("Helvetica-Bold", 11)
-    c.drawString(40, y, "Diagnostic:")
-    y -= 15
-    c.setFont("Helvetica", 10)
-    for line in split_text(strip_accents(data.diagnosis)):
-        c.drawString(55, y, line)
-        y -= 14
-
-    y -= 10
-
-    # Evoluție
-    c.setFont("Helvetica-Bold", 11)
-    c.drawString(40, y, "Evolutie:")
-    y -= 15
-    c.setFont("Helvetica", 10)
-    for line in split_text(strip_accents(data.evolution)):
-        c.drawString(55, y, line)
-        y -= 14
-
-    y -= 10
-
-    # Recomandări
-    c.setFont("Helvetica-Bold", 11)
-    c.drawString(40, y, "Recomandari:")
-    y -= 15
-    c.setFont("Helvetica", 10)
-    for line in split_text(strip_accents(data.recommendations)):
-        c.drawString(55, y, line)
-        y -= 14
-
-    # semnătura + parafa
-    draw_signature(c, doctor)
+
+@router.get("/pdf/externare/jobs/{job_id}")
+def get_pdf_job(job_id: str, doctor: DoctorPublic = Depends(get_current_doctor)):
+    if not doctor:
+        raise HTTPException(status_code=401, detail="Neautentificat")
+    if not _JOB_ID.match(job_id):
+        raise HTTPException(status_code=404, detail="Job inexistent.")
+    return _job_view(job_id, export_jobs.get(job_id))
+
+
+@router.get("/pdf/externare/jobs/{job_id}/result")
+def get_pdf_job_result(job_id: str, doctor: DoctorPublic = Depends(get_current_doctor)):
+    if not doctor:
+        raise HTTPException(status_code=401, detail="Neautentificat")
+    if not _JOB_ID.match(job_id):
+        raise HTTPException(status_code=404, detail="Job inexistent.")
+    path = export_cache.get(job_id)
+    if not path:
+        if export_jobs.get(job_id) is not None:
+            raise HTTPException(status_code=409, detail="Jobul nu s-a terminat încă.")
+        raise HTTPException(status_code=404, detail="Job inexistent.")
+    return FileResponse(path, media_type="application/pdf", filename="externare.pdf")
 
 
 # -------------------------------------------------------------------------
-# UPLOAD PDF INVESTIGAȚII
+# EXPORT ÎN MASĂ (predare de tură, audit asigurători)
 # -------------------------------------------------------------------------
-@router.post("/uploads/investigatie")
-async def upload_investigatie(file: UploadFile = File(...)):
-    """
-    Upload pentru un singur PDF de investigații.
-    Returnează numele sub care a fost salvat pe server.
-    """
-    filename = file.filename or "investigatie.pdf"
+MAX_BULK_ITEMS = 500
+MAX_TRACKED_EXPORTS = 100
+BULK_CHUNK = 1024 * 1024
 
-    if not filename.lower().endswith(".pdf"):
-        raise HTTPException(status_code=400, detail="Se accepta doar fisiere PDF.")
+# progresul exporturilor în masă e în export_jobs (după antetul X-Export-Id), comun workerilor
 
-    safe_name = filename.replace("/", "_").replace("\\", "_")
-    dest = UPLOAD_DIR / safe_name
 
-    content = await file.read()
-    if not content.startswith(b"%PDF"):
-        raise HTTPException(status_code=400, detail="Fisier PDF invalid.")
+class _NothingExported(Exception):
+    """Nicio foaie din export nu a putut fi generată."""
 
-    dest.write_bytes(content)
 
-    return {"stored_name": safe_name}
-    # frontend-ul va folosi stored_name în lista de investigations
+def _save_progress(progress: dict) -> None:
+    # scriere mică, sincronă: actualizările aceluiași export rămân în ordine
+    export_jobs.save_export(progress)
 
 
-# -------------------------------------------------------------------------
-# GENERARE PDF FINAL (foaie + investigatii atasate)
-# -------------------------------------------------------------------------
-@router.post("/pdf/externare")
-def generate_pdf(
-    data: ExternareIn,
-    doctor: DoctorPublic = Depends(get_current_doctor),
-):
+class _ZipSink(io.RawIOBase):
     """
-    Genereaza foaia de externare si, daca exista,
-    ataseaza PDF-urile de investigatii ca pagini suplimentare.
+    Destinație fără seek pentru zipfile: octeții scriși sunt preluați de
+    generatorul răspunsului după fiecare bucată, deci arhiva nu stă în memorie.
     """
 
-    if not doctor:
-        raise HTTPException(status_code=401, detail="Neautentificat")
+    def __init__(self):
+        self._chunks: List[bytes] = []
 
-    # ----------------- 1. Pagina principală -----------------
-    base_buffer = BytesIO()
-    c = canvas.Canvas(base_buffer, pagesize=A4)
+    def writable(self) -> bool:
+        return True
 
-    draw_header(c)
-    draw_body(c, data, doctor)
+    def write(self, b) -> int:
+        self._chunks.append(bytes(b))
+        return len(b)
 
-    c.showPage()
-    c.save()
-    base_buffer.seek(0)
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
 
-    # Colectăm lista de PDF-uri atașate (acceptăm și field-ul vechi)
-    pdf_list = data.investigations or data.attached_pdfs or []
 
-    # Dacă nu avem nimic de atașat → doar foaia de externare
-    if not pdf_list:
-        return StreamingResponse(
-            base_buffer,
-            media_type="application/pdf",
-            headers={"Content-Disposition": "attachment; filename=externare.pdf"},
-        )
+def _part_name(index: int, data: Optional[ExternareIn], key: Optional[str]) -> str:
+    label = data.patient_name if data is not None else (key or "")[:12]
+    slug = re.sub(r"[^A-Za-z0-9]+", "_", strip_accents(label)).strip("_")[:40] or "foaie"
+    return f"{index + 1:03d}_{slug}.pdf"
 
-    # ----------------- 2. Facem merge cu investigațiile -----------------
-    merger = PdfMerger()
-    merger.append(base_buffer)
 
-    for name in pdf_list:
-        path = UPLOAD_DIR / name
-        if not path.exists():
-            continue
+async def _bulk_part(
+    index: int,
+    data: Optional[ExternareIn],
+    key: Optional[str],
+    doctor: DoctorPublic,
+    directory: Path,
+    limiter: asyncio.Semaphore,
+    progress: dict,
+) -> Tuple[int, str, Optional[Path]]:
+    """
+    O foaie din export: din cache dacă a mai fost randată, altfel randată în
+    pool. Fișierul e fixat în directorul exportului până e trimis.
+    """
+    name = _part_name(index, data, key)
+    try:
+        if data is not None:
+            data_dump, doctor_dump, attachments, key = await _prepare(data, doctor)
+        path = await run_in_threadpool(export_cache.get, key)
+        if path is None:
+            if data is None:
+                raise LookupError("Foaie inexistentă (cheie necunoscută sau expirată).")
+            # cel mult câte un job per proces de randare; restul pool-ului rămâne pentru cererile interactive
+            async with limiter:
+                while True:
+                    try:
+                        path = await _render_to_cache(key, data_dump, doctor_dump, attachments)
+                        break
+                    except PoolSaturated as e:
+                        await asyncio.sleep(e.retry_after)
+        pinned = await run_in_threadpool(export_cache.pin, path, directory / name)
+    except Exception as e:
+        progress["failed"] += 1
+        progress["errors"].append({"index": index, "name": name, "error": str(e)})
+        _save_progress(progress)
+        return index, name, None
+    progress["done"] += 1
+    _save_progress(progress)
+    return index, name, pinned
+
+
+async def _bulk_parts(sources, doctor: DoctorPublic, directory: Path, progress: dict):
+    """Foile exportului, în ordinea în care se termină."""
+    limiter = asyncio.Semaphore(max(1, render_pool.workers))
+    tasks = [
+        asyncio.create_task(_bulk_part(i, data, key, doctor, directory, limiter, progress))
+        for i, (data, key) in enumerate(sources)
+    ]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        # clientul a renunțat: nu mai randăm restul
+        for task in tasks:
+            task.cancel()
+
+
+async def _zip_body(sources, doctor: DoctorPublic, directory: Path, progress: dict):
+    sink = _ZipSink()
+    # PDF-urile sunt deja comprimate: ZIP_STORED (fără recomprimare)
+    zf = zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_STORED)
+    try:
+        async for _, name, path in _bulk_parts(sources, doctor, directory, progress):
+            if path is None:
+                continue
+            info = zipfile.ZipInfo.from_file(path, arcname=name)
+            with open(path, "rb") as src, zf.open(info, "w") as dest:
+                while True:
+                    chunk = await run_in_threadpool(src.read, BULK_CHUNK)
+                    if not chunk:
+                        break
+                    await run_in_threadpool(dest.write, chunk)
+                    yield sink.drain()
+            os.remove(path)
+            yield sink.drain()
+        if progress["errors"]:
+            lines = [f"{e['name']}: {e['error']}" for e in sorted(progress["errors"], key=lambda e: e["index"])]
+            zf.writestr("erori.txt", "\n".join(lines) + "\n")
+        zf.close()
+        yield sink.drain()
+    finally:
+        # export întrerupt: arhiva nu mai are unde fi terminată
+        zf.fp = None
+
+
+async def _pdf_body(sources, doctor: DoctorPublic, directory: Path, progress: dict):
+    parts = sorted([(i, path) async for i, _, path in _bulk_parts(sources, doctor, directory, progress) if path])
+    if not parts:
+        raise _NothingExported("Nicio foaie nu a putut fi generată.")
+    # un singur PDF nu poate fi trimis pe bucăți înainte de tabela xref: îl lipim pe disc, în pool
+    progress["status"] = "merging"
+    _save_progress(progress)
+    out = directory / "externari.pdf"
+    while True:
+        try:
+            await render_pool.submit(concat_pdfs, [str(p) for _, p in parts], str(out))
+            break
+        except PoolSaturated as e:
+            await asyncio.sleep(e.retry_after)
+    progress["status"] = "streaming"
+    _save_progress(progress)
+    with open(out, "rb") as f:
+        while True:
+            chunk = await run_in_threadpool(f.read, BULK_CHUNK)
+            if not chunk:
+                break
+            yield chunk
+
+
+async def _bulk_stream(payload: BulkExportIn, doctor: DoctorPublic, progress: dict):
+    sources = [(data, None) for data in payload.items] + [(None, key) for key in payload.keys]
+    body = _zip_body if payload.format == "zip" else _pdf_body
+    directory = await run_in_threadpool(export_cache.bulk_dir)
+    try:
+        async for chunk in body(sources, doctor, directory, progress):
+            if chunk:
+                yield chunk
+        progress["status"] = "done"
+    except asyncio.CancelledError:
+        progress["status"] = "cancelled"
+        raise
+    except Exception as e:
+        progress.update(status="failed", error=str(e))
+        raise
+    finally:
+        progress["finished_at"] = time.time()
+        _save_progress(progress)
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+async def _prepend(first: bytes, rest):
+    yield first
+    async for chunk in rest:
+        yield chunk
+
+
+@router.post("/pdf/externare/bulk")
+async def bulk_export(
+    payload: BulkExportIn,
+    doctor: DoctorPublic = Depends(get_current_doctor),
+):
+    """
+    Exportă mai multe foi de externare deodată: foi noi (`items`) și/sau foi
+    deja randate (`keys`). Foile sunt randate în paralel în pool, iar
+    răspunsul e trimis pe măsură ce se termină: o arhivă ZIP (un PDF per foaie,
+    plus erori.txt dacă unele au eșuat) sau un singur PDF cu toate foile.
+    Progresul: GET /api/pdf/externare/bulk/{X-Export-Id}, de pe orice worker.
+
+    Un singur PDF poate pleca abia după lipirea foilor, deci răspunsul începe
+    atunci: dacă nicio foaie nu a reușit întoarcem 422 cu erorile (nu un PDF
+    fără pagini), iar X-Export-Failed spune câte foi lipsesc.
+    """
+    if not doctor:
+        raise HTTPException(status_code=401, detail="Neautentificat")
+
+    total = len(payload.items) + len(payload.keys)
+    if not total:
+        raise HTTPException(status_code=400, detail="Nicio foaie de exportat.")
+    if total > MAX_BULK_ITEMS:
+        raise HTTPException(status_code=413, detail=f"Maxim {MAX_BULK_ITEMS} foi per export.")
+    if any(not _JOB_ID.match(key) for key in payload.keys):
+        raise HTTPException(status_code=400, detail="Cheie de foaie invalidă.")
+
+    export_id = uuid.uuid4().hex
+    await run_in_threadpool(export_jobs.prune_exports, MAX_TRACKED_EXPORTS, BULK_GRACE)
+    progress = {
+        "export_id": export_id,
+        "format": payload.format,
+        "status": "running",
+        "total": total,
+        "done": 0,
+        "failed": 0,
+        "errors": [],
+        "started_at": time.time(),
+    }
+    _save_progress(progress)
+    headers = {
+        "Content-Disposition": f"attachment; filename=externari.{payload.format}",
+        "X-Export-Id": export_id,
+    }
+
+    body = _bulk_stream(payload, doctor, progress)
+    if payload.format == "pdf":
         try:
-            merger.append(str(path))
-        except PdfReadError:
-            # dacă fișierul e corupt, îl sărim
-            continue
-        except Exception:
-            continue
-
-    final_buffer = BytesIO()
-    merger.write(final_buffer)
-    merger.close()
-    final_buffer.seek(0)
+            first = await body.__anext__()
+        except _NothingExported as e:
+            raise HTTPException(
+                status_code=422,
+                detail={"message": str(e), "errors": progress["errors"]},
+                headers={"X-Export-Id": export_id},
+            )
+        headers["X-Export-Failed"] = str(progress["failed"])
+        body = _prepend(first, body)
 
     return StreamingResponse(
-        final_buffer,
-        media_type="application/pdf",
-        headers={"Content-Disposition": "attachment; filename=externare.pdf"},
-    )
\ No newline at end of file
+        body,
+        media_type="application/zip" if payload.format == "zip" else "application/pdf",
+        headers=headers,
+    )
+
+
+@router.get("/pdf/externare/bulk/{export_id}")
+def get_bulk_export(export_id: str, doctor: DoctorPublic = Depends(get_current_doctor)):
+    if not doctor:
+        raise HTTPException(status_code=401, detail="Neautentificat")
+    progress = export_jobs.get_export(export_id)
+    if progress is None:
+        raise HTTPException(status_code=404, detail="Export inexistent.")
+    return progress
+
+
+@router.get("/pdf/metrics")
+def pdf_metrics():
+    return {
+        **render_pool.metrics(),
+        "cache": export_cache.stats(),
+        "attachments": attachment_store.stats(),
+        "search_index": investigation_index.stats(),
+        "jobs_tracked": export_jobs.count(),
+        "bulk_running": export_jobs.running_exports(BULK_GRACE),
+    }
@@ -1,7 +1,15 @@
-from fastapi import APIRouter
-from pydantic import BaseModel
+from fastapi import APIRouter, Depends, Request, HTTPException
+from pydantic import BaseModel, TypeAdapter, ValidationError
 from typing import List, Optional, Dict, Literal
-from datetime import date
+import json
+from datetime import datetime, timezone
+
+import numpy as np
+
+from ..services.cnp_utils import calculate_age, decode_many, sex_age
+from ..services.triage_engine import RULES_PATH, CompiledRules, TriageEngine
+from ..storage.audit_log import AUDIT_DIR, AuditLog
+from .auth import DoctorPublic, get_current_doctor
 
 router = APIRouter()
 
@@ -39,71 +47,23 @@ class TriageIn(BaseModel):
 
 
 # -----------------------------
-# 🔹 Extrage sexul și vârsta din CNP
+# 🔹 Reguli de triaj (conform legislației)
 # -----------------------------
-def sex_age_from_cnp(cnp: Optional[str]) -> Dict[str, Optional[object]]:
-    if not cnp or len(cnp) != 13 or not cnp.isdigit():
-        return {"age": None, "sex": None}
-
-    s = int(cnp[0])
-    yy = int(cnp[1:3])
-    mm = int(cnp[3:5])
-    dd = int(cnp[5:7])
-
-    # determină secolul
-    if s in (1, 2):
-        year = 1900 + yy
-    elif s in (3, 4):
-        year = 1800 + yy
-    elif s in (5, 6):
-        year = 2000 + yy
-    else:
-        year = 1900 + yy
+# Pragurile stau în data/triage_rules.json (versionat), compilat la pornire
+# și recompilat automat când fișierul se schimbă; vezi services/triage_engine.py.
+_NUMERIC_FIELDS = ("age", "sbp", "dbp", "hr", "rr", "spo2", "temp", "gcs", "pain", "resources_expected")
 
-    sex = "M" if s % 2 == 1 else "F"
+rules_engine = TriageEngine(RULES_PATH, fields=_NUMERIC_FIELDS, flags=RedFlags.model_fields)
 
-    try:
-        birth_date = date(year, mm, dd)
-        today = date.today()
-        age = today.year - birth_date.year - (
-            (today.month, today.day) < (birth_date.month, birth_date.day)
-        )
-    except Exception:
-        age = None
 
-    return {"age": age, "sex": sex}
-
-
-# -----------------------------
-# 🔹 Reguli de triaj (conform legislației)
-# -----------------------------
-def triage_rules(p: TriageIn):
-    reasons = []
-    advice = []
+def triage_rules(p: TriageIn, rules: Optional[CompiledRules] = None):
     p.resources_expected = p.resources_expected or 0
+    return (rules or rules_engine.current()).evaluate(p).as_tuple()
 
-    # --- Pas A: ROȘU (Nivel I)
-    def any_true(*vals): return any(bool(v) for v in vals)
-    if (p.sbp and p.sbp < 80) or (p.spo2 and p.spo2 < 90) or (p.rr and (p.rr < 8 or p.rr > 30)) or (p.gcs and p.gcs <= 8) or \
-       any_true(p.red_flags.active_bleeding, p.red_flags.severe_dyspnea, p.red_flags.anaphylaxis, p.red_flags.seizure_now, p.red_flags.major_trauma):
-        reasons.append("Condiție vitală critică")
-        advice = ["Anunță echipa de resuscitare", "Oxigen", "Acces venos", "Monitorizare"]
-        return 1, "red", "Roșu (Nivel I - Resuscitare)", "imediat", reasons, advice
-
-    # --- Pas B: PORTOCALIU (Nivel II)
-    if (p.pain and p.pain >= 8) or (p.gcs and 9 <= p.gcs <= 12) or (p.sbp and 80 <= p.sbp < 90) or \
-       (p.rr and 24 <= p.rr <= 30) or (p.spo2 and 90 <= p.spo2 <= 93) or (p.temp and p.temp >= 39.5) or p.red_flags.postictal_altered:
-        reasons.append("Risc vital moderat")
-        advice = ["Evaluare rapidă", "Analgezie", "Monitorizare", "Acces venos"]
-        return 2, "orange", "Portocaliu (Nivel II - Critic)", "≤10 minute", reasons, advice
-
-    # --- Pas C: Galben / Verde / Albastru
-    if p.resources_expected >= 2:
-        return 3, "yellow", "Galben (Nivel III - ≥2 resurse)", "≤30 minute", reasons, advice
-    elif p.resources_expected == 1:
-        return 4, "green", "Verde (Nivel IV - 1 resursă)", "≤60 minute", reasons, advice
-    else:
-        return 5, "blue", "Albastru (Nivel V - fără resurse)", "≤120 minute", reasons, advice
+
+def triage_rules_batch(patients: List[TriageIn], rules: Optional[CompiledRules] = None) -> np.ndarray:
+    """Nivelul (1–5) pentru fiecare pacient din lot, evaluat pe coloane NumPy."""
+    return (rules or rules_engine.current()).evaluate_batch(patients)
 
 
 # -----------------------------
@@ -117,19 +77,136 @@ class TriageOut(BaseModel):
     reasons: List[str]
     advice: List[str]
     normalized: Dict[str, Optional[object]]
+    rules_version: Optional[str] = None
 
 
-@router.post("/triage", response_model=TriageOut)
-def triage_endpoint(payload: TriageIn):
+def _fill_from_cnp(payload: TriageIn) -> None:
     # completează automat vârsta și sexul din CNP
     if payload.cnp and (payload.age is None or payload.sex is None):
-        info = sex_age_from_cnp(payload.cnp)
-        payload.age = payload.age or info.get("age")
-        payload.sex = payload.sex or info.get("sex")
+        age, sex = sex_age(payload.cnp)
+        payload.age = payload.age or age
+        payload.sex = payload.sex or sex
+
 
-    level, color, label, time_target, reasons, advice = triage_rules(payload)
+def _fill_many_from_cnp(patients: List[TriageIn]) -> None:
+    # varianta pe lot: fiecare CNP distinct e decodat o singură dată
+    pending = [p for p in patients if p.cnp and (p.age is None or p.sex is None)]
+    for p, info in zip(pending, decode_many(p.cnp for p in pending)):
+        if info is None:
+            continue
+        p.age = p.age or calculate_age(info.birth_date)
+        p.sex = p.sex or info.sex
+
+
+# -----------------------------
+# 🔹 Audit: ce date au produs ce nivel de triaj
+# -----------------------------
+def _audit_entry(ts: float, payload: TriageIn, out: TriageOut, doctor: Optional[DoctorPublic], source: str) -> str:
+    # apelat din firul de fundal al jurnalului, nu pe calea cererii
+    head = {
+        "ts": datetime.fromtimestamp(ts, timezone.utc).isoformat(timespec="milliseconds"),
+        "source": source,
+        "rules_version": out.rules_version,
+        "doctor": {"id": doctor.id, "name": doctor.full_name} if doctor else None,
+    }
+    return (
+        json.dumps(head, ensure_ascii=False)[:-1]
+        + ',"input":' + payload.model_dump_json()
+        + ',"output":' + out.model_dump_json() + "}"
+    )
+
+
+triage_audit = AuditLog(AUDIT_DIR, serialize=_audit_entry, prefix="triage")
+
+
+@router.post("/triage", response_model=TriageOut)
+def triage_endpoint(payload: TriageIn, doctor: Optional[DoctorPublic] = Depends(get_current_doctor)):
+    # în audit intră datele așa cum au fost trimise, înainte de completarea din CNP
+    received = payload.model_copy()
+    _fill_from_cnp(payload)
+
+    rules = rules_engine.current()
+    level, color, label, time_target, reasons, advice = triage_rules(payload, rules)
     norm = {"age": payload.age, "sex": payload.sex}
-    return TriageOut(
+    out = TriageOut(
         level=level, color=color, label=label, time_target=time_target,
-        reasons=reasons, advice=advice, normalized=norm
+        reasons=reasons, advice=advice, normalized=norm, rules_version=rules.version
     )
+    triage_audit.record(received, out, doctor, "triage")
+    return out
+
+
+@router.get("/triage/rules")
+def get_triage_rules():
+    # tabelul de reguli în vigoare (pentru audit)
+    rules = rules_engine.current()
+    return {"version": rules.version, "rules": rules.table, "engine": rules_engine.stats()}
+
+
+@router.get("/triage/audit/stats")
+def get_triage_audit_stats():
+    # intrări în așteptare, scrise, pierdute (buffer plin) și eșuate (I/O)
+    return triage_audit.stats()
+
+
+# -----------------------------
+# 🔹 Endpoint lot (triaj în masă)
+# -----------------------------
+_BATCH_ADAPTER = TypeAdapter(List[TriageIn])
+MAX_BATCH_SIZE = 5000
+
+
+def _parse_ndjson(body: bytes) -> List[TriageIn]:
+    patients = []
+    for lineno, line in enumerate(body.splitlines(), start=1):
+        if not line.strip():
+            continue
+        try:
+            patients.append(TriageIn.model_validate_json(line))
+        except ValidationError as e:
+            raise HTTPException(
+                status_code=422,
+                detail={"line": lineno, "errors": json.loads(e.json())},
+            )
+    return patients
+
+
+@router.post("/triage/batch", response_model=List[TriageOut])
+async def triage_batch_endpoint(request: Request, doctor: Optional[DoctorPublic] = Depends(get_current_doctor)):
+    """
+    Triaj pentru un lot de pacienți (incidente cu victime multiple).
+    Acceptă fie un array JSON de TriageIn, fie NDJSON (un pacient pe linie,
+    Content-Type: application/x-ndjson). Rezultatele sunt în aceeași ordine
+    și identice cu cele de la POST /triage.
+    """
+    body = await request.body()
+    content_type = request.headers.get("content-type", "")
+
+    if "ndjson" in content_type or "jsonlines" in content_type:
+        patients = _parse_ndjson(body)
+    else:
+        try:
+            patients = _BATCH_ADAPTER.validate_json(body or b"[]")
+        except ValidationError as e:
+            raise HTTPException(status_code=422, detail=json.loads(e.json()))
+
+    if len(patients) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=413, detail=f"Maxim {MAX_BATCH_SIZE} pacienți per lot.")
+
+    received = [p.model_copy() for p in patients]
+    _fill_many_from_cnp(patients)
+
+    rules = rules_engine.current()
+    levels = triage_rules_batch(patients, rules)
+
+    results = []
+    for p, original, level in zip(patients, received, levels.tolist()):
+        outcome = rules.by_level[level]
+        out = TriageOut(
+            level=level, color=outcome.color, label=outcome.label, time_target=outcome.time_target,
+            reasons=list(outcome.reasons), advice=list(outcome.advice),
+            normalized={"age": p.age, "sex": p.sex}, rules_version=rules.version,
+        )
+        triage_audit.record(original, out, doctor, "batch")
+        results.append(out)
+    return results
@@ -1,29 +1,18 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException
-import os
-from uuid import uuid4
+from fastapi import APIRouter, Depends, Request
 
-router = APIRouter()
-
-# Directorul unde salvăm PDF-urile încărcate
-UPLOAD_DIR = "triage_platform_v3_standard/uploads_investigatii"
-os.makedirs(UPLOAD_DIR, exist_ok=True)
+from .auth import get_current_doctor, DoctorPublic
+from ..services.upload_stream import PDF_UPLOAD_OPENAPI, save_attachment
 
-@router.post("/investigatie")
-async def upload_investigatie(file: UploadFile = File(...)):
-    # Acceptăm doar PDF
-    ext = os.path.splitext(file.filename)[1].lower()
-    if ext != ".pdf":
-        raise HTTPException(status_code=400, detail="Doar fișiere PDF sunt acceptate.")
-
-    # generăm un nume sigur: inv_<uuid>.pdf
-    stored_name = f"inv_{uuid4().hex}{ext}"
-    path = os.path.join(UPLOAD_DIR, stored_name)
+router = APIRouter()
 
-    # scriem PDF-ul pe disc
-    with open(path, "wb") as f:
-        f.write(await file.read())
+# PDF-urile încărcate ajung în store-ul de atașamente (storage/attachment_store.py);
+# fișierele vechi din uploads_investigatii/ sunt importate la pornire.
 
-    return {
-        "original_name": file.filename,
-        "stored_name": stored_name
-    }
+@router.post("/investigatie", openapi_extra=PDF_UPLOAD_OPENAPI)
+async def upload_investigatie(
+    request: Request,
+    doctor: DoctorPublic = Depends(get_current_doctor),
+):
+    # citim PDF-ul direct din cerere, în bucăți (numele .pdf și semnătura
+    # sunt verificate pe primele bucăți); același conținut e păstrat o singură dată
+    return await save_attachment(request, doctor.full_name if doctor else None)
@@ -1,10 +1,15 @@
 from fastapi import APIRouter
 from pydantic import BaseModel
-from typing import Optional
+from typing import Optional, List
+
+from ..services.live_updates import live_bus
+from ..services.ward_occupancy import ward_occupancy
 
 # 🔹 Router clar înregistrat cu tag vizibil în Swagger
 router = APIRouter(prefix="/wardmap", tags=["Wardmap"])
 
+live_bus.register_snapshot("wards", ward_occupancy.snapshot)
+
 # 🧠 model pentru cererea primită
 class WardSuggestionIn(BaseModel):
     triage_level: int
@@ -16,32 +21,69 @@ class WardSuggestionOut(BaseModel):
     suggested_ward: str
     confidence: float
     comment: str
+    free_beds: Optional[int] = None
+
+# 🔹 starea unei secții (din data/wardmap.csv + internările active)
+class WardStatus(BaseModel):
+    ward_name: str
+    category: str
+    department: Optional[str] = None
+    capacity: int
+    current: int
+    free: int
+
+# secțiile potrivite pe nivel, în ordinea preferinței, cu încrederea de bază
+_PREFERENCES = {
+    1: [("Terapie Intensivă", 0.98), ("Cardiologie / UPU Critici", 0.85)],
+    2: [("Cardiologie / UPU Critici", 0.91), ("Terapie Intensivă", 0.80), ("Secția Medicină Internă", 0.70)],
+    3: [("Secția Medicină Internă", 0.87), ("Cardiologie / UPU Critici", 0.70)],
+    4: [("Ambulatoriu", 0.80), ("Secția Medicină Internă", 0.65)],
+    5: [("Observație / Externare", 0.75), ("Ambulatoriu", 0.70)],
+}
+
+
+def _base_level(color: str, level: int) -> int:
+    # logica simplificată de exemplu:
+    if color in ["red", "roșu"] or level == 1:
+        return 1
+    elif color in ["orange", "portocaliu"] or level == 2:
+        return 2
+    elif color in ["yellow", "galben"] or level == 3:
+        return 3
+    elif color in ["green", "verde"] or level == 4:
+        return 4
+    return 5
+
+
+@router.get("", response_model=List[WardStatus])
+def ward_snapshot():
+    """Ocuparea curentă pe secții (paturi totale / ocupate / libere)."""
+    return ward_occupancy.snapshot()
+
 
 @router.post("/suggest", response_model=WardSuggestionOut)
 def suggest_ward(data: WardSuggestionIn):
     """
-    Returnează o sugestie AI imaginară pentru secția de internare.
-    Într-o versiune viitoare, logica va fi bazată pe modele AI reale.
+    Returnează o sugestie pentru secția de internare.
+    Secțiile urmărite în wardmap.csv (coloana `department` leagă secțiile
+    fizice de cele de aici) fără paturi libere sunt sărite în favoarea
+    următoarei opțiuni; secțiile neurmărite sunt considerate disponibile.
     """
     color = data.triage_color.lower()
     level = data.triage_level
+    options = _PREFERENCES[_base_level(color, level)]
 
-    # logica simplificată de exemplu:
-    if color in ["red", "roșu"] or level == 1:
-        ward = "Terapie Intensivă"
-        confidence = 0.98
-    elif color in ["orange", "portocaliu"] or level == 2:
-        ward = "Cardiologie / UPU Critici"
-        confidence = 0.91
-    elif color in ["yellow", "galben"] or level == 3:
-        ward = "Secția Medicină Internă"
-        confidence = 0.87
-    elif color in ["green", "verde"] or level == 4:
-        ward = "Ambulatoriu"
-        confidence = 0.80
+    ward, confidence = options[0]
+    for candidate, conf in options:
+        free = ward_occupancy.free_beds(candidate)
+        if free is None or free > 0:
+            ward, confidence = candidate, conf
+            break
     else:
-        ward = "Observație / Externare"
-        confidence = 0.75
+        # toate opțiunile sunt pline: rămâne prima
+        free = ward_occupancy.free_beds(ward)
 
     comment = f"Pacientul de nivel {level} ({color.upper()}) este potrivit pentru {ward.lower()}."
-    return WardSuggestionOut(suggested_ward=ward, confidence=confidence, comment=comment)
+    if free is not None:
+        comment += f" Paturi libere: {free}."
+    return WardSuggestionOut(suggested_ward=ward, confidence=confidence, comment=comment, free_beds=free)
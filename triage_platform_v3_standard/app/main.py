@@ -4,7 +4,11 @@ from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 import os
 from app.api import auth
-from app.api import triage, admissions, wardmap, discharge, pdf_export, uploads
+from app.services import pdf_layout, pdf_pool
+from app.services.live_updates import live_bus
+from app.storage.attachment_store import attachment_store
+from app.storage.investigation_index import investigation_index
+from app.api import triage, admissions, wardmap, discharge, pdf_export, uploads, live, patients, investigations
 
 # 🔹 Inițializăm aplicația FastAPI
 app = FastAPI(title="Platformă de triaj", version="1.0")
@@ -28,6 +32,30 @@ app.include_router(auth.router, prefix="/api")
 app.include_router(discharge.router,  prefix="/api")
 app.include_router(pdf_export.router, prefix="/api")
 app.include_router(uploads.router, prefix="/api")
+app.include_router(live.router, prefix="/api")
+app.include_router(patients.router, prefix="/api")
+app.include_router(investigations.router, prefix="/api")
+
+# 🔹 Indexuri construite o singură dată, la pornire
+@app.on_event("startup")
+def build_indexes():
+    triage.rules_engine.current()
+    discharge.get_suggestion_index()
+    patients.get_registry()
+    attachment_store.import_legacy()
+    # GC periodic; rulează la un singur worker pe interval
+    attachment_store.start_gc()
+    investigation_index.backfill()
+    pdf_layout.get_fonts()
+
+@app.on_event("shutdown")
+def flush_storage():
+    discharge.close_learning()
+    triage.triage_audit.close()
+    investigation_index.close()
+    attachment_store.close()
+    live_bus.close()
+    pdf_pool.render_pool.shutdown()
 
 # 🔹 Redirecționare către triaj
 @app.get("/")
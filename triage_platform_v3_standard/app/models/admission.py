@@ -16,10 +16,16 @@ class AdmissionCreate(BaseModel):
 
 class Admission(BaseModel):
     id: str
-    patient_id: str
-    reason: str
+    patient_id: Optional[str] = None
+    first_name: Optional[str] = None
+    last_name: Optional[str] = None
+    triage_level: Optional[int] = None
+    triage_color: Optional[str] = None
+    reason: Optional[str] = None
     ward: Optional[str] = None
-    type: str
+    bed: Optional[int] = None
+    bed_label: Optional[str] = None
+    type: str = "continua"
     created_at: datetime
-    status: Literal["active", "discharged"]
+    status: Literal["active", "discharged"] = "active"
     interventions: List[Intervention] = []
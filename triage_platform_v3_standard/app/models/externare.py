@@ -0,0 +1,37 @@
+from pydantic import BaseModel
+from typing import List, Literal, Optional
+
+
+class ExternareIn(BaseModel):
+    # date pacient
+    patient_name: str
+    cnp: Optional[str] = None
+    age: Optional[int] = None
+    sex: Optional[str] = None
+
+    # conținut medical
+    diagnosis: str
+    evolution: str
+    recommendations: str
+
+    # info triage
+    triage_level: Optional[int] = None
+    triage_color: Optional[str] = None
+    reason: Optional[str] = None
+
+    # lista de fișiere PDF salvate la upload
+    investigations: List[str] = []          # numele din frontend
+    attached_pdfs: List[str] = []          # fallback dacă mai folosești numele vechi
+
+    class Config:
+        orm_mode = True
+
+
+class BulkExportIn(BaseModel):
+    # foi noi de randat
+    items: List[ExternareIn] = []
+    # foi deja randate: id-ul întors de /api/pdf/externare/jobs (cheia din cache)
+    keys: List[str] = []
+
+    # o arhivă ZIP (un PDF per foaie) sau un singur PDF cu toate foile
+    format: Literal["zip", "pdf"] = "zip"
@@ -1,31 +1,119 @@
-from datetime import date
+import time
+from operator import mul
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+# ponderile cifrei de control (primele 12 cifre)
+_WEIGHTS = (2, 7, 9, 1, 4, 6, 3, 5, 8, 2, 7, 9)
+
+# prima cifră -> secolul nașterii (7/8/9: rezidenți/străini, secol necunoscut → 1900)
+_CENTURY = {1: 1900, 2: 1900, 3: 1800, 4: 1800, 5: 2000, 6: 2000, 7: 1900, 8: 1900, 9: 1900}
+
+# 01-46 județe + sectoarele București, 47/48 foste sectoare 7/8, 51 Călărași,
+# 52 Giurgiu, 70 CNP-uri atribuite indiferent de județ
+_COUNTIES = frozenset(range(1, 49)) | {51, 52, 70}
+
+# câte CNP-uri decodate păstrăm în memorie
+MEMO_SIZE = 65536
+
+
+class InvalidCnp(ValueError):
+    pass
+
+
+class CnpInfo(NamedTuple):
+    birth_date: date
+    sex: str
+    county: int
+
+
+@lru_cache(maxsize=MEMO_SIZE)
+def decode_cnp(cnp: str) -> CnpInfo:
+    """
+    Decodează și validează un CNP (format, dată, județ, cifră de control).
+    Rezultatul e memorat; ridică InvalidCnp (un ValueError) dacă nu e valid.
+    """
+    if not isinstance(cnp, str) or len(cnp) != 13 or not (cnp.isascii() and cnp.isdigit()):
+        raise InvalidCnp("CNP invalid")
+
+    d = [c - 48 for c in cnp.encode("ascii")]
+    s = d[0]
+    if s == 0:
+        raise InvalidCnp("CNP invalid: cifra de sex")
+    county = d[7] * 10 + d[8]
+    if county not in _COUNTIES:
+        raise InvalidCnp("CNP invalid: cod de județ")
+    rest = sum(map(mul, d, _WEIGHTS)) % 11
+    if (1 if rest == 10 else rest) != d[12]:
+        raise InvalidCnp("CNP invalid: cifra de control")
+    try:
+        birth_date = date(_CENTURY[s] + d[1] * 10 + d[2], d[3] * 10 + d[4], d[5] * 10 + d[6])
+    except ValueError:
+        raise InvalidCnp("CNP invalid: data nașterii")
+
+    return CnpInfo(birth_date, "M" if s % 2 == 1 else "F", county)
+
+
+def decode_many(cnps: Iterable[Optional[str]]) -> List[Optional[CnpInfo]]:
+    """
+    Decodare în lot (triaj în lot, importuri): fiecare CNP distinct e decodat
+    o singură dată; pentru cele lipsă sau invalide întoarce None.
+    """
+    cnps = list(cnps)
+    decoded: Dict[Optional[str], Optional[CnpInfo]] = {}
+    for cnp in cnps:
+        if cnp in decoded:
+            continue
+        try:
+            decoded[cnp] = decode_cnp(cnp) if cnp else None
+        except InvalidCnp:
+            decoded[cnp] = None
+    return [decoded[cnp] for cnp in cnps]
+
+
+# -----------------------------
+# 🔹 "azi", recalculat o dată pe zi
+# -----------------------------
+_TODAY: Tuple[float, Optional[date]] = (0.0, None)
+
+
+def current_date() -> date:
+    """date.today(), dar cu valoarea ținută în cache până la miezul nopții."""
+    global _TODAY
+    expires_at, value = _TODAY
+    now = time.time()
+    if value is None or now >= expires_at:
+        current = datetime.fromtimestamp(now)
+        midnight = datetime.combine(current.date() + timedelta(days=1), datetime.min.time())
+        value = current.date()
+        _TODAY = (midnight.timestamp(), value)
+    return value
 
-def parse_cnp(cnp: str):
-    if len(cnp) != 13 or not cnp.isdigit():
-        raise ValueError("CNP invalid")
-
-    s = int(cnp[0])
-    yy = int(cnp[1:3])
-    mm = int(cnp[3:5])
-    dd = int(cnp[5:7])
-
-    if s in (1, 2):
-        year = 1900 + yy
-    elif s in (5, 6):
-        year = 2000 + yy
-    elif s in (3, 4):
-        year = 1800 + yy
-    else:
-        year = 1900 + yy
-
-    birth_date = date(year, mm, dd)
-    sex = "M" if s % 2 == 1 else "F"
-    return birth_date, sex
 
 def calculate_age(birth_date: date, today: date | None = None) -> int:
     if today is None:
-        today = date.today()
+        today = current_date()
     years = today.year - birth_date.year
     if (today.month, today.day) < (birth_date.month, birth_date.day):
         years -= 1
     return years
+
+
+# -----------------------------
+# 🔹 API folosit de pacienți și triaj
+# -----------------------------
+def parse_cnp(cnp: str):
+    info = decode_cnp(cnp)
+    return info.birth_date, info.sex
+
+
+def sex_age(cnp: Optional[str]) -> Tuple[Optional[int], Optional[str]]:
+    """(vârstă, sex) din CNP, sau (None, None) dacă lipsește ori e invalid."""
+    if not cnp:
+        return None, None
+    try:
+        info = decode_cnp(cnp)
+    except InvalidCnp:
+        return None, None
+    return calculate_age(info.birth_date), info.sex
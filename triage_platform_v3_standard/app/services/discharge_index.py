@@ -0,0 +1,116 @@
+import threading
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+# Lungimea n-gramelor din indexul inversat (trigrame de caractere).
+NGRAM = 3
+
+
+def normalize_reason(reason: Optional[str]) -> str:
+    return (reason or "").lower().strip()
+
+
+def _ngrams(text: str) -> Set[str]:
+    return {text[i:i + NGRAM] for i in range(len(text) - NGRAM + 1)}
+
+
+class _LevelIndex:
+    """Index pentru un singur nivel de triaj."""
+
+    def __init__(self):
+        # motiv normalizat -> (număr de ordine, rândul cel mai recent)
+        self.latest: Dict[str, Tuple[int, dict]] = {}
+        # trigramă -> motivele normalizate care o conțin
+        self.postings: Dict[str, Set[str]] = {}
+        # lungimile distincte ale motivelor indexate (pentru "motiv vechi ⊂ motiv nou")
+        self.lengths: Dict[int, int] = {}
+
+    def add(self, seq: int, reason: str, row: dict) -> None:
+        if reason not in self.latest:
+            for g in _ngrams(reason):
+                self.postings.setdefault(g, set()).add(reason)
+            self.lengths[len(reason)] = self.lengths.get(len(reason), 0) + 1
+        self.latest[reason] = (seq, row)
+
+    def _containing(self, query: str) -> Iterable[str]:
+        """Motivele indexate care conțin `query`."""
+        if len(query) < NGRAM:
+            # interogare prea scurtă pentru trigrame → verificăm direct
+            return [r for r in self.latest if query in r]
+        sets = []
+        for g in _ngrams(query):
+            s = self.postings.get(g)
+            if not s:
+                return []
+            sets.append(s)
+        sets.sort(key=len)
+        candidates = set(sets[0])
+        for s in sets[1:]:
+            candidates &= s
+            if not candidates:
+                return []
+        return [r for r in candidates if query in r]
+
+    def _contained(self, query: str) -> Iterable[str]:
+        """Motivele indexate care sunt subșiruri ale lui `query`."""
+        found = []
+        n = len(query)
+        for length in self.lengths:
+            if length > n:
+                continue
+            seen = set()
+            for i in range(n - length + 1):
+                sub = query[i:i + length]
+                if sub in seen:
+                    continue
+                seen.add(sub)
+                if sub in self.latest:
+                    found.append(sub)
+        return found
+
+    def best_match(self, query: str) -> Optional[dict]:
+        best: Optional[Tuple[int, dict]] = None
+        for reason in list(self._containing(query)) + list(self._contained(query)):
+            hit = self.latest[reason]
+            if best is None or hit[0] > best[0]:
+                best = hit
+        return best[1] if best else None
+
+
+class DischargeSuggestionIndex:
+    """
+    Index în memorie peste istoricul de externări confirmate.
+
+    Păstrează, pe fiecare nivel de triaj, cel mai recent caz pentru fiecare
+    motiv normalizat și un index inversat pe trigrame, astfel încât căutarea
+    „cel mai recent caz cu motiv asemănător” nu mai parcurge tot istoricul.
+    """
+
+    def __init__(self, rows: Iterable[dict] = ()):
+        self._lock = threading.Lock()
+        self._levels: Dict[int, _LevelIndex] = {}
+        self._seq = 0
+        for row in rows:
+            self.add(row)
+
+    def __len__(self) -> int:
+        return self._seq
+
+    def add(self, row: dict) -> None:
+        with self._lock:
+            self._seq += 1
+            reason = normalize_reason(row.get("reason"))
+            if not reason:
+                # fără motiv, cazul nu poate fi potrivit niciodată
+                return
+            level = row.get("triage_level")
+            self._levels.setdefault(level, _LevelIndex()).add(self._seq, reason, row)
+
+    def find(self, triage_level: int, reason: Optional[str]) -> Optional[dict]:
+        query = normalize_reason(reason)
+        if not query:
+            return None
+        with self._lock:
+            idx = self._levels.get(triage_level)
+            if idx is None:
+                return None
+            return idx.best_match(query)
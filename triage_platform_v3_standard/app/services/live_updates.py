@@ -0,0 +1,172 @@
+import asyncio
+import os
+import sqlite3
+import threading
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from ..storage.live_events import LiveEventLog, create_event_log
+
+# câte evenimente poate avea în așteptare un client înainte să fie declarat rămas în urmă
+QUEUE_SIZE = 256
+# cât de des verifică fiecare worker tabela comună de evenimente
+POLL_SECONDS = float(os.environ.get("TRIAGE_LIVE_POLL_SECONDS", 0.1))
+
+
+class Subscriber:
+    """Un client conectat; primește evenimentele în bucla lui asyncio."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, queue_size: int = QUEUE_SIZE, after: int = 0):
+        self.loop = loop
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.lagging = False
+        # evenimentele până la acest seq le are deja (primite de la alt worker)
+        self.after = after
+
+    def offer(self, event: Dict[str, Any]) -> None:
+        # rulează în bucla clientului (call_soon_threadsafe)
+        if self.lagging or event["seq"] <= self.after:
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # clientul nu ține pasul: golim coada și îi cerem resincronizare;
+            # fără seq, clientul revine cu ultimul id primit efectiv
+            self.lagging = True
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait({"seq": None, "type": "resync", "data": None})
+
+
+def _deliver(subscribers: List[Subscriber], events: List[Dict[str, Any]]) -> None:
+    for sub in subscribers:
+        for event in events:
+            sub.offer(event)
+
+
+class LiveBus:
+    """
+    Canal de notificări între workeri. Fiecare modificare e scrisă în tabela
+    comună de evenimente (storage/live_events), care îi dă numărul de secvență,
+    deci `seq` / `Last-Event-ID` au același sens la toți workerii.
+
+    Un fir de fundal al fiecărui worker citește evenimentele noi (doar când
+    baza s-a schimbat) și le trimite abonaților lui, cu un singur apel în
+    bucla asyncio pentru toți. Un client care revine cu ultimul `seq` primit
+    își recuperează diferențele din tabelă; dacă a rămas prea mult în urmă,
+    primește un snapshot complet.
+    """
+
+    def __init__(self, log: LiveEventLog, poll_seconds: float = POLL_SECONDS):
+        self.log = log
+        self.poll_seconds = poll_seconds
+        self._lock = threading.Lock()
+        # ultimul seq trimis abonaților acestui worker
+        self._seq = 0
+        self._subscribers: Set[Subscriber] = set()
+        self._snapshots: Dict[str, Callable[[], Any]] = {}
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._poller: Optional[threading.Thread] = None
+
+    @property
+    def seq(self) -> int:
+        self._ensure_started()
+        return self._seq
+
+    def register_snapshot(self, name: str, provider: Callable[[], Any]) -> None:
+        self._snapshots[name] = provider
+
+    def publish(self, type: str, data: Any) -> int:
+        """Poate fi apelat din orice fir sau worker; întoarce seq-ul evenimentului."""
+        seq = self.log.append(type, data)
+        # abonații din același worker nu mai așteaptă următoarea verificare
+        self._wake.set()
+        return seq
+
+    # ----------------- livrare -----------------
+    def _ensure_started(self) -> None:
+        with self._lock:
+            if self._poller is not None:
+                return
+            self._seq = self.log.last_seq()
+            self._stop.clear()
+            self._poller = threading.Thread(target=self._poll_loop, name="live-bus-poller", daemon=True)
+            self._poller.start()
+
+    def _poll_loop(self) -> None:
+        version = None
+        while not self._stop.is_set():
+            self._wake.wait(self.poll_seconds)
+            self._wake.clear()
+            try:
+                current = self.log.data_version()
+                if current == version:
+                    continue
+                version = current
+                self._dispatch()
+            except sqlite3.Error:
+                # baza e ocupată; reîncercăm la următoarea verificare
+                version = None
+
+    def _dispatch(self) -> None:
+        events = self.log.since(self._seq)
+        if not events:
+            return
+        with self._lock:
+            self._seq = events[-1]["seq"]
+            subscribers = list(self._subscribers)
+        by_loop: Dict[asyncio.AbstractEventLoop, List[Subscriber]] = defaultdict(list)
+        for sub in subscribers:
+            by_loop[sub.loop].append(sub)
+        for loop, subs in by_loop.items():
+            try:
+                loop.call_soon_threadsafe(_deliver, subs, events)
+            except RuntimeError:
+                # bucla clienților s-a închis între timp
+                for sub in subs:
+                    self.unsubscribe(sub)
+
+    # ----------------- abonați -----------------
+    def subscribe(
+        self, since: Optional[int] = None, loop: Optional[asyncio.AbstractEventLoop] = None
+    ) -> Tuple[Subscriber, Optional[List[Dict[str, Any]]], int]:
+        """
+        Înregistrează un client. Întoarce (abonat, evenimentele ratate, seq curent);
+        evenimentele ratate sunt None dacă e nevoie de snapshot.
+        """
+        self._ensure_started()
+        oldest, last = self.log.bounds()
+        known = since is not None and 0 <= since <= last
+        sub = Subscriber(loop or asyncio.get_running_loop(), after=since if known else 0)
+        with self._lock:
+            self._subscribers.add(sub)
+            seq = self._seq
+        backlog = None
+        if known:
+            if since >= seq:
+                # clientul e la zi (poate chiar înaintea acestui worker)
+                backlog = []
+            elif since >= oldest - 1:
+                backlog = self.log.since(since, seq)
+        return sub, backlog, seq
+
+    def unsubscribe(self, sub: Subscriber) -> None:
+        with self._lock:
+            self._subscribers.discard(sub)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {name: provider() for name, provider in self._snapshots.items()}
+
+    def stats(self) -> Dict[str, int]:
+        return {"seq": self.seq, "subscribers": len(self._subscribers), "history": self.log.count()}
+
+    def close(self) -> None:
+        self._stop.set()
+        self._wake.set()
+        poller, self._poller = self._poller, None
+        if poller is not None:
+            poller.join(timeout=2)
+
+
+live_bus = LiveBus(create_event_log())
@@ -0,0 +1,291 @@
+import threading
+import unicodedata
+from bisect import bisect_left, insort
+from datetime import date
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from ..storage import json_store
+from .cnp_utils import calculate_age, parse_cnp
+
+COLLECTION = "patients"
+# CNP -> id pacient, cheie unică în jurnal (deduplicare și între workeri)
+CNP_COLLECTION = "patients_by_cnp"
+
+NGRAM = 3
+
+
+def normalize_name(text: Optional[str]) -> str:
+    text = unicodedata.normalize("NFKD", text or "")
+    return "".join(ch for ch in text if not unicodedata.combining(ch)).lower().strip()
+
+
+def _tokens(text: Optional[str]) -> List[str]:
+    return [t for t in normalize_name(text).replace("-", " ").split() if t]
+
+
+def _ngrams(text: str) -> Set[str]:
+    return {text[i:i + NGRAM] for i in range(len(text) - NGRAM + 1)}
+
+
+def _indexable(record: dict) -> bool:
+    return bool(record.get("cnp") and record.get("birth_date"))
+
+
+class PatientRegistry:
+    """
+    Registrul de pacienți, persistat prin json_store (colecția "patients").
+
+    În memorie: un index hash pe CNP (pacientul care revine e găsit direct,
+    fără înregistrare nouă) și un index pe numele normalizat (fără diacritice):
+    lista sortată a cuvintelor distincte pentru căutare după prefix și
+    trigrame pe cuvinte pentru căutare după subșir. Data nașterii și sexul
+    sunt extrase din CNP o singură dată, la inserare. Înaintea fiecărei
+    citiri, indexul e adus la zi cu ce au scris alți workeri în jurnal.
+    """
+
+    def __init__(self, records: Iterable[dict] = (), position: Optional[Tuple[int, int]] = None):
+        self._lock = threading.Lock()
+        # poziția din jurnal până la care indexul e la zi (None = fără jurnal)
+        self._position = position
+        self._load(records)
+
+    def _load(self, records: Iterable[dict]) -> None:
+        self._by_id: Dict[str, dict] = {}
+        self._by_cnp: Dict[str, str] = {}
+        self._cnps: List[str] = []
+        # cuvânt din nume -> id-urile pacienților care îl au
+        self._token_ids: Dict[str, List[str]] = {}
+        self._sorted_tokens: List[str] = []
+        self._token_grams: Dict[str, Set[str]] = {}
+        self._record_tokens: Dict[str, List[str]] = {}
+        for record in records:
+            if _indexable(record):
+                self._index(record, bulk=True)
+        # la încărcare sortăm o singură dată, nu la fiecare inserare
+        self._cnps.sort()
+        self._sorted_tokens.sort()
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    # ----------------- indexare -----------------
+    def _index(self, record: dict, bulk: bool = False) -> None:
+        pid = record["id"]
+        if pid in self._by_id:
+            self._unindex(pid)
+        self._by_id[pid] = record
+        if record["cnp"] not in self._by_cnp:
+            self._by_cnp[record["cnp"]] = pid
+            if bulk:
+                self._cnps.append(record["cnp"])
+            else:
+                insort(self._cnps, record["cnp"])
+        tokens = list(dict.fromkeys(_tokens(record["name"])))
+        self._record_tokens[pid] = tokens
+        for tok in tokens:
+            ids = self._token_ids.get(tok)
+            if ids is None:
+                ids = self._token_ids[tok] = []
+                if bulk:
+                    self._sorted_tokens.append(tok)
+                else:
+                    insort(self._sorted_tokens, tok)
+                for g in _ngrams(tok):
+                    self._token_grams.setdefault(g, set()).add(tok)
+            ids.append(pid)
+
+    def _unindex(self, pid: str) -> None:
+        record = self._by_id.pop(pid, None)
+        if record is None:
+            return
+        if self._by_cnp.get(record["cnp"]) == pid:
+            del self._by_cnp[record["cnp"]]
+            i = bisect_left(self._cnps, record["cnp"])
+            if i < len(self._cnps) and self._cnps[i] == record["cnp"]:
+                del self._cnps[i]
+        for tok in self._record_tokens.pop(pid, []):
+            ids = self._token_ids[tok]
+            ids.remove(pid)
+            if ids:
+                continue
+            del self._token_ids[tok]
+            del self._sorted_tokens[bisect_left(self._sorted_tokens, tok)]
+            for g in _ngrams(tok):
+                grams = self._token_grams[g]
+                grams.discard(tok)
+                if not grams:
+                    del self._token_grams[g]
+
+    def refresh(self) -> None:
+        """
+        Aduce indexul la zi cu pacienții scriși de alți workeri. Verificarea
+        e o comparație de poziție în jurnal; dacă s-a scris ceva, se citesc
+        doar liniile noi, iar după o compactare se reîncarcă tot.
+        """
+        if self._position is None:
+            return
+        result = json_store.changes_since(COLLECTION, self._position)
+        if result is None:
+            position = json_store.position()
+            records = json_store.load_db().get(COLLECTION, {}).values()
+            with self._lock:
+                self._load(records)
+                self._position = position
+            return
+        position, changes = result
+        with self._lock:
+            # alt fir poate să fi aplicat deja modificări mai noi
+            if position[0] == self._position[0] and position[1] <= self._position[1]:
+                return
+            for pid, record in changes:
+                if record is not None and _indexable(record):
+                    self._index(record)
+                else:
+                    self._unindex(pid)
+            self._position = position
+
+    # ----------------- inserare -----------------
+    def register(self, cnp: str, name: str, phone: Optional[str] = None, address: Optional[str] = None):
+        """
+        Întoarce (pacient, creat). Un CNP deja cunoscut întoarce pacientul
+        existent. Ridică ValueError pentru un CNP invalid.
+        """
+        existing = self.get_by_cnp(cnp)
+        if existing is not None:
+            return existing, False
+
+        birth_date, sex = parse_cnp(cnp)
+        record = {
+            "id": json_store.next_id(COLLECTION),
+            "cnp": cnp,
+            "name": name.strip(),
+            "birth_date": birth_date.isoformat(),
+            "sex": sex,
+            "phone": phone,
+            "address": address,
+        }
+        # înregistrarea e scrisă înaintea cheii CNP, ca un CNP revendicat să aibă mereu pacientul salvat
+        json_store.put_record(COLLECTION, record["id"], record)
+        owner = json_store.put_record_if_absent(CNP_COLLECTION, cnp, record["id"])
+        if owner is not None:
+            # alt worker (sau fir) a înregistrat același CNP între timp
+            json_store.delete_record(COLLECTION, record["id"])
+            return self._adopt(owner), False
+        with self._lock:
+            self._index(record)
+        return record, True
+
+    def _adopt(self, patient_id: str) -> Optional[dict]:
+        record = json_store.get_record(COLLECTION, patient_id)
+        if record is not None:
+            with self._lock:
+                if record["id"] not in self._by_id:
+                    self._index(record)
+        return record
+
+    # ----------------- căutare -----------------
+    def get(self, patient_id: str) -> Optional[dict]:
+        self.refresh()
+        return self._by_id.get(patient_id)
+
+    def get_by_cnp(self, cnp: str) -> Optional[dict]:
+        self.refresh()
+        pid = self._by_cnp.get(cnp)
+        if pid is not None:
+            return self._by_id[pid]
+        # poate a fost înregistrat de alt worker
+        owner = json_store.get_record(CNP_COLLECTION, cnp)
+        return self._adopt(owner) if owner is not None else None
+
+    def _prefix_range(self, term: str) -> Tuple[int, int]:
+        lo = bisect_left(self._sorted_tokens, term)
+        hi = bisect_left(self._sorted_tokens, term + "\uffff", lo)
+        return lo, hi
+
+    def _smallest_gram_set(self, term: str) -> Set[str]:
+        best: Optional[Set[str]] = None
+        for g in _ngrams(term):
+            s = self._token_grams.get(g)
+            if not s:
+                return set()
+            if best is None or len(s) < len(best):
+                best = s
+        return best or set()
+
+    def _estimate(self, term: str) -> int:
+        """Câți pacienți ar trebui parcurși pentru `term` (alegerea termenului de pornire)."""
+        return sum(len(self._token_ids[tok]) for tok in islice(self._matching_tokens(term), 50))
+
+    def _matching_tokens(self, term: str) -> Iterator[str]:
+        """Cuvintele indexate care încep cu `term`, apoi (leneș) cele care doar îl conțin."""
+        lo, hi = self._prefix_range(term)
+        yield from self._sorted_tokens[lo:hi]
+        if len(term) < NGRAM:
+            return
+        for tok in self._smallest_gram_set(term):
+            if term in tok and not tok.startswith(term):
+                yield tok
+
+    def search(self, query: str, limit: int = 20) -> List[dict]:
+        query = (query or "").strip()
+        if not query:
+            return []
+        self.refresh()
+        with self._lock:
+            if query.isdigit():
+                # CNP complet sau început de CNP
+                out = []
+                i = bisect_left(self._cnps, query)
+                while i < len(self._cnps) and self._cnps[i].startswith(query) and len(out) < limit:
+                    out.append(self._by_id[self._by_cnp[self._cnps[i]]])
+                    i += 1
+                return out
+
+            terms = list(dict.fromkeys(_tokens(query)))
+            if not terms:
+                return []
+            # pornim de la termenul cel mai selectiv; ceilalți se verifică pe cuvintele pacientului
+            driver = min(terms, key=self._estimate)
+            others = [t for t in terms if t != driver]
+
+            out: List[dict] = []
+            seen: Set[str] = set()
+            for tok in self._matching_tokens(driver):
+                for pid in self._token_ids[tok]:
+                    if pid in seen:
+                        continue
+                    seen.add(pid)
+                    words = self._record_tokens[pid]
+                    if all(any(t in w for w in words) for t in others):
+                        out.append(self._by_id[pid])
+                        if len(out) >= limit:
+                            return out
+            return out
+
+    def list(self, limit: int = 100, offset: int = 0) -> List[dict]:
+        self.refresh()
+        with self._lock:
+            return list(islice(self._by_id.values(), offset, offset + limit))
+
+
+def with_age(record: dict, today: Optional[date] = None) -> dict:
+    """Vârsta se calculează la citire din data nașterii salvată (nu se învechește)."""
+    birth_date = date.fromisoformat(record["birth_date"])
+    return {**record, "birth_date": birth_date, "age": calculate_age(birth_date, today)}
+
+
+_REGISTRY: Optional[PatientRegistry] = None
+_REGISTRY_LOCK = threading.Lock()
+
+
+def get_registry() -> PatientRegistry:
+    global _REGISTRY
+    if _REGISTRY is None:
+        with _REGISTRY_LOCK:
+            if _REGISTRY is None:
+                # poziția e citită înaintea încărcării: ce se scrie între timp e reaplicat la refresh
+                position = json_store.position()
+                db = json_store.load_db()
+                _REGISTRY = PatientRegistry(db.get(COLLECTION, {}).values(), position)
+    return _REGISTRY
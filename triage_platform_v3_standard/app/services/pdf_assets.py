@@ -0,0 +1,281 @@
+import copy
+import hashlib
+import os
+import threading
+import zlib
+from collections import OrderedDict
+from io import BytesIO
+from typing import Dict, Optional, Tuple
+
+from PIL import Image
+from PyPDF2 import PdfReader
+from reportlab.pdfbase import pdfdoc
+from reportlab.pdfgen import canvas
+from reportlab.lib.boxstuff import aspectRatioFix
+
+# câte imagini (logo, parafe, semnături) păstrăm decodate în memorie
+MAX_IMAGES = 32
+# rezoluția la care păstrăm imaginile în PDF (raportat la mărimea desenată);
+# sursele sunt mult mai mari (logo 1080 px desenat pe 70 pt ≈ 2,5 cm)
+PRINT_DPI = int(os.environ.get("TRIAGE_PDF_IMAGE_DPI", 300))
+# investigații PDF păstrate parsate (per proces de randare)
+MAX_READERS = int(os.environ.get("TRIAGE_PDF_READER_CACHE", 32))
+MAX_READER_BYTES = 128 * 1024 * 1024
+
+
+class _CachedImage:
+    def __init__(self, name: str, xobj: pdfdoc.PDFImageXObject, signature: Tuple[int, int]):
+        self.name = name
+        self.xobj = xobj          # prototip: stream deja comprimat, nu e înregistrat în niciun document
+        self.signature = signature
+
+
+def _target_size(size: Tuple[int, int], box: Optional[Tuple[float, float]], keep_ratio: bool,
+                 dpi: int) -> Tuple[int, int]:
+    """Mărimea în pixeli pentru cutia desenată (în puncte) la `dpi`; niciodată mărită."""
+    if box is None or dpi <= 0:
+        return size
+    w, h = size
+    if keep_ratio:
+        scale = min(box[0] / w, box[1] / h)
+        box = (w * scale, h * scale)
+    tw = max(1, round(box[0] * dpi / 72.0))
+    th = max(1, round(box[1] * dpi / 72.0))
+    return (min(tw, w), min(th, h))
+
+
+def _image_xobject(name: str, data: bytes, size: Tuple[int, int], color_space: str) -> pdfdoc.PDFImageXObject:
+    # stream binar, doar FlateDecode (fără ASCII85, care adaugă 25%)
+    xobj = pdfdoc.PDFImageXObject(name)
+    xobj.width, xobj.height = size
+    xobj.bitsPerComponent = 8
+    xobj.colorSpace = color_space
+    xobj.streamContent = zlib.compress(data, 9)
+    xobj._filters = ("FlateDecode",)
+    xobj.mask = None
+    return xobj
+
+
+def _build_xobject(name: str, path: str, box: Optional[Tuple[float, float]], keep_ratio: bool,
+                   dpi: int) -> pdfdoc.PDFImageXObject:
+    with Image.open(path) as im:
+        im.load()
+        has_alpha = im.mode in ("RGBA", "LA", "PA") or "transparency" in im.info
+        if has_alpha:
+            im = im.convert("RGBA")
+        elif im.mode not in ("RGB", "L"):
+            im = im.convert("RGB")
+
+    size = _target_size(im.size, box, keep_ratio, dpi)
+    if size != im.size:
+        im = im.resize(size, Image.LANCZOS)
+
+    if not has_alpha:
+        return _image_xobject(name, im.tobytes(), size, "DeviceGray" if im.mode == "L" else "DeviceRGB")
+
+    xobj = _image_xobject(name, im.convert("RGB").tobytes(), size, "DeviceRGB")
+    alpha = im.getchannel("A")
+    # canal alfa complet opac: fără mască
+    if alpha.getextrema() != (255, 255):
+        xobj._smask = _image_xobject(name + "m", alpha.tobytes(), size, "DeviceGray")
+    return xobj
+
+
+class ImageCache:
+    """
+    Cache LRU de imagini gata de pus în PDF.
+
+    ReportLab decodează PNG-ul, îl convertește în RGB și îl comprimă zlib la
+    fiecare document nou; aici facem asta o singură dată pe fișier și doar
+    copiem obiectul XObject (cu stream-ul partajat) în fiecare document.
+    Imaginea e redusă la PRINT_DPI pentru cutia în care e desenată (cheia
+    include mărimea rezultată), cu transparența păstrată ca SMask.
+    Intrarea e invalidată când se schimbă mtime-ul sau mărimea fișierului.
+    """
+
+    def __init__(self, max_items: int = MAX_IMAGES, dpi: int = PRINT_DPI):
+        self.max_items = max_items
+        self.dpi = dpi
+        self._lock = threading.Lock()
+        self._items: "OrderedDict[Tuple[str, Optional[Tuple[float, float]], bool], _CachedImage]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, path: str, box: Optional[Tuple[float, float]] = None,
+            keep_ratio: bool = True) -> Optional[_CachedImage]:
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        signature = (st.st_mtime_ns, st.st_size)
+        key = (path, box, keep_ratio)
+        with self._lock:
+            item = self._items.get(key)
+            if item is not None and item.signature == signature:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return item
+
+        # decodare + redimensionare + compresie în afara lock-ului (poate dura zeci de ms)
+        name = hashlib.md5(f"{path}:{signature}:{box}:{keep_ratio}:{self.dpi}".encode("utf-8")).hexdigest()
+        try:
+            xobj = _build_xobject(name, path, box, keep_ratio, self.dpi)
+        except (OSError, ValueError):
+            return None
+        item = _CachedImage(name, xobj, signature)
+        with self._lock:
+            self.misses += 1
+            self._items[key] = item
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+        return item
+
+    def stats(self) -> dict:
+        return {"images": len(self._items), "hits": self.hits, "misses": self.misses, "dpi": self.dpi}
+
+
+image_cache = ImageCache()
+
+
+class _CachedReader:
+    def __init__(self, reader: PdfReader, signature: Tuple[int, int]):
+        self.reader = reader
+        self.signature = signature
+        self.size = signature[1]
+        # PdfReader citește din stream cu seek(): un singur merge o dată
+        self.lock = threading.Lock()
+
+
+class ReaderCache:
+    """
+    Cache LRU de investigații PDF deja parsate, pentru atașarea la foaia de
+    externare. Fișierul e citit în memorie și parsat o singură dată; la
+    fiecare export paginile sunt doar clonate în documentul nou, iar
+    obiectele rezolvate rămân în cache-ul intern al reader-ului.
+
+    Fișierele care nu pot fi parsate sunt ținute minte (după mtime/mărime) și
+    sărite la exporturile următoare fără o nouă încercare.
+    """
+
+    def __init__(self, max_items: int = MAX_READERS, max_bytes: int = MAX_READER_BYTES):
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._items: "OrderedDict[str, _CachedReader]" = OrderedDict()
+        self._bytes = 0
+        self._bad: Dict[str, Tuple[int, int]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, path: str) -> Optional[_CachedReader]:
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        signature = (st.st_mtime_ns, st.st_size)
+        with self._lock:
+            if self._bad.get(path) == signature:
+                return None
+            item = self._items.get(path)
+            if item is not None and item.signature == signature:
+                self._items.move_to_end(path)
+                self.hits += 1
+                return item
+
+        try:
+            with open(path, "rb") as f:
+                reader = PdfReader(BytesIO(f.read()), strict=False)
+            len(reader.pages)  # parcurge arborele de pagini acum, nu la primul merge
+        except Exception:
+            self.mark_bad(path, signature)
+            return None
+
+        item = _CachedReader(reader, signature)
+        with self._lock:
+            self.misses += 1
+            old = self._items.pop(path, None)
+            if old is not None:
+                self._bytes -= old.size
+            if item.size <= self.max_bytes:
+                self._items[path] = item
+                self._bytes += item.size
+            while len(self._items) > self.max_items or self._bytes > self.max_bytes:
+                _, evicted = self._items.popitem(last=False)
+                self._bytes -= evicted.size
+        return item
+
+    def mark_bad(self, path: str, signature: Optional[Tuple[int, int]] = None) -> None:
+        if signature is None:
+            try:
+                st = os.stat(path)
+            except OSError:
+                return
+            signature = (st.st_mtime_ns, st.st_size)
+        with self._lock:
+            self._bad[path] = signature
+            old = self._items.pop(path, None)
+            if old is not None:
+                self._bytes -= old.size
+
+    def stats(self) -> dict:
+        return {
+            "readers": len(self._items),
+            "bytes": self._bytes,
+            "known_bad": len(self._bad),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+reader_cache = ReaderCache()
+
+
+def draw_cached_image(
+    c: canvas.Canvas,
+    path: str,
+    x: float,
+    y: float,
+    width: float,
+    height: float,
+    preserveAspectRatio: bool = True,
+) -> bool:
+    """
+    Echivalentul lui `c.drawImage(path, ..., mask="auto")`, dar cu imaginea
+    luată din cache. Întoarce False dacă fișierul nu există.
+    """
+    item = image_cache.get(path, (width, height), preserveAspectRatio)
+    if item is None:
+        return False
+
+    doc = c._doc
+    reg_name = doc.getXObjectName(item.name)
+    img_obj = doc.idToObject.get(reg_name)
+    if img_obj is None:
+        # prima folosire în acest document: înregistrăm o copie a prototipului
+        img_obj = copy.copy(item.xobj)
+        smask = getattr(img_obj, "_smask", None)
+        c._setXObjects(img_obj)
+        doc.Reference(img_obj, reg_name)
+        doc.addForm(item.name, img_obj)
+        if smask is not None:
+            smask = copy.copy(smask)
+            m_reg_name = doc.getXObjectName(smask.name)
+            if doc.idToObject.get(m_reg_name) is None:
+                c._setXObjects(smask)
+                img_obj.smask = doc.Reference(smask, m_reg_name)
+            else:
+                img_obj.smask = pdfdoc.PDFObjectReference(m_reg_name)
+            del img_obj._smask
+
+    x, y, width, height, _ = aspectRatioFix(
+        preserveAspectRatio, "c", x, y, width, height, img_obj.width, img_obj.height
+    )
+    c._currentPageHasImages = 1
+    c.saveState()
+    c.translate(x, y)
+    c.scale(width, height)
+    c._code.append("/%s Do" % reg_name)
+    c.restoreState()
+    c._formsinuse.append(item.name)
+    return True
@@ -0,0 +1,205 @@
+import hashlib
+import json
+import os
+import re
+import shutil
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple
+
+from .pdf_render import BASE_DIR, RENDER_VERSION
+
+EXPORTS_DIR = Path(os.environ.get("TRIAGE_EXPORTS_DIR", BASE_DIR / "data" / "exports"))
+
+# limitele cache-ului de PDF-uri generate
+MAX_CACHE_BYTES = int(os.environ.get("TRIAGE_PDF_CACHE_BYTES", 512 * 1024 * 1024))
+MAX_CACHE_AGE = int(os.environ.get("TRIAGE_PDF_CACHE_AGE", 7 * 24 * 3600))
+EVICT_INTERVAL = 60.0
+
+# doar fișierele generate de cache (nu exporturile salvate manual)
+_CACHE_FILE = re.compile(r"^externare_([0-9a-f]{64})\.pdf$")
+# fișierele în care randează pool-ul, înainte de redenumirea în cache
+_TMP_FILE = re.compile(r"^externare_([0-9a-f]{64})\..+\.tmp$")
+# un temporar mai vechi de atât a rămas de la o randare întreruptă
+TMP_GRACE = 3600
+# directoarele exporturilor în masă (părțile fixate cât durează descărcarea)
+BULK_PREFIX = ".bulk-"
+BULK_GRACE = 6 * 3600
+
+
+class ExportCache:
+    """
+    Cache pe disc (data/exports/) pentru foile de externare randate.
+
+    Cheia e un SHA-256 peste payload-ul ExternareIn, medicul, hash-urile
+    conținutului investigațiilor atașate (luate din store-ul de atașamente,
+    unde blob-urile sunt adresate după SHA-256) și versiunea randării, deci
+    aceeași cerere nu mai e randată de două ori, iar orice modificare produce
+    alt fișier.
+    """
+
+    def __init__(self, directory: Path = EXPORTS_DIR, max_bytes: int = MAX_CACHE_BYTES, max_age: int = MAX_CACHE_AGE):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        # apelați cu cheia unei foi scoase din cache (ex. eliberarea investigațiilor ei)
+        self._listeners: List[Callable[[str], None]] = []
+        self._last_evict = 0.0
+        self.hits = 0
+        self.misses = 0
+
+    def add_listener(self, listener: Callable[[str], None]) -> None:
+        self._listeners.append(listener)
+
+    def _notify(self, keys: List[str]) -> None:
+        for key in keys:
+            for listener in self._listeners:
+                try:
+                    listener(key)
+                except Exception:
+                    pass
+
+    # ----------------- chei -----------------
+    def key_for(self, data: dict, doctor: dict, attachments: List[Tuple[str, Path]]) -> str:
+        """`attachments`: [(sha256, cale)] ca din AttachmentStore.resolve_many (nimic de recitit)."""
+        material = {
+            "v": RENDER_VERSION,
+            "data": data,
+            "doctor": doctor,
+            "attachments": [[path.name, sha] for sha, path in attachments],
+        }
+        blob = json.dumps(material, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+    def path_for(self, key: str) -> Path:
+        return self.directory / f"externare_{key}.pdf"
+
+    # ----------------- citire / scriere -----------------
+    def get(self, key: str) -> Optional[Path]:
+        path = self.path_for(key)
+        if not path.exists():
+            self.misses += 1
+            return None
+        self.hits += 1
+        try:
+            # vârsta se socotește de la ultima folosire
+            os.utime(path, None)
+        except OSError:
+            pass
+        return path
+
+    def temp_path(self, key: str) -> Path:
+        """Un fișier temporar unic, lângă destinație (redenumirea rămâne atomică)."""
+        return self.path_for(key).with_suffix(f".{os.getpid()}.{uuid.uuid4().hex}.tmp")
+
+    def commit(self, key: str, tmp: Path) -> Path:
+        """Mută în cache un PDF scris deja în `temp_path(key)`."""
+        path = self.path_for(key)
+        os.replace(tmp, path)
+        self.maybe_evict()
+        return path
+
+    def discard(self, tmp: Path) -> None:
+        """Șterge o randare eșuată; dacă foaia nu e nici în cache, o anunțăm ca scoasă."""
+        self._remove(str(tmp))
+        m = _TMP_FILE.match(Path(tmp).name)
+        if m and not self.path_for(m.group(1)).exists():
+            self._notify([m.group(1)])
+
+    def bulk_dir(self) -> Path:
+        """Director temporar pentru un export în masă, pe același disc cu cache-ul."""
+        path = self.directory / f"{BULK_PREFIX}{uuid.uuid4().hex}"
+        path.mkdir()
+        return path
+
+    @staticmethod
+    def pin(path: Path, target: Path) -> Path:
+        """
+        Leagă (hard link) un PDF din cache în directorul exportului în masă,
+        ca evacuarea să nu-l șteargă înainte să fie trimis.
+        """
+        try:
+            os.link(path, target)
+        except OSError:
+            shutil.copyfile(path, target)
+        return target
+
+    # ----------------- evacuare -----------------
+    def maybe_evict(self) -> None:
+        now = time.time()
+        if now - self._last_evict < EVICT_INTERVAL:
+            return
+        self.evict()
+
+    def evict(self) -> int:
+        """Șterge fișierele mai vechi de `max_age`, apoi cele mai vechi până sub `max_bytes`."""
+        evicted: List[str] = []
+        try:
+            with self._lock:
+                return self._evict_locked(evicted)
+        finally:
+            self._notify(evicted)
+
+    def _evict_locked(self, evicted: List[str]) -> int:
+        self._last_evict = now = time.time()
+        files = []
+        removed = 0
+        for entry in os.scandir(self.directory):
+            if entry.name.startswith(BULK_PREFIX):
+                # rămas de la un export în masă întrerupt (proces oprit)
+                try:
+                    if now - entry.stat().st_mtime > BULK_GRACE:
+                        shutil.rmtree(entry.path, ignore_errors=True)
+                except OSError:
+                    pass
+                continue
+            is_tmp = bool(_TMP_FILE.match(entry.name))
+            cached = _CACHE_FILE.match(entry.name)
+            if not is_tmp and not cached:
+                continue
+            try:
+                st = entry.stat()
+            except OSError:
+                continue
+            if is_tmp:
+                if now - st.st_mtime > TMP_GRACE:
+                    removed += self._remove(entry.path)
+                continue
+            files.append((st.st_mtime, st.st_size, entry.path, cached.group(1)))
+
+        kept = []
+        for mtime, size, path, key in files:
+            if now - mtime > self.max_age:
+                if self._remove(path):
+                    removed += 1
+                    evicted.append(key)
+            else:
+                kept.append((mtime, size, path, key))
+
+        total = sum(size for _, size, _, _ in kept)
+        for mtime, size, path, key in sorted(kept):
+            if total <= self.max_bytes:
+                break
+            if self._remove(path):
+                removed += 1
+                evicted.append(key)
+            total -= size
+        return removed
+
+    @staticmethod
+    def _remove(path: str) -> int:
+        try:
+            os.remove(path)
+            return 1
+        except OSError:
+            return 0
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses}
+
+
+export_cache = ExportCache()
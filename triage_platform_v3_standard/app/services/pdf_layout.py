@@ -0,0 +1,252 @@
+import os
+import unicodedata
+import warnings
+from functools import lru_cache
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont, TTFError
+from reportlab.pdfgen import canvas
+
+# Așezarea textului în foaia de externare: fonturi Unicode (cu diacritice),
+# împărțire pe rânduri după lățimea măsurată și curgere pe mai multe pagini.
+
+STATIC_DIR = Path(__file__).resolve().parents[2] / "static"
+
+# perechi (normal, bold) încercate în ordine; prima care acoperă diacriticele câștigă.
+# DejaVu Sans e inclus în static/fonts (licența alături), deci foaia arată la fel
+# pe orice server; fonturile de sistem rămân doar ca rezervă.
+FONT_CANDIDATES: List[Tuple[str, str]] = [
+    (str(STATIC_DIR / "fonts" / "DejaVuSans.ttf"), str(STATIC_DIR / "fonts" / "DejaVuSans-Bold.ttf")),
+    ("/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf", "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf"),
+    ("/usr/share/fonts/dejavu/DejaVuSans.ttf", "/usr/share/fonts/dejavu/DejaVuSans-Bold.ttf"),
+    ("/usr/share/fonts/truetype/liberation/LiberationSans-Regular.ttf",
+     "/usr/share/fonts/truetype/liberation/LiberationSans-Bold.ttf"),
+    ("/usr/share/fonts/truetype/noto/NotoSans-Regular.ttf", "/usr/share/fonts/truetype/noto/NotoSans-Bold.ttf"),
+]
+if os.environ.get("TRIAGE_PDF_FONT"):
+    FONT_CANDIDATES.insert(0, (os.environ["TRIAGE_PDF_FONT"], os.environ.get("TRIAGE_PDF_FONT_BOLD", "")))
+
+# literele românești pe care fontul trebuie să le aibă ca să fie folosit
+REQUIRED_CHARS = "ăâîșțĂÂÎȘȚşţŞŢ"
+
+# câte lățimi de cuvinte păstrăm (cuvintele se repetă mult între foi)
+MAX_WORD_WIDTHS = 50000
+
+
+def strip_accents(text: str) -> str:
+    """Elimina diacriticele pentru a evita probleme cu fonturile din PDF."""
+    if not text:
+        return ""
+    text = unicodedata.normalize("NFD", text)
+    return "".join(c for c in text if not unicodedata.combining(c))
+
+
+# -------------------------------------------------------------------------
+# FONTURI
+# -------------------------------------------------------------------------
+class FontSet:
+    """
+    Fonturile folosite în foaie. Cu un TTF Unicode, textul rămâne cu
+    diacritice (fontul e inclus în PDF, doar cu glifele folosite); fără,
+    revenim la Helvetica și eliminăm diacriticele, ca înainte.
+    """
+
+    def __init__(self, regular: str, bold: str, charset: Optional[frozenset] = None):
+        self.regular = regular
+        self.bold = bold
+        self.unicode = charset is not None
+        # spațiile albe nu au glife, dar sunt tratate de așezarea în pagină
+        self._charset = (charset or frozenset()) | frozenset("\n\r\t")
+
+    def text(self, text: Optional[str]) -> str:
+        text = text or ""
+        if not self.unicode:
+            return strip_accents(text)
+        if self._charset.issuperset(text):
+            return text
+        # caractere fără glifă în font: litera de bază sau "?"
+        out = []
+        for ch in text:
+            if ch in self._charset:
+                out.append(ch)
+                continue
+            base = strip_accents(ch)
+            out.append(base if base and self._charset.issuperset(base) else "?")
+        return "".join(out)
+
+
+def _load_ttf(name: str, path: str) -> Optional[TTFont]:
+    if not path or not os.path.isfile(path):
+        return None
+    try:
+        return TTFont(name, path)
+    except (TTFError, OSError):
+        return None
+
+
+@lru_cache(maxsize=1)
+def get_fonts() -> FontSet:
+    """Încarcă și înregistrează fonturile o singură dată per proces."""
+    for regular_path, bold_path in FONT_CANDIDATES:
+        regular = _load_ttf("TriageSans", regular_path)
+        if regular is None or not set(map(ord, REQUIRED_CHARS)) <= set(regular.face.charToGlyph):
+            continue
+        # fără variantă bold, titlurile folosesc fontul normal
+        bold = _load_ttf("TriageSans-Bold", bold_path) or regular
+        pdfmetrics.registerFont(regular)
+        if bold is not regular:
+            pdfmetrics.registerFont(bold)
+        charset = frozenset(chr(cp) for cp in regular.face.charToGlyph)
+        if bold is not regular:
+            charset &= frozenset(chr(cp) for cp in bold.face.charToGlyph)
+        return FontSet(regular.fontName, bold.fontName, charset)
+    warnings.warn(
+        "Niciun font TTF cu diacritice (lipsește static/fonts/DejaVuSans.ttf?): "
+        "foile de externare se generează cu Helvetica, fără diacritice.",
+        RuntimeWarning,
+    )
+    return FontSet("Helvetica", "Helvetica-Bold")
+
+
+# -------------------------------------------------------------------------
+# LĂȚIMI (tabel de glife + cuvinte, în cache)
+# -------------------------------------------------------------------------
+class WidthTable:
+    """
+    Lățimea textului măsurată din metricile fontului. Lățimea fiecărui
+    caracter e citită o singură dată per font (la mărimea 1000, se scalează
+    liniar), iar lățimea cuvintelor deja întâlnite e păstrată separat.
+    """
+
+    def __init__(self, max_words: int = MAX_WORD_WIDTHS):
+        self.max_words = max_words
+        self._glyphs: Dict[str, Dict[str, float]] = {}
+        self._words: Dict[Tuple[str, str], float] = {}
+
+    def _units(self, text: str, font: str) -> float:
+        key = (font, text)
+        w = self._words.get(key)
+        if w is not None:
+            return w
+        table = self._glyphs.setdefault(font, {})
+        w = 0.0
+        for ch in text:
+            g = table.get(ch)
+            if g is None:
+                g = table[ch] = pdfmetrics.stringWidth(ch, font, 1000)
+            w += g
+        if len(self._words) >= self.max_words:
+            self._words.clear()
+        self._words[key] = w
+        return w
+
+    def width(self, text: str, font: str, size: float) -> float:
+        return self._units(text, font) * size / 1000.0
+
+    def wrap(self, text: str, font: str, size: float, max_width: float) -> List[str]:
+        """
+        Împarte textul în rânduri care încap în `max_width`. Paragrafele
+        (liniile din text) sunt păstrate, inclusiv cele goale; un cuvânt mai
+        lung decât rândul e tăiat între caractere.
+        """
+        limit = max_width * 1000.0 / size
+        space = self._units(" ", font)
+        lines: List[str] = []
+        for paragraph in (text or "").replace("\r\n", "\n").replace("\r", "\n").split("\n"):
+            words = paragraph.split()
+            if not words:
+                lines.append("")
+                continue
+            current: List[str] = []
+            used = 0.0
+            for word in words:
+                w = self._units(word, font)
+                if current and used + space + w <= limit:
+                    current.append(word)
+                    used += space + w
+                    continue
+                if current:
+                    lines.append(" ".join(current))
+                if w <= limit:
+                    current, used = [word], w
+                    continue
+                # cuvânt prea lung pentru un rând
+                pieces = self._split_word(word, font, limit)
+                lines.extend(pieces[:-1])
+                current, used = [pieces[-1]], self._units(pieces[-1], font)
+            lines.append(" ".join(current))
+        return lines
+
+    def _split_word(self, word: str, font: str, limit: float) -> List[str]:
+        table = self._glyphs.setdefault(font, {})
+        pieces, start, used = [], 0, 0.0
+        for i, ch in enumerate(word):
+            g = table.get(ch)
+            if g is None:
+                g = table[ch] = pdfmetrics.stringWidth(ch, font, 1000)
+            if used + g > limit and i > start:
+                pieces.append(word[start:i])
+                start, used = i, 0.0
+            used += g
+        pieces.append(word[start:])
+        return pieces
+
+
+widths = WidthTable()
+
+
+# -------------------------------------------------------------------------
+# CURGERE PE PAGINI
+# -------------------------------------------------------------------------
+class TextFlow:
+    """
+    Cursorul vertical al foii: desenează rânduri de sus în jos și trece pe
+    o pagină nouă când ajunge la marginea de jos. `new_page(c)` desenează
+    antetul paginii de continuare și întoarce y-ul de la care se scrie.
+    """
+
+    def __init__(self, c: canvas.Canvas, fonts: FontSet, top: float, bottom: float,
+                 new_page: Callable[[canvas.Canvas], float]):
+        self.c = c
+        self.fonts = fonts
+        self.y = top
+        self.bottom = bottom
+        self._new_page = new_page
+        self._font: Optional[Tuple[str, float]] = None
+        self.pages = 1
+
+    def page_break(self) -> None:
+        self.c.showPage()
+        self.pages += 1
+        self._font = None
+        self.y = self._new_page(self.c)
+
+    def ensure(self, height: float) -> None:
+        """Trece pe pagina următoare dacă nu mai încap `height` puncte."""
+        if self.y - height < self.bottom:
+            self.page_break()
+
+    def skip(self, height: float) -> None:
+        self.y -= height
+
+    def line(self, x: float, text: str, font: str, size: float, leading: float) -> None:
+        if self.y < self.bottom:
+            self.page_break()
+        if self._font != (font, size):
+            # setFont scrie un operator în pagină; îl emitem doar la schimbare
+            self.c.setFont(font, size)
+            self._font = (font, size)
+        self.c.drawString(x, self.y, text)
+        self.y -= leading
+
+    def heading(self, x: float, text: str, size: float, leading: float, keep: float) -> None:
+        """Titlu de secțiune; nu rămâne singur la baza paginii (încape și `keep` după el)."""
+        self.ensure(leading + keep)
+        self.line(x, self.fonts.text(text), self.fonts.bold, size, leading)
+
+    def paragraph(self, x: float, text: Optional[str], size: float, leading: float, max_width: float) -> None:
+        font = self.fonts.regular
+        for line in widths.wrap(self.fonts.text(text), font, size, max_width):
+            self.line(x, line, font, size, leading)
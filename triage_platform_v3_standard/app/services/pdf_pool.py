@@ -0,0 +1,210 @@
+import asyncio
+import math
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Deque, Dict, Optional
+
+# numărul de procese de randare (0 = randare în threadpool, în procesul curent)
+PDF_WORKERS = int(os.environ.get("TRIAGE_PDF_WORKERS", max(1, min(4, (os.cpu_count() or 2) - 1))))
+# câte joburi pot aștepta în coadă peste cele aflate în lucru
+PDF_QUEUE_DEPTH = int(os.environ.get("TRIAGE_PDF_QUEUE_DEPTH", PDF_WORKERS * 2 or 4))
+# câte timpi recenți păstrăm pentru statistici
+METRICS_WINDOW = 500
+
+
+class PoolSaturated(Exception):
+    """Pool-ul are deja numărul maxim de joburi; clientul trebuie să reîncerce."""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Pool de randare ocupat, reîncercați în {retry_after}s.")
+        self.retry_after = retry_after
+
+
+def _percentile(values, q: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, int(math.ceil(q * len(ordered))) - 1)
+    return ordered[max(idx, 0)]
+
+
+class RenderPool:
+    """
+    Pool mărginit de procese pentru joburile CPU-bound (ReportLab, PdfMerger),
+    ca bucla de evenimente și threadpool-ul să rămână libere pentru /api/triage.
+
+    Peste `workers + queue_depth` joburi în curs, `submit` ridică
+    `PoolSaturated` (→ 429 + Retry-After). Pentru fiecare job se măsoară
+    timpul de așteptare în coadă, timpul de randare și timpul total.
+    """
+
+    def __init__(self, workers: int = PDF_WORKERS, queue_depth: int = PDF_QUEUE_DEPTH):
+        self.workers = workers
+        self.queue_depth = queue_depth
+        self.limit = max(1, workers) + queue_depth
+        self._executor: Optional[ProcessPoolExecutor] = None
+        # fără procese (workers=0): joburile rulează în fire, tot cu un Future de urmărit
+        self._threads: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self._queue_wait: Deque[float] = deque(maxlen=METRICS_WINDOW)
+        self._render: Deque[float] = deque(maxlen=METRICS_WINDOW)
+        self._total: Deque[float] = deque(maxlen=METRICS_WINDOW)
+
+    def _get_executor(self) -> Optional[ProcessPoolExecutor]:
+        if self.workers <= 0:
+            return None
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    # "spawn": procesele noi nu moștenesc firele (evictor, fsync) ale serverului
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=multiprocessing.get_context("spawn"),
+                    )
+        return self._executor
+
+    def _retry_after(self) -> int:
+        avg = (sum(self._total) / len(self._total)) if self._total else 1.0
+        return max(1, int(math.ceil(avg * self._in_flight / max(1, self.workers))))
+
+    def _acquire(self, limit: int, background: bool = False) -> None:
+        with self._lock:
+            if self._in_flight >= limit:
+                if not background:
+                    self.rejected += 1
+                raise PoolSaturated(self._retry_after())
+            self._in_flight += 1
+
+    def _release(self, started: float, render_seconds: Optional[float], error: Optional[BaseException] = None) -> None:
+        with self._lock:
+            self._in_flight -= 1
+            if render_seconds is None:
+                # anularea (client plecat) nu e o eroare de randare
+                if isinstance(error, Exception):
+                    self.failed += 1
+                if isinstance(error, BrokenProcessPool):
+                    # un proces a murit (ex. OOM): următorul job pornește un pool nou
+                    self._executor = None
+                return
+            total = time.perf_counter() - started
+            self.completed += 1
+            self._render.append(render_seconds)
+            self._total.append(total)
+            self._queue_wait.append(max(0.0, total - render_seconds))
+
+    def _start(self, fn: Callable[..., Any], *args) -> Future:
+        executor = self._get_executor()
+        if executor is None:
+            with self._lock:
+                if self._threads is None:
+                    self._threads = ThreadPoolExecutor(max_workers=self.limit, thread_name_prefix="render")
+            executor = self._threads
+        return executor.submit(fn, *args)
+
+    async def submit(self, fn: Callable[..., Any], *args, abandoned: Optional[Callable[[], None]] = None) -> Any:
+        """
+        Rulează `fn(*args)` în pool. `fn` trebuie să întoarcă (rezultat, secunde_randare).
+
+        Locul în pool e eliberat când jobul se termină efectiv, nu când cel
+        care așteaptă e anulat (client plecat): un proces nu poate fi oprit
+        la jumătatea randării, deci până atunci ocupă capacitatea. Un job încă
+        în coadă e scos din coadă. Dacă apelantul a fost anulat, `abandoned()`
+        e apelat după ce jobul s-a oprit (ex. ștergerea fișierului parțial).
+        """
+        self._acquire(self.limit)
+        started = time.perf_counter()
+        try:
+            future = self._start(fn, *args)
+        except BaseException as e:
+            self._release(started, None, e)
+            raise
+
+        state = {"finished": False, "abandoned": False}
+        state_lock = threading.Lock()
+
+        def finished(f: Future) -> None:
+            # rulează în firul care a terminat jobul (sau la anularea lui din coadă)
+            if f.cancelled():
+                self._release(started, None)
+            elif f.exception() is not None:
+                self._release(started, None, f.exception())
+            else:
+                self._release(started, f.result()[1])
+            with state_lock:
+                state["finished"] = True
+                cleanup = state["abandoned"]
+            if cleanup and abandoned is not None:
+                abandoned()
+
+        future.add_done_callback(finished)
+        try:
+            result, _ = await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            # wrap_future a încercat deja future.cancel(): reușește doar dacă jobul nu a pornit
+            with state_lock:
+                state["abandoned"] = True
+                cleanup = state["finished"]
+            if cleanup and abandoned is not None:
+                abandoned()
+            raise
+        return result
+
+    def run_background(self, fn: Callable[..., Any], *args) -> Any:
+        """
+        Varianta blocantă pentru firele de fundal (ex. indexarea investigațiilor):
+        așteaptă doar firul apelant. Pornește numai dacă un proces e liber, deci
+        nu ocupă locuri din coadă; altfel ridică PoolSaturated (fără să fie
+        numărată ca cerere respinsă), iar apelantul reîncearcă mai târziu.
+        """
+        self._acquire(max(1, self.workers), background=True)
+        started = time.perf_counter()
+        try:
+            executor = self._get_executor()
+            if executor is None:
+                result, render_seconds = fn(*args)
+            else:
+                result, render_seconds = executor.submit(fn, *args).result()
+        except BaseException as e:
+            self._release(started, None, e)
+            raise
+        self._release(started, render_seconds)
+        return result
+
+    def metrics(self) -> Dict[str, Any]:
+        def ms(values, q):
+            v = _percentile(list(values), q)
+            return round(v * 1000, 1) if v is not None else None
+
+        return {
+            "workers": self.workers,
+            "queue_depth": self.queue_depth,
+            "in_flight": self._in_flight,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "render_ms_p50": ms(self._render, 0.5),
+            "render_ms_p95": ms(self._render, 0.95),
+            "queue_wait_ms_p50": ms(self._queue_wait, 0.5),
+            "queue_wait_ms_p95": ms(self._queue_wait, 0.95),
+            "total_ms_p95": ms(self._total, 0.95),
+        }
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        if self._threads is not None:
+            self._threads.shutdown(wait=False, cancel_futures=True)
+            self._threads = None
+
+
+render_pool = RenderPool()
@@ -0,0 +1,385 @@
+from typing import BinaryIO, Dict, List, Optional, Tuple
+from pathlib import Path
+from io import BytesIO
+from types import SimpleNamespace
+import hashlib
+import time
+import zlib
+
+from reportlab import rl_config
+from reportlab.pdfgen import canvas
+from reportlab.lib.pagesizes import A4
+
+from PyPDF2 import PdfWriter
+from PyPDF2.generic import (
+    ArrayObject,
+    DictionaryObject,
+    EncodedStreamObject,
+    IndirectObject,
+    NameObject,
+    NullObject,
+    StreamObject,
+)
+
+from ..models.externare import ExternareIn
+from .pdf_assets import draw_cached_image, reader_cache
+from .pdf_layout import FontSet, TextFlow, get_fonts
+
+# Desenarea foii de externare, fără dependențe de FastAPI, ca să poată rula
+# și în procesele din pool-ul de randare (vezi services/pdf_pool.py).
+
+# -------------------------------------------------------------------------
+# CONFIG SPITAL + PATH-URI
+# -------------------------------------------------------------------------
+HOSPITAL_NAME = "ArmoniaLife Hospital"
+HOSPITAL_ADDRESS = "Str. Bld Serantei, 110, Iasi, Iasi"
+
+BASE_DIR = Path(__file__).resolve().parents[2]
+STATIC_DIR = BASE_DIR / "static"
+IMG_DIR = STATIC_DIR / "img"
+
+LOGO_PATH = IMG_DIR / "logo.png"
+
+# se incrementează la orice schimbare de aspect, ca să invalideze PDF-urile din cache
+RENDER_VERSION = 4
+
+# bufferul de scriere al PDF-ului final (PdfWriter scrie multe obiecte mici)
+OUT_BUFFER = 1024 * 1024
+
+# fluxurile paginilor rămân binare (doar FlateDecode); ASCII85 le mărea cu 25%
+rl_config.useA85 = 0
+
+# fluxurile necomprimate mai mici de atât nu merită comprimate
+MIN_COMPRESS = 256
+
+
+# -------------------------------------------------------------------------
+# UTILS
+# -------------------------------------------------------------------------
+def url_to_fs_path(url: str) -> Optional[Path]:
+    """Transformă ceva de genul '/static/img/parafa.png' în cale pe disc."""
+    if not url:
+        return None
+    if not url.startswith("/static/"):
+        return None
+    rel = url.replace("/static/", "")
+    return STATIC_DIR / rel
+
+
+# -------------------------------------------------------------------------
+# HEADER (logo + nume spital + titlu)
+# -------------------------------------------------------------------------
+def draw_header(c: canvas.Canvas, fonts: FontSet):
+    width, height = A4
+    y = height - 40
+
+    # logo (decodat o singură dată, din cache)
+    try:
+        draw_cached_image(c, str(LOGO_PATH), 40, y - 55, width=70, height=70)
+    except Exception:
+        pass
+
+    # nume spital
+    c.setFont(fonts.bold, 16)
+    c.drawString(130, y, fonts.text(HOSPITAL_NAME))
+
+    c.setFont(fonts.regular, 10)
+    c.drawString(130, y - 20, fonts.text(HOSPITAL_ADDRESS))
+
+    # titlu
+    c.setFont(fonts.bold, 14)
+    c.drawCentredString(
+        width / 2,
+        y - 70,
+        fonts.text("FOAIE DE EXTERNARE – AMBULATORIU"),
+    )
+
+    # linie sub titlu
+    c.setLineWidth(1.2)
+    c.line(40, y - 85, width - 40, y - 85)
+
+
+def draw_continuation_header(c: canvas.Canvas, fonts: FontSet, data: ExternareIn) -> float:
+    """Antetul paginilor 2+; întoarce y-ul de la care continuă textul."""
+    width, height = A4
+    y = height - 40
+
+    c.setFont(fonts.bold, 10)
+    c.drawString(40, y, fonts.text(HOSPITAL_NAME))
+    c.setFont(fonts.regular, 9)
+    c.drawRightString(
+        width - 40,
+        y,
+        fonts.text(f"Foaie de externare – {data.patient_name or '-'} (continuare)"),
+    )
+
+    c.setLineWidth(0.8)
+    c.line(40, y - 8, width - 40, y - 8)
+    return y - 30
+
+
+# -------------------------------------------------------------------------
+# SEMNĂTURĂ + PARAFA
+# -------------------------------------------------------------------------
+SIGNATURE_BASE_Y = 150
+# textul de pe ultima pagină trebuie să se oprească deasupra blocului de semnătură
+SIGNATURE_TOP = SIGNATURE_BASE_Y + 75
+
+
+def draw_signature(c: canvas.Canvas, fonts: FontSet, doctor):
+    width, height = A4
+
+    base_x = 70
+    base_y = SIGNATURE_BASE_Y
+
+    # text "medic curant"
+    c.setFont(fonts.regular, 10)
+    c.drawString(base_x, base_y + 50, "Medic curant:")
+    c.setFont(fonts.bold, 11)
+    c.drawString(base_x, base_y + 35, fonts.text(doctor.full_name))
+    c.setFont(fonts.regular, 9)
+    c.drawString(base_x, base_y + 22, fonts.text(doctor.specialty or ""))
+
+    # parafa la ~2px de text
+    stamp_path = url_to_fs_path(getattr(doctor, "stamp_url", None))
+    stamp_x = base_x + 90   # puțin în dreapta de text
+    stamp_y = base_y + 18
+
+    if stamp_path:
+        try:
+            draw_cached_image(c, str(stamp_path), stamp_x, stamp_y, width=90, height=55)
+        except Exception:
+            pass
+
+    # semnatura sub parafă
+    sign_path = url_to_fs_path(getattr(doctor, "signature_url", None))
+    sign_x = stamp_x + 10
+    sign_y = stamp_y - 55
+
+    if sign_path:
+        try:
+            draw_cached_image(c, str(sign_path), sign_x, sign_y, width=120, height=60)
+        except Exception:
+            pass
+
+
+# -------------------------------------------------------------------------
+# BODY (conținut foaie externare)
+# -------------------------------------------------------------------------
+# marginea de jos pe paginile fără semnătură și lățimea textului secțiunilor
+BOTTOM_MARGIN = 60
+TEXT_X = 55
+TEXT_WIDTH = A4[0] - TEXT_X - 40
+
+
+def draw_body(c: canvas.Canvas, fonts: FontSet, data: ExternareIn, doctor):
+    width, height = A4
+    flow = TextFlow(
+        c, fonts, top=height - 150, bottom=BOTTOM_MARGIN,
+        new_page=lambda canv: draw_continuation_header(canv, fonts, data),
+    )
+    regular = fonts.regular
+
+    # pacient
+    flow.line(40, fonts.text(f"Pacient: {data.patient_name or '-'}"), regular, 11, 15)
+
+    if data.cnp:
+        flow.line(40, fonts.text(f"CNP: {data.cnp}"), regular, 11, 15)
+
+    if data.age is not None or data.sex:
+        flow.line(
+            40,
+            fonts.text(
+                f"Vârsta/Sex: {data.age if data.age is not None else '-'} / "
+                f"{data.sex or '-'}"
+            ),
+            regular, 11, 15,
+        )
+
+    if data.triage_level:
+        flow.line(40, fonts.text(f"Nivel triaj: {data.triage_level}"), regular, 11, 25)
+
+    # Diagnostic, Evoluție, Recomandări: rânduri după lățimea măsurată, pe câte pagini e nevoie
+    sections = (
+        ("Diagnostic:", data.diagnosis),
+        ("Evoluție:", data.evolution),
+        ("Recomandări:", data.recommendations),
+    )
+    for index, (title, text) in enumerate(sections):
+        if index:
+            flow.skip(10)
+        flow.heading(40, title, 11, 15, keep=14)
+        flow.paragraph(TEXT_X, text, 10, 14, TEXT_WIDTH)
+
+    # semnătura + parafa, pe ultima pagină, sub text
+    if flow.y < SIGNATURE_TOP:
+        flow.page_break()
+    draw_signature(c, fonts, doctor)
+
+
+# -------------------------------------------------------------------------
+# RANDARE COMPLETĂ (foaie + investigații atașate)
+# -------------------------------------------------------------------------
+def render_sheet(data: ExternareIn, doctor) -> bytes:
+    """Foaia de externare (una sau mai multe pagini)."""
+    fonts = get_fonts()
+    base_buffer = BytesIO()
+    c = canvas.Canvas(base_buffer, pagesize=A4)
+
+    draw_header(c, fonts)
+    draw_body(c, fonts, data, doctor)
+
+    c.showPage()
+    c.save()
+    return base_buffer.getvalue()
+
+
+def attachment_names(data: ExternareIn) -> List[str]:
+    # acceptăm și field-ul vechi
+    return list(data.investigations or data.attached_pdfs or [])
+
+
+# -------------------------------------------------------------------------
+# OPTIMIZARE LA SCRIERE (compresie + obiecte identice partajate)
+# -------------------------------------------------------------------------
+def _compress_stream(obj: StreamObject) -> Optional[EncodedStreamObject]:
+    if "/Filter" in obj or "/DecodeParms" in obj or len(obj._data) < MIN_COMPRESS:
+        return None
+    data = zlib.compress(obj._data, 6)
+    if len(data) >= len(obj._data):
+        return None
+    enc = EncodedStreamObject()
+    for key, value in obj.items():
+        enc[key] = value
+    enc[NameObject("/Filter")] = NameObject("/FlateDecode")
+    enc._data = data
+    return enc
+
+
+def _remap(obj, remap: Dict[int, IndirectObject]) -> None:
+    """Înlocuiește referințele către duplicate (doar în obiectele directe)."""
+    if isinstance(obj, DictionaryObject):
+        items = obj.items()
+    elif isinstance(obj, ArrayObject):
+        items = enumerate(obj)
+    else:
+        return
+    for key, value in list(items):
+        if isinstance(value, IndirectObject):
+            if value.idnum in remap:
+                obj[key] = remap[value.idnum]
+        else:
+            _remap(value, remap)
+
+
+def optimize_writer(writer: PdfWriter) -> Dict[str, int]:
+    """
+    Pregătește documentul pentru scriere: fluxurile necomprimate (conținut de
+    pagină, imagini brute din investigații) primesc FlateDecode, iar fluxurile
+    identice (aceeași imagine în mai multe foi sau investigații, fonturi) sunt
+    păstrate o singură dată, cu referințele redirecționate. Duplicatele rămân
+    în tabel ca `null` (numerotarea obiectelor nu se schimbă).
+    PyPDF2 3.x nu are o opțiune de deduplicare la scriere, iar
+    `compress_content_streams` reparsează operatorii paginii; aici lucrăm
+    direct pe fluxurile brute (`_objects`, `_data`), de aceea versiunea
+    PyPDF2 e fixată în requirements.txt (tests/test_pdf_render.py verifică
+    documentul rezultat).
+    """
+    objects = writer._objects
+    compressed = shared = 0
+    for i, obj in enumerate(objects):
+        if isinstance(obj, StreamObject):
+            enc = _compress_stream(obj)
+            if enc is not None:
+                objects[i] = enc
+                compressed += 1
+
+    # două treceri: o imagine e identică cu alta abia după ce măștile (SMask) au fost unificate
+    for _ in range(2):
+        seen: Dict[Tuple[bytes, str], IndirectObject] = {}
+        remap: Dict[int, IndirectObject] = {}
+        for i, obj in enumerate(objects):
+            if not isinstance(obj, StreamObject):
+                continue
+            header = repr(sorted((k, repr(v)) for k, v in obj.items() if k != "/Length"))
+            key = (hashlib.sha1(obj._data).digest(), header)
+            original = seen.get(key)
+            if original is None:
+                seen[key] = IndirectObject(i + 1, 0, writer)
+            else:
+                remap[i + 1] = original
+        if not remap:
+            break
+        for idnum in remap:
+            objects[idnum - 1] = NullObject()
+        for obj in objects:
+            _remap(obj, remap)
+        shared += len(remap)
+    return {"compressed": compressed, "shared": shared}
+
+
+def merge_attachments(base_pdf: bytes, paths: List[Path], out: BinaryIO) -> None:
+    """
+    Atașează PDF-urile de investigații după foaia de externare și scrie
+    rezultatul direct în `out` (fără un al doilea buffer cu tot documentul).
+    Investigațiile vin din `reader_cache` (parsate o singură dată per proces);
+    fișierele corupte sunt sărite.
+    """
+    writer = PdfWriter()
+    writer.append(BytesIO(base_pdf))
+
+    for path in paths:
+        item = reader_cache.get(str(path))
+        if item is None:
+            continue
+        try:
+            with item.lock:
+                writer.append(item.reader)
+        except Exception:
+            # dacă fișierul e corupt, îl sărim (și nu-l mai reparsăm)
+            reader_cache.mark_bad(str(path), item.signature)
+            continue
+
+    optimize_writer(writer)
+    writer.write(out)
+    writer.close()
+
+
+def render_externare(data: dict, doctor: dict, attachments: List[str], out_path: str) -> Tuple[int, float]:
+    """
+    Job complet de randare, apelabil dintr-un proces separat (argumente și
+    rezultat picklable). `attachments` sunt căile investigațiilor, deja
+    rezolvate prin store-ul de atașamente. PDF-ul e scris direct în
+    `out_path` (un fișier temporar din cache), deci documentul nu mai trece
+    prin pipe-ul pool-ului și nici prin memoria serverului.
+    Întoarce mărimea fișierului și durata randării.
+    """
+    started = time.perf_counter()
+    payload = ExternareIn(**data)
+    pdf = render_sheet(payload, SimpleNamespace(**doctor))
+    paths = [Path(p) for p in attachments]
+    with open(out_path, "wb", buffering=OUT_BUFFER) as out:
+        if paths:
+            merge_attachments(pdf, paths, out)
+        else:
+            out.write(pdf)
+        size = out.tell()
+    return size, time.perf_counter() - started
+
+
+def concat_pdfs(paths: List[str], out_path: str) -> Tuple[int, float]:
+    """
+    Export în masă: lipește foile deja randate (fișiere din cache) într-un
+    singur PDF, scris direct în `out_path`. Rulează în pool-ul de randare.
+    """
+    started = time.perf_counter()
+    writer = PdfWriter()
+    for path in paths:
+        writer.append(path)
+    # foile au aceleași imagini (logo, parafă, semnătură): păstrate o singură dată
+    optimize_writer(writer)
+    with open(out_path, "wb", buffering=OUT_BUFFER) as out:
+        writer.write(out)
+        size = out.tell()
+    writer.close()
+    return size, time.perf_counter() - started
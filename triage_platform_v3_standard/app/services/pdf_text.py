@@ -0,0 +1,32 @@
+import time
+from pathlib import Path
+from typing import Iterator, List, Tuple
+
+from PyPDF2 import PdfReader
+
+
+def extract_pages(path: Path, max_pages: int, max_chars: int) -> Iterator[str]:
+    """Textul paginilor, pe rând (PDF-urile scanate dau pagini fără text)."""
+    reader = PdfReader(str(path), strict=False)
+    used = 0
+    for page in reader.pages[:max_pages]:
+        if used >= max_chars:
+            return
+        try:
+            text = page.extract_text() or ""
+        except Exception:
+            text = ""
+        text = " ".join(text.split())[: max_chars - used]
+        used += len(text)
+        yield text
+
+
+def extract_document(path: str, max_pages: int, max_chars: int) -> Tuple[List[str], float]:
+    """
+    Rulează în pool-ul de randare (modulul nu deschide nicio bază la import):
+    extragerea cu PyPDF2 e cod Python pur și nu mai concurează pentru GIL cu
+    cererile API. Întoarce (textele paginilor, secunde).
+    """
+    started = time.perf_counter()
+    texts = list(extract_pages(Path(path), max_pages, max_chars))
+    return texts, time.perf_counter() - started
@@ -0,0 +1,216 @@
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+RULES_PATH = os.environ.get("TRIAGE_RULES_PATH", os.path.join(BASE_DIR, "data", "triage_rules.json"))
+
+# cât de des verificăm (stat) dacă fișierul de reguli s-a schimbat
+CHECK_INTERVAL = 2.0
+
+_OPS = {"lt": "<", "le": "<=", "gt": ">", "ge": ">=", "eq": "=="}
+
+
+class RuleError(ValueError):
+    pass
+
+
+class LevelOutcome:
+    __slots__ = ("level", "color", "label", "time_target", "reasons", "advice")
+
+    def __init__(self, spec: dict):
+        self.level = int(spec["level"])
+        self.color = str(spec["color"])
+        self.label = str(spec["label"])
+        self.time_target = str(spec["time_target"])
+        self.reasons = tuple(spec.get("reasons") or ())
+        self.advice = tuple(spec.get("advice") or ())
+
+    def as_tuple(self):
+        return self.level, self.color, self.label, self.time_target, list(self.reasons), list(self.advice)
+
+
+class CompiledRules:
+    """
+    Tabelul de reguli compilat: o funcție Python generată din tabel (pentru
+    un pacient) și un plan de măști NumPy (pentru un lot). Ambele aplică
+    aceeași semantică: un câmp lipsă sau 0 nu declanșează nicio condiție, iar
+    primul nivel cu o condiție adevărată câștigă.
+    """
+
+    def __init__(self, table: dict, fields: Iterable[str], flags: Iterable[str]):
+        self.version = str(table.get("version") or "")
+        if not self.version:
+            raise RuleError("Tabelul de reguli nu are 'version'.")
+        self.table = table
+        self._fields = set(fields)
+        self._flags = set(flags)
+
+        levels = table.get("levels") or []
+        if not levels or not levels[-1].get("default"):
+            raise RuleError("Ultimul nivel trebuie să fie cel implicit ('default': true).")
+        try:
+            self.outcomes: List[LevelOutcome] = [LevelOutcome(spec) for spec in levels]
+        except (KeyError, TypeError, ValueError) as e:
+            raise RuleError(f"Nivel invalid: {e}")
+        self.by_level: Dict[int, LevelOutcome] = {o.level: o for o in self.outcomes}
+
+        # plan: pentru fiecare nivel (în afară de cel implicit), lista de condiții
+        self._plan: List[List[Tuple[str, str, List[Tuple[str, float]]]]] = [
+            [self._condition(c) for c in spec.get("any") or ()] for spec in levels[:-1]
+        ]
+        self._evaluate = self._generate()
+
+    # ----------------- validare -----------------
+    def _condition(self, cond: dict) -> Tuple[str, str, List[Tuple[str, float]]]:
+        if "flag" in cond:
+            if cond["flag"] not in self._flags or len(cond) != 1:
+                raise RuleError(f"Condiție invalidă: {cond}")
+            return "flag", cond["flag"], []
+        field = cond.get("field")
+        if field not in self._fields:
+            raise RuleError(f"Câmp necunoscut: {field!r}")
+        bounds = []
+        for op, value in cond.items():
+            if op == "field":
+                continue
+            if op not in _OPS or isinstance(value, bool) or not isinstance(value, (int, float)):
+                raise RuleError(f"Condiție invalidă: {cond}")
+            bounds.append((op, value))
+        if not bounds:
+            raise RuleError(f"Condiție fără prag: {cond}")
+        return "field", field, bounds
+
+    # ----------------- pacient unic: funcție generată -----------------
+    def _generate(self) -> Callable[[Any], int]:
+        used = sorted({name for conds in self._plan for kind, name, _ in conds if kind == "field"})
+        lines = ["def evaluate(p):", "    f = p.red_flags"]
+        lines += [f"    v_{name} = p.{name}" for name in used]
+        for index, conds in enumerate(self._plan):
+            if not conds:
+                continue
+            tests = []
+            for kind, name, bounds in conds:
+                if kind == "flag":
+                    tests.append(f"f.{name}")
+                else:
+                    checks = " and ".join(f"v_{name} {_OPS[op]} {value!r}" for op, value in bounds)
+                    tests.append(f"(v_{name} and {checks})")
+            lines.append(f"    if {' or '.join(tests)}:")
+            lines.append(f"        return {index}")
+        lines.append(f"    return {len(self._plan)}")
+        source = "\n".join(lines)
+        namespace: Dict[str, Any] = {}
+        exec(compile(source, f"<triage_rules {self.version}>", "exec"), namespace)
+        self.source = source
+        return namespace["evaluate"]
+
+    def evaluate(self, patient) -> LevelOutcome:
+        return self.outcomes[self._evaluate(patient)]
+
+    # ----------------- lot: măști NumPy -----------------
+    def evaluate_batch(self, patients: Sequence[Any]) -> np.ndarray:
+        """Nivelul (1–5) pentru fiecare pacient din lot."""
+        if not patients:
+            return np.empty(0, dtype=np.int8)
+
+        columns: Dict[str, np.ndarray] = {}
+        flags: Dict[str, np.ndarray] = {}
+        masks = []
+        # comparațiile cu NaN sunt mereu False → câmpurile lipsă nu declanșează reguli
+        with np.errstate(invalid="ignore"):
+            for conds in self._plan:
+                mask = np.zeros(len(patients), dtype=bool)
+                for kind, name, bounds in conds:
+                    if kind == "flag":
+                        if name not in flags:
+                            flags[name] = np.array([bool(getattr(p.red_flags, name)) for p in patients], dtype=bool)
+                        mask |= flags[name]
+                        continue
+                    if name not in columns:
+                        # valorile lipsă sau 0 devin NaN (`p.sbp and ...`)
+                        columns[name] = np.array([getattr(p, name) or np.nan for p in patients], dtype=np.float64)
+                    col = columns[name]
+                    test = np.ones(len(patients), dtype=bool)
+                    for op, value in bounds:
+                        test &= _NP_OPS[op](col, value)
+                    mask |= test
+                masks.append(mask)
+
+        levels = [o.level for o in self.outcomes]
+        return np.select(masks, levels[:-1], default=levels[-1]).astype(np.int8)
+
+
+_NP_OPS = {"lt": np.less, "le": np.less_equal, "gt": np.greater, "ge": np.greater_equal, "eq": np.equal}
+
+
+def _file_signature(path: str) -> Optional[Tuple[int, int, int]]:
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+class TriageEngine:
+    """
+    Regulile curente, încărcate din fișierul JSON și recompilate automat
+    când fișierul se schimbă (verificare cel mult o dată la CHECK_INTERVAL).
+    Un fișier invalid nu înlocuiește regulile în vigoare; eroarea apare în `stats()`.
+    """
+
+    def __init__(self, path: str, fields: Iterable[str], flags: Iterable[str]):
+        self.path = path
+        self.fields = tuple(fields)
+        self.flags = tuple(flags)
+        self._lock = threading.Lock()
+        self._rules: Optional[CompiledRules] = None
+        self._signature = None
+        self._next_check = 0.0
+        self.reloads = 0
+        self.last_error: Optional[str] = None
+
+    def reload(self) -> CompiledRules:
+        with self._lock:
+            return self._reload_locked()
+
+    def _reload_locked(self) -> CompiledRules:
+        signature = _file_signature(self.path)
+        self._next_check = time.monotonic() + CHECK_INTERVAL
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                rules = CompiledRules(json.load(f), self.fields, self.flags)
+        except (OSError, ValueError) as e:
+            if self._rules is None:
+                raise
+            self.last_error = str(e)
+            self._signature = signature
+            return self._rules
+        self._rules = rules
+        self._signature = signature
+        self.last_error = None
+        self.reloads += 1
+        return rules
+
+    def current(self) -> CompiledRules:
+        rules = self._rules
+        if rules is not None and time.monotonic() < self._next_check:
+            return rules
+        with self._lock:
+            if self._rules is None or _file_signature(self.path) != self._signature:
+                return self._reload_locked()
+            self._next_check = time.monotonic() + CHECK_INTERVAL
+            return self._rules
+
+    def stats(self) -> dict:
+        rules = self._rules
+        return {
+            "path": self.path,
+            "version": rules.version if rules else None,
+            "reloads": self.reloads,
+            "last_error": self.last_error,
+        }
@@ -0,0 +1,218 @@
+import hashlib
+import os
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, List, Optional, Tuple
+
+from fastapi import HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from multipart.exceptions import MultipartParseError
+from multipart.multipart import MultipartParser, parse_options_header
+
+from ..storage.attachment_store import attachment_store, stored_name_for
+
+MAX_UPLOAD_BYTES = int(os.environ.get("TRIAGE_UPLOAD_MAX_BYTES", 100 * 1024 * 1024))
+
+PDF_MAGIC = b"%PDF"
+
+
+# peste fișier: antetele părților și delimitatorii formularului multipart
+MULTIPART_OVERHEAD = 64 * 1024
+
+# corpul cererii descris pentru /docs (endpoint-urile citesc singure fluxul)
+PDF_UPLOAD_OPENAPI = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "required": ["file"],
+                    "properties": {"file": {"type": "string", "format": "binary"}},
+                }
+            }
+        },
+    }
+}
+
+
+@dataclass
+class StoredUpload:
+    path: Path
+    size: int
+    sha256: str
+    filename: str
+
+
+def _too_large(max_bytes: int) -> HTTPException:
+    return HTTPException(
+        status_code=413,
+        detail=f"Fisier prea mare (maxim {max_bytes // (1024 * 1024)} MB).",
+    )
+
+
+class _MultipartEvents:
+    """
+    Adaptează parserul incremental din python-multipart (bazat pe callback-uri)
+    la o listă de evenimente pentru fiecare bucată citită din corpul cererii:
+    ("part", parametrii Content-Disposition), ("data", bytes), ("end", None).
+    """
+
+    def __init__(self, boundary: bytes):
+        self._events: List[Tuple[str, Any]] = []
+        self._field = b""
+        self._value = b""
+        self._disposition = b""
+        self._parser = MultipartParser(boundary, callbacks={
+            "on_part_begin": self._on_part_begin,
+            "on_header_field": self._on_header_field,
+            "on_header_value": self._on_header_value,
+            "on_header_end": self._on_header_end,
+            "on_headers_finished": self._on_headers_finished,
+            "on_part_data": self._on_part_data,
+            "on_part_end": self._on_part_end,
+        })
+
+    def feed(self, chunk: bytes) -> List[Tuple[str, Any]]:
+        self._parser.write(chunk)
+        events, self._events = self._events, []
+        return events
+
+    def _on_part_begin(self) -> None:
+        self._disposition = b""
+
+    def _on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._field += data[start:end]
+
+    def _on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._value += data[start:end]
+
+    def _on_header_end(self) -> None:
+        if self._field.lower() == b"content-disposition":
+            self._disposition = self._value
+        self._field = self._value = b""
+
+    def _on_headers_finished(self) -> None:
+        self._events.append(("part", parse_options_header(self._disposition)[1]))
+
+    def _on_part_data(self, data: bytes, start: int, end: int) -> None:
+        self._events.append(("data", data[start:end]))
+
+    def _on_part_end(self) -> None:
+        self._events.append(("end", None))
+
+
+async def receive_pdf_upload(
+    request: Request,
+    directory: Path,
+    field: str = "file",
+    max_bytes: int = MAX_UPLOAD_BYTES,
+) -> StoredUpload:
+    """
+    Citește direct din fluxul cererii (fără spool-ul Starlette) câmpul `field`
+    al unui formular multipart și scrie PDF-ul într-un fișier temporar din
+    `directory`: fișierul ajunge o singură dată pe disc, iar memoria per
+    upload e mărginită de bucățile primite. Content-Length peste limită e
+    respins cu 413 înainte de a citi corpul; fără el, transferul e oprit cu
+    413 imediat ce fișierul depășește `max_bytes`. Numele (fără extensie
+    .pdf) și semnătura %PDF sunt verificate pe primele bucăți.
+    Apelantul mută sau șterge fișierul temporar.
+    """
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    boundary = params.get(b"boundary")
+    if content_type != b"multipart/form-data" or not boundary:
+        raise HTTPException(status_code=400, detail="Se astepta un formular multipart cu fisierul PDF.")
+    limit = max_bytes + MULTIPART_OVERHEAD
+    length = request.headers.get("content-length", "")
+    if length.isdigit() and int(length) > limit:
+        raise _too_large(max_bytes)
+
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    tmp = directory / f".upload.{uuid.uuid4().hex}.part"
+
+    parts = _MultipartEvents(boundary)
+    digest = hashlib.sha256()
+    received = size = 0
+    head = b""
+    filename: Optional[str] = None
+    f = None
+    state = "before"  # before → file (în câmpul `field`) → done
+    try:
+        async for chunk in request.stream():
+            received += len(chunk)
+            if received > limit:
+                raise _too_large(max_bytes)
+            try:
+                events = parts.feed(chunk)
+            except MultipartParseError:
+                raise HTTPException(status_code=400, detail="Formular multipart invalid.")
+            data: List[bytes] = []
+            for kind, value in events:
+                if kind == "part" and state == "before" and value.get(b"name") == field.encode():
+                    filename = value.get(b"filename", b"").decode("utf-8", "replace")
+                    filename = filename.replace("/", "_").replace("\\", "_") or "investigatie.pdf"
+                    if not filename.lower().endswith(".pdf"):
+                        raise HTTPException(status_code=400, detail="Se accepta doar fisiere PDF.")
+                    f = await run_in_threadpool(open, tmp, "wb")
+                    state = "file"
+                elif kind == "data" and state == "file":
+                    data.append(value)
+                elif kind == "end" and state == "file":
+                    state = "done"
+            if not data:
+                continue
+            chunk = b"".join(data)
+            if len(head) < len(PDF_MAGIC):
+                head += chunk[:len(PDF_MAGIC) - len(head)]
+                if not PDF_MAGIC.startswith(head):
+                    raise HTTPException(status_code=400, detail="Fisier PDF invalid.")
+            size += len(chunk)
+            if size > max_bytes:
+                raise _too_large(max_bytes)
+            digest.update(chunk)
+            await run_in_threadpool(f.write, chunk)
+        if state == "before":
+            raise HTTPException(status_code=422, detail=f"Lipseste fisierul PDF (campul '{field}').")
+        if state != "done" or head != PDF_MAGIC:
+            raise HTTPException(status_code=400, detail="Fisier PDF invalid.")
+        await run_in_threadpool(f.close)
+    except BaseException:
+        if f is not None:
+            f.close()
+        discard_spooled(tmp)
+        raise
+
+    return StoredUpload(path=tmp, size=size, sha256=digest.hexdigest(), filename=filename)
+
+
+def discard_spooled(path: Path) -> None:
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+async def save_attachment(request: Request, uploader: Optional[str]) -> dict:
+    """
+    Upload de investigație (câmpul `file` din formular) → store-ul de
+    atașamente (dedup după SHA-256). Întoarce răspunsul pentru frontend;
+    `stored_name` se trimite apoi în `investigations` la generarea foii.
+    """
+    spooled = await receive_pdf_upload(request, attachment_store.blobs_dir)
+    try:
+        meta = await run_in_threadpool(
+            attachment_store.ingest, spooled.path, spooled.sha256, spooled.size, spooled.filename, uploader
+        )
+    except BaseException:
+        discard_spooled(spooled.path)
+        raise
+    return {
+        "original_name": spooled.filename,
+        "stored_name": stored_name_for(meta["sha256"]),
+        "size": meta["size"],
+        "sha256": meta["sha256"],
+        "page_count": meta["page_count"],
+        "valid": bool(meta["valid"]),
+    }
@@ -0,0 +1,214 @@
+import csv
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+WARDMAP_CSV = os.path.join(BASE_DIR, "data", "wardmap.csv")
+
+FREE = "free"
+OCCUPIED = "occupied"
+
+
+def bed_label(ward: str, room: str, bed: str) -> str:
+    return f"{ward}-{room}-{bed}"
+
+
+class _Ward:
+    def __init__(self, name: str, category: str, department: str):
+        self.name = name
+        self.category = category
+        # secția din sugestii ("Terapie Intensivă", ...) căreia îi aparține
+        self.department = department
+        # paturile internabile (status "free" în CSV), în ordinea din fișier
+        self.beds: List[str] = []
+        # paturi marcate ocupate în CSV (în afara internărilor din aplicație)
+        self.blocked = 0
+        # paturile libere acum; un pat eliberat trece la coada listei
+        self.free: "OrderedDict[str, None]" = OrderedDict()
+
+    @property
+    def capacity(self) -> int:
+        return len(self.beds) + self.blocked
+
+
+class WardOccupancy:
+    """
+    Ocuparea paturilor pe secții.
+
+    Paturile vin din wardmap.csv (ward, room, bed, status[, category,
+    department]); `department` leagă secția fizică de secția din sugestii.
+    Un pat e ocupat dacă are o internare activă în baza de internări (comună
+    tuturor workerilor). Fiecare secție ține în memorie paturile libere;
+    la fiecare interogare se aplică doar ocupările/eliberările noi din
+    jurnalul paturilor al bazei, deci niciun apel nu reparcurge paturile.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._wards: Dict[str, _Ward] = {}
+        # secția din sugestii -> secțiile ei fizice
+        self._departments: Dict[str, List[_Ward]] = {}
+        # eticheta patului -> (secție, cameră, pat, status din CSV)
+        self._beds: Dict[str, Tuple[str, str, str, str]] = {}
+        # paturile internabile ocupate de internări active
+        self._occupied: Set[str] = set()
+        self._events: Optional[Callable[[int], List[Tuple[int, str, bool]]]] = None
+        self._cursor = 0
+
+    @classmethod
+    def from_csv(cls, path: str = WARDMAP_CSV) -> "WardOccupancy":
+        occ = cls()
+        if not os.path.exists(path):
+            return occ
+        with open(path, "r", encoding="utf-8", newline="") as f:
+            for row in csv.DictReader(f):
+                ward = (row.get("ward") or "").strip()
+                if not ward:
+                    continue
+                occ.add_bed(
+                    ward,
+                    (row.get("room") or "").strip(),
+                    (row.get("bed") or "").strip(),
+                    (row.get("status") or FREE).strip().lower(),
+                    (row.get("category") or "medical").strip(),
+                    (row.get("department") or "").strip() or None,
+                )
+        return occ
+
+    def add_bed(self, ward: str, room: str, bed: str, status: str = FREE, category: str = "medical",
+                department: Optional[str] = None) -> str:
+        label = bed_label(ward, room, bed)
+        with self._lock:
+            w = self._wards.get(ward)
+            if w is None:
+                w = self._wards[ward] = _Ward(ward, category, department or ward)
+                self._departments.setdefault(w.department, []).append(w)
+            if label not in self._beds:
+                if status == FREE:
+                    w.beds.append(label)
+                    w.free[label] = None
+                else:
+                    w.blocked += 1
+                self._beds[label] = (ward, room, bed, status)
+        return label
+
+    def attach(self, occupied: Callable[[], Tuple[int, Iterable[str]]],
+               events: Callable[[int], List[Tuple[int, str, bool]]]) -> None:
+        """
+        Sursa ocupării: `occupied()` întoarce (cursor, paturile internărilor
+        active) o singură dată, la pornire; `events(cursor)` întoarce
+        ocupările/eliberările de după cursor: (seq, pat, ocupat).
+        """
+        cursor, labels = occupied()
+        with self._lock:
+            for w in self._wards.values():
+                w.free = OrderedDict.fromkeys(w.beds)
+            self._occupied.clear()
+            for label in labels:
+                self._mark(label, True)
+            self._cursor = cursor
+            self._events = events
+
+    def _mark(self, label: str, occupied: bool) -> None:
+        # apelat cu self._lock luat
+        info = self._beds.get(label)
+        if info is None or info[3] != FREE:
+            return
+        w = self._wards[info[0]]
+        if occupied:
+            self._occupied.add(label)
+            w.free.pop(label, None)
+        elif label in self._occupied:
+            self._occupied.discard(label)
+            w.free[label] = None
+
+    def _refresh(self) -> None:
+        """Aplică ocupările/eliberările scrise (de orice worker) de la ultimul apel."""
+        if self._events is None:
+            return
+        events = self._events(self._cursor)
+        if not events:
+            return
+        with self._lock:
+            for seq, label, occupied in events:
+                # alt fir le-ar fi putut aplica deja (și pe cele de după)
+                if seq > self._cursor:
+                    self._mark(label, occupied)
+                    self._cursor = seq
+
+    # ----------------- interogări -----------------
+    def _matching(self, ward: Optional[str]) -> List[_Ward]:
+        """Secția fizică cu acest nume sau secțiile fizice ale secției din sugestii."""
+        if not ward:
+            return []
+        w = self._wards.get(ward)
+        if w is not None:
+            return [w]
+        return self._departments.get(ward, [])
+
+    def has_ward(self, ward: Optional[str]) -> bool:
+        return bool(self._matching(ward))
+
+    def free_beds(self, ward: str) -> Optional[int]:
+        wards = self._matching(ward)
+        if not wards:
+            return None
+        self._refresh()
+        return sum(len(w.free) for w in wards)
+
+    def bed(self, label: str) -> Optional[Tuple[str, str, str, str]]:
+        info = self._beds.get(label)
+        if info is None:
+            return None
+        self._refresh()
+        ward, room, bed, status = info
+        if status == FREE and label in self._occupied:
+            status = OCCUPIED
+        return ward, room, bed, status
+
+    def _status(self, w: _Ward) -> dict:
+        free = len(w.free)
+        return {
+            "ward_name": w.name,
+            "category": w.category,
+            "department": w.department,
+            "capacity": w.capacity,
+            "current": w.capacity - free,
+            "free": free,
+        }
+
+    def ward_status(self, ward: str) -> Optional[dict]:
+        w = self._wards.get(ward)
+        if w is None:
+            return None
+        self._refresh()
+        return self._status(w)
+
+    def snapshot(self) -> List[dict]:
+        self._refresh()
+        return [self._status(w) for w in self._wards.values()]
+
+    # ----------------- alocare -----------------
+    def next_free(self, ward: str, exclude: Iterable[str] = ()) -> Optional[str]:
+        """
+        Primul pat liber pentru o internare în `ward` (secție fizică sau secție
+        din sugestii), din secția fizică cea mai liberă. Alocarea propriu-zisă
+        e inserarea internării: indexul unic pe patul activ din baza de date
+        decide între workeri; paturile pierdute astfel vin în `exclude`.
+        """
+        wards = self._matching(ward)
+        if not wards:
+            return None
+        self._refresh()
+        skip = frozenset(exclude)
+        with self._lock:
+            for w in sorted(wards, key=lambda w: -len(w.free)):
+                for label in w.free:
+                    if label not in skip:
+                        return label
+        return None
+
+
+ward_occupancy = WardOccupancy.from_csv()
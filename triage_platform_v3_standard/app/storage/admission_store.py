@@ -0,0 +1,309 @@
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from ..models.admission import Admission, Intervention
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+ADMISSIONS_DB = os.path.join(BASE_DIR, "data", "admissions.db")
+
+TS_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS admissions (
+    seq          INTEGER PRIMARY KEY AUTOINCREMENT,
+    patient_id   TEXT,
+    first_name   TEXT,
+    last_name    TEXT,
+    triage_level INTEGER,
+    triage_color TEXT,
+    reason       TEXT,
+    ward         TEXT,
+    bed          INTEGER,
+    bed_label    TEXT,
+    type         TEXT NOT NULL DEFAULT 'continua',
+    status       TEXT NOT NULL DEFAULT 'active',
+    created_at   TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_admissions_ward ON admissions(ward);
+CREATE INDEX IF NOT EXISTS idx_admissions_level ON admissions(triage_level);
+CREATE INDEX IF NOT EXISTS idx_admissions_created ON admissions(created_at);
+
+CREATE TABLE IF NOT EXISTS interventions (
+    admission_seq INTEGER NOT NULL REFERENCES admissions(seq),
+    timestamp     TEXT NOT NULL,
+    author        TEXT NOT NULL,
+    description   TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_interventions_admission ON interventions(admission_seq);
+
+-- versiune globală, incrementată la orice modificare (folosită pentru ETag)
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO meta (key, value) VALUES ('version', 0);
+CREATE TRIGGER IF NOT EXISTS trg_admissions_insert AFTER INSERT ON admissions
+BEGIN UPDATE meta SET value = value + 1 WHERE key = 'version'; END;
+CREATE TRIGGER IF NOT EXISTS trg_admissions_update AFTER UPDATE ON admissions
+BEGIN UPDATE meta SET value = value + 1 WHERE key = 'version'; END;
+CREATE TRIGGER IF NOT EXISTS trg_interventions_insert AFTER INSERT ON interventions
+BEGIN UPDATE meta SET value = value + 1 WHERE key = 'version'; END;
+"""
+
+# jurnalul paturilor: un rând la fiecare ocupare/eliberare, scris de trigger-e
+# în aceeași tranzacție cu internarea (din orice worker). Ocuparea pe secții
+# aplică doar rândurile noi, nu recitește toate internările active.
+_BED_EVENTS = """
+CREATE TABLE IF NOT EXISTS bed_events (
+    seq       INTEGER PRIMARY KEY AUTOINCREMENT,
+    bed_label TEXT NOT NULL,
+    occupied  INTEGER NOT NULL
+);
+CREATE TRIGGER IF NOT EXISTS trg_bed_events_insert AFTER INSERT ON admissions
+WHEN NEW.status = 'active' AND NEW.bed_label IS NOT NULL
+BEGIN INSERT INTO bed_events (bed_label, occupied) VALUES (NEW.bed_label, 1); END;
+CREATE TRIGGER IF NOT EXISTS trg_bed_events_update AFTER UPDATE OF status, bed_label ON admissions
+WHEN OLD.status IS NOT NEW.status OR OLD.bed_label IS NOT NEW.bed_label
+BEGIN
+    INSERT INTO bed_events (bed_label, occupied)
+        SELECT OLD.bed_label, 0 WHERE OLD.status = 'active' AND OLD.bed_label IS NOT NULL;
+    INSERT INTO bed_events (bed_label, occupied)
+        SELECT NEW.bed_label, 1 WHERE NEW.status = 'active' AND NEW.bed_label IS NOT NULL;
+END;
+"""
+
+_COLUMNS = (
+    "seq", "patient_id", "first_name", "last_name", "triage_level", "triage_color",
+    "reason", "ward", "bed", "bed_label", "type", "status", "created_at",
+)
+
+
+def format_id(seq: int) -> str:
+    return f"INT-{seq:04d}"
+
+
+def parse_id(admission_id: str) -> Optional[int]:
+    if not admission_id or not admission_id.startswith("INT-"):
+        return None
+    try:
+        return int(admission_id[4:])
+    except ValueError:
+        return None
+
+
+class AdmissionRepository:
+    """
+    Internările, persistate în SQLite (WAL).
+
+    Codul INT-xxxx e derivat din cheia AUTOINCREMENT, deci alocarea e atomică
+    chiar și cu mai mulți workeri; fiecare fir are propria conexiune, iar
+    concurența la scriere e gestionată de SQLite, nu de un lock Python.
+    """
+
+    def __init__(self, path: str = ADMISSIONS_DB):
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(_SCHEMA)
+        existing = {r["name"] for r in conn.execute("PRAGMA table_info(admissions)")}
+        if "bed_label" not in existing:
+            conn.execute("ALTER TABLE admissions ADD COLUMN bed_label TEXT")
+        # un pat poate avea o singură internare activă, chiar și cu mai mulți workeri
+        conn.execute(
+            "CREATE UNIQUE INDEX IF NOT EXISTS idx_admissions_active_bed"
+            " ON admissions(bed_label) WHERE status = 'active' AND bed_label IS NOT NULL"
+        )
+        # după ALTER: trigger-ele jurnalului de paturi folosesc coloana bed_label
+        conn.executescript(_BED_EVENTS)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10.0, isolation_level=None, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn = conn
+        return conn
+
+    # ----------------- conversii -----------------
+    def _to_model(self, row: sqlite3.Row, interventions: List[Intervention]) -> Admission:
+        data: Dict[str, Any] = {k: row[k] for k in _COLUMNS if k != "seq"}
+        data["id"] = format_id(row["seq"])
+        data["created_at"] = datetime.strptime(row["created_at"], TS_FORMAT)
+        data["interventions"] = interventions
+        return Admission(**data)
+
+    def _interventions(self, seqs: List[int]) -> Dict[int, List[Intervention]]:
+        out: Dict[int, List[Intervention]] = {s: [] for s in seqs}
+        if not seqs:
+            return out
+        marks = ",".join("?" * len(seqs))
+        rows = self._conn().execute(
+            f"SELECT admission_seq, timestamp, author, description FROM interventions"
+            f" WHERE admission_seq IN ({marks}) ORDER BY rowid",
+            seqs,
+        )
+        for r in rows:
+            out[r["admission_seq"]].append(Intervention(
+                timestamp=datetime.strptime(r["timestamp"], TS_FORMAT),
+                author=r["author"],
+                description=r["description"],
+            ))
+        return out
+
+    def _rows_to_models(self, rows: List[sqlite3.Row], with_interventions: bool = True) -> List[Admission]:
+        if not with_interventions:
+            return [self._to_model(r, []) for r in rows]
+        interventions = self._interventions([r["seq"] for r in rows])
+        return [self._to_model(r, interventions[r["seq"]]) for r in rows]
+
+    # ----------------- operații -----------------
+    def create(self, data: Dict[str, Any], created_at: Optional[datetime] = None) -> Admission:
+        created_at = created_at or datetime.now()
+        fields = {k: data.get(k) for k in _COLUMNS if k not in ("seq", "type", "status", "created_at")}
+        fields["type"] = data.get("type") or "continua"
+        fields["status"] = "active"
+        fields["created_at"] = created_at.strftime(TS_FORMAT)
+        cols = ", ".join(fields)
+        marks = ", ".join("?" * len(fields))
+        cur = self._conn().execute(
+            f"INSERT INTO admissions ({cols}) VALUES ({marks})", tuple(fields.values())
+        )
+        return Admission(
+            id=format_id(cur.lastrowid),
+            created_at=created_at.replace(microsecond=0),
+            **{k: v for k, v in fields.items() if k != "created_at"},
+        )
+
+    def get(self, admission_id: str) -> Optional[Admission]:
+        seq = parse_id(admission_id)
+        if seq is None:
+            return None
+        row = self._conn().execute("SELECT * FROM admissions WHERE seq = ?", (seq,)).fetchone()
+        if row is None:
+            return None
+        return self._rows_to_models([row])[0]
+
+    def version(self) -> int:
+        """Se schimbă la orice scriere (din orice worker)."""
+        row = self._conn().execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        return row[0] if row else 0
+
+    def list_page(
+        self,
+        ward: Optional[str] = None,
+        triage_level: Optional[int] = None,
+        triage_color: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        active_only: bool = False,
+        after: Optional[str] = None,
+        limit: int = 500,
+        order: str = "asc",
+    ) -> List[Admission]:
+        """
+        O pagină de internări filtrate, paginată după cursor (codul INT-xxxx
+        al ultimului element din pagina anterioară), fără intervenții.
+        """
+        where, params = [], []
+        if ward:
+            where.append("ward = ?")
+            params.append(ward)
+        if triage_level is not None:
+            where.append("triage_level = ?")
+            params.append(triage_level)
+        if triage_color:
+            where.append("lower(triage_color) = lower(?)")
+            params.append(triage_color)
+        if since:
+            where.append("created_at >= ?")
+            params.append(since.strftime(TS_FORMAT))
+        if until:
+            where.append("created_at < ?")
+            params.append(until.strftime(TS_FORMAT))
+        if active_only:
+            where.append("status = 'active'")
+        seq = parse_id(after) if after else None
+        if seq is not None:
+            where.append("seq > ?" if order == "asc" else "seq < ?")
+            params.append(seq)
+
+        sql = "SELECT * FROM admissions"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY seq " + ("ASC" if order == "asc" else "DESC") + " LIMIT ?"
+        params.append(limit)
+        rows = self._conn().execute(sql, params).fetchall()
+        return self._rows_to_models(rows, with_interventions=False)
+
+    def iter_filtered(self, chunk_size: int = 500, **filters) -> Iterator[Admission]:
+        """Parcurge toate internările filtrate, pe bucăți (memorie constantă)."""
+        after = filters.pop("after", None)
+        while True:
+            page = self.list_page(after=after, limit=chunk_size, **filters)
+            yield from page
+            if len(page) < chunk_size:
+                return
+            after = page[-1].id
+
+    def add_intervention(self, admission_id: str, intervention: Intervention) -> Optional[Admission]:
+        seq = parse_id(admission_id)
+        if seq is None:
+            return None
+        conn = self._conn()
+        try:
+            conn.execute(
+                "INSERT INTO interventions (admission_seq, timestamp, author, description) VALUES (?, ?, ?, ?)",
+                (seq, intervention.timestamp.strftime(TS_FORMAT), intervention.author, intervention.description),
+            )
+        except sqlite3.IntegrityError:
+            return None
+        return self.get(admission_id)
+
+    def occupied_beds(self) -> Tuple[int, List[str]]:
+        """
+        (ultimul rând din jurnalul paturilor, paturile ocupate de internări
+        active), citite în aceeași tranzacție: punctul de plecare al ocupării.
+        """
+        conn = self._conn()
+        conn.execute("BEGIN")
+        try:
+            cursor = conn.execute("SELECT COALESCE(MAX(seq), 0) FROM bed_events").fetchone()[0]
+            labels = [r[0] for r in conn.execute(
+                "SELECT bed_label FROM admissions WHERE status = 'active' AND bed_label IS NOT NULL"
+            )]
+        finally:
+            conn.execute("COMMIT")
+        return cursor, labels
+
+    def bed_events(self, after: int) -> List[Tuple[int, str, bool]]:
+        """Ocupările/eliberările de paturi de după `after`, în ordine: (seq, pat, ocupat)."""
+        rows = self._conn().execute(
+            "SELECT seq, bed_label, occupied FROM bed_events WHERE seq > ? ORDER BY seq", (after,)
+        )
+        return [(r[0], r[1], bool(r[2])) for r in rows]
+
+    def set_status(self, admission_id: str, status: str, only_from: str = "active") -> Tuple[Optional[Admission], bool]:
+        """
+        Schimbă statusul doar dacă internarea e încă în `only_from`.
+        Întoarce (internarea, dacă s-a schimbat ceva); (None, False) dacă nu există.
+        Condiția din UPDATE face ca o a doua externare (din orice worker) să nu
+        mai elibereze un pat care între timp a fost realocat.
+        """
+        seq = parse_id(admission_id)
+        if seq is None:
+            return None, False
+        cur = self._conn().execute(
+            "UPDATE admissions SET status = ? WHERE seq = ? AND status = ?", (status, seq, only_from)
+        )
+        return self.get(admission_id), cur.rowcount > 0
+
+
+def create_repository() -> AdmissionRepository:
+    return AdmissionRepository(os.environ.get("TRIAGE_ADMISSIONS_DB", ADMISSIONS_DB))
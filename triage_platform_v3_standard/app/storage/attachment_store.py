@@ -0,0 +1,417 @@
+import hashlib
+import os
+import re
+import shutil
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from PyPDF2 import PdfReader
+
+BASE_DIR = Path(__file__).resolve().parents[2]
+ATTACHMENTS_DIR = BASE_DIR / "data" / "attachments"
+ATTACHMENTS_DB = str(BASE_DIR / "data" / "attachments.db")
+
+# directoarele vechi de upload (nume date de client / inv_<uuid>.pdf)
+LEGACY_UPLOAD_DIRS = (BASE_DIR / "data" / "uploads", BASE_DIR / "uploads_investigatii")
+
+TS_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# un blob încărcat, dar neatașat la nicio foaie, e păstrat atât înainte de GC
+GC_GRACE = int(os.environ.get("TRIAGE_ATTACHMENT_GRACE", 7 * 24 * 3600))
+# cât de des rulează GC-ul (o singură dată pe interval, la un singur worker)
+GC_INTERVAL = int(os.environ.get("TRIAGE_ATTACHMENT_GC_INTERVAL", 3600))
+# o referință mai nouă de atât poate fi a unei randări în curs (fișierul nu e încă în cache)
+REF_GRACE = 3600
+# fișierele .part rămase după un upload întrerupt
+PART_GRACE = 3600
+
+_STORED_NAME = re.compile(r"^([0-9a-f]{64})\.pdf$")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (
+    sha256        TEXT PRIMARY KEY,
+    size          INTEGER NOT NULL,
+    page_count    INTEGER,
+    valid         INTEGER NOT NULL DEFAULT 1,
+    error         TEXT,
+    original_name TEXT,
+    uploader      TEXT,
+    first_seen    TEXT NOT NULL,
+    last_seen     TEXT NOT NULL
+) WITHOUT ROWID;
+
+-- nume vechi (data/uploads/<nume>, inv_<uuid>.pdf) -> conținut
+CREATE TABLE IF NOT EXISTS aliases (
+    name   TEXT PRIMARY KEY,
+    sha256 TEXT NOT NULL REFERENCES blobs(sha256) ON DELETE CASCADE
+) WITHOUT ROWID;
+
+-- cine folosește un blob (ex. "externare:<cheie>"); fără referințe -> GC
+CREATE TABLE IF NOT EXISTS refs (
+    sha256 TEXT NOT NULL REFERENCES blobs(sha256) ON DELETE CASCADE,
+    owner  TEXT NOT NULL,
+    PRIMARY KEY (sha256, owner)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_refs_owner ON refs(owner);
+
+-- fișierele din directoarele vechi deja importate (nu sunt reimportate după GC)
+CREATE TABLE IF NOT EXISTS legacy_imports (
+    name TEXT PRIMARY KEY
+) WITHOUT ROWID;
+
+-- ultima rulare a GC-ului, comună workerilor
+CREATE TABLE IF NOT EXISTS maintenance (
+    task     TEXT PRIMARY KEY,
+    owner    TEXT NOT NULL,
+    last_run REAL NOT NULL
+) WITHOUT ROWID;
+"""
+
+
+def stored_name_for(sha256: str) -> str:
+    return f"{sha256}.pdf"
+
+
+def inspect_pdf(path: Path) -> Tuple[Optional[int], Optional[str]]:
+    """
+    Parsează PDF-ul o dată, la upload: întoarce (număr de pagini, eroare).
+    Un fișier cu eroare nu mai e trimis la randare.
+    """
+    try:
+        reader = PdfReader(str(path), strict=False)
+        if reader.is_encrypted:
+            return None, "PDF criptat"
+        pages = reader.pages
+        for page in pages:
+            page.get("/MediaBox")
+        return len(pages), None
+    except Exception as e:
+        return None, f"{type(e).__name__}: {e}"[:200]
+
+
+def _file_sha256(path: Path, chunk_size: int = 1024 * 1024) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class AttachmentStore:
+    """
+    Investigațiile încărcate, adresate după conținut (SHA-256).
+
+    Fiecare PDF distinct e scris o singură dată în data/attachments/blobs/,
+    oricâte upload-uri sau foi de externare îl folosesc; metadatele (nume
+    original, mărime, pagini, cine l-a încărcat, prima apariție) stau în
+    SQLite. Numele vechi rămân valide prin tabela de aliasuri.
+    """
+
+    def __init__(self, root: Path = ATTACHMENTS_DIR, db_path: str = ATTACHMENTS_DB):
+        self.root = Path(root)
+        self.blobs_dir = self.root / "blobs"
+        self.blobs_dir.mkdir(parents=True, exist_ok=True)
+        self.path = db_path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(_SCHEMA)
+        existing = {r["name"] for r in conn.execute("PRAGMA table_info(blobs)")}
+        if "valid" not in existing:
+            conn.execute("ALTER TABLE blobs ADD COLUMN valid INTEGER NOT NULL DEFAULT 1")
+            conn.execute("ALTER TABLE blobs ADD COLUMN error TEXT")
+            self._revalidate()
+        if "added_at" not in {r["name"] for r in conn.execute("PRAGMA table_info(refs)")}:
+            conn.execute("ALTER TABLE refs ADD COLUMN added_at REAL NOT NULL DEFAULT 0")
+        # referințele permanente „legacy:<nume>” din versiunea anterioară țineau
+        # blob-urile importate pentru totdeauna; acum importul e ținut minte separat
+        conn.execute(
+            "INSERT OR IGNORE INTO legacy_imports (name) SELECT substr(owner, 8) FROM refs WHERE owner LIKE 'legacy:%'"
+        )
+        conn.execute("DELETE FROM refs WHERE owner LIKE 'legacy:%'")
+        self.deduplicated = 0
+        # apelați cu ("added", meta) pentru un blob nou și ("removed", {"sha256": ...}) la GC
+        self._listeners: List[Callable[[str, dict], None]] = []
+        # prefix de proprietar -> funcție care spune dacă proprietarul mai există
+        self._owner_checks: Dict[str, Callable[[str], bool]] = {}
+        self.owner = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._stop = threading.Event()
+        self._gc_thread: Optional[threading.Thread] = None
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10.0, isolation_level=None, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn = conn
+        return conn
+
+    def add_listener(self, listener: Callable[[str, dict], None]) -> None:
+        self._listeners.append(listener)
+
+    def _notify(self, event: str, meta: dict) -> None:
+        # ascultătorii doar pun în coadă (ex. indexarea textului); nu blochează upload-ul
+        for listener in self._listeners:
+            try:
+                listener(event, meta)
+            except Exception:
+                pass
+
+    def blob_path(self, sha256: str) -> Path:
+        return self.blobs_dir / sha256[:2] / f"{sha256}.pdf"
+
+    # ----------------- scriere -----------------
+    def ingest(self, tmp_path: Path, sha256: str, size: int, original_name: Optional[str], uploader: Optional[str]) -> dict:
+        """
+        Publică un fișier temporar (din același filesystem) ca blob. Dacă
+        conținutul există deja, temporarul e șters și se întoarce intrarea veche.
+        """
+        dest = self.blob_path(sha256)
+        if dest.exists():
+            self.deduplicated += 1
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+        else:
+            dest.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(tmp_path, dest)
+
+        now = datetime.now().strftime(TS_FORMAT)
+        conn = self._conn()
+        if self.get(sha256) is None:
+            page_count, error = inspect_pdf(dest)
+            added = conn.execute(
+                "INSERT OR IGNORE INTO blobs"
+                " (sha256, size, page_count, valid, error, original_name, uploader, first_seen, last_seen)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (sha256, size, page_count, int(error is None), error, original_name, uploader, now, now),
+            ).rowcount
+            meta = self.get(sha256)
+            if added:
+                self._notify("added", meta)
+            return meta
+        # un upload nou al aceluiași conținut amână GC-ul
+        conn.execute("UPDATE blobs SET last_seen = ? WHERE sha256 = ?", (now, sha256))
+        return self.get(sha256)
+
+    def _revalidate(self) -> None:
+        # index creat înainte de validarea la upload: verificăm o dată blob-urile existente
+        conn = self._conn()
+        for r in conn.execute("SELECT sha256 FROM blobs").fetchall():
+            page_count, error = inspect_pdf(self.blob_path(r["sha256"]))
+            conn.execute(
+                "UPDATE blobs SET page_count = ?, valid = ?, error = ? WHERE sha256 = ?",
+                (page_count, int(error is None), error, r["sha256"]),
+            )
+
+    def add_file(self, path: Path, original_name: Optional[str] = None, uploader: Optional[str] = None) -> dict:
+        """Copiază în store un fișier existent (păstrând originalul)."""
+        path = Path(path)
+        tmp = self.blobs_dir / f".import.{os.getpid()}.{threading.get_ident()}.part"
+        shutil.copyfile(path, tmp)
+        return self.ingest(tmp, _file_sha256(tmp), tmp.stat().st_size, original_name or path.name, uploader)
+
+    def add_refs(self, sha256s: Iterable[str], owner: str) -> None:
+        now = time.time()
+        rows = [(s, owner, now) for s in set(sha256s)]
+        if rows:
+            self._conn().executemany(
+                "INSERT INTO refs (sha256, owner, added_at) VALUES (?, ?, ?)"
+                " ON CONFLICT(sha256, owner) DO UPDATE SET added_at = excluded.added_at",
+                rows,
+            )
+
+    def remove_refs(self, owner: str) -> int:
+        """Proprietarul (ex. o foaie scoasă din cache) nu mai folosește niciun blob."""
+        return self._conn().execute("DELETE FROM refs WHERE owner = ?", (owner,)).rowcount
+
+    def track_owners(self, prefix: str, exists: Callable[[str], bool]) -> None:
+        """
+        La fiecare GC, referințele `<prefix><id>` pentru care `exists(id)` e
+        fals (și mai vechi de REF_GRACE) sunt șterse; prind ce a scăpat
+        `remove_refs` (alt worker oprit între timp, referințe de dinainte).
+        """
+        self._owner_checks[prefix] = exists
+
+    def import_legacy(self, directories: Iterable[Path] = LEGACY_UPLOAD_DIRS) -> int:
+        """
+        Înregistrează PDF-urile din directoarele vechi de upload, ca numele deja
+        trimise de frontend (investigations) să se rezolve în continuare.
+        """
+        imported = 0
+        known = {r["name"] for r in self._conn().execute("SELECT name FROM legacy_imports")}
+        for directory in directories:
+            if not directory.is_dir():
+                continue
+            for entry in os.scandir(directory):
+                if not entry.is_file() or not entry.name.lower().endswith(".pdf") or entry.name in known:
+                    continue
+                meta = self.add_file(Path(entry.path), entry.name)
+                self._conn().execute(
+                    "INSERT OR IGNORE INTO aliases (name, sha256) VALUES (?, ?)", (entry.name, meta["sha256"])
+                )
+                # fără referință: blob-ul rămâne cât timp îl folosește o foaie, apoi intră la GC
+                self._conn().execute("INSERT OR IGNORE INTO legacy_imports (name) VALUES (?)", (entry.name,))
+                imported += 1
+        return imported
+
+    # ----------------- citire -----------------
+    def get(self, sha256: str) -> Optional[dict]:
+        row = self._conn().execute("SELECT * FROM blobs WHERE sha256 = ?", (sha256,)).fetchone()
+        return dict(row) if row else None
+
+    def list_blobs(self) -> List[dict]:
+        return [dict(r) for r in self._conn().execute("SELECT * FROM blobs")]
+
+    def resolve_sha(self, name: str) -> Optional[str]:
+        """`<sha256>.pdf` sau un nume vechi -> sha256 (None dacă nu există)."""
+        m = _STORED_NAME.match(name or "")
+        if m:
+            return m.group(1) if self.get(m.group(1)) else None
+        row = self._conn().execute("SELECT sha256 FROM aliases WHERE name = ?", (name,)).fetchone()
+        return row["sha256"] if row else None
+
+    def resolve_many(self, names: Iterable[str]) -> List[Tuple[str, Path]]:
+        """
+        Numele din `investigations` -> [(sha256, cale)], în ordine, fără cele
+        necunoscute și fără cele marcate invalide la upload.
+        """
+        out: List[Tuple[str, Path]] = []
+        for name in names:
+            sha = self.resolve_sha(name)
+            if not sha:
+                continue
+            meta = self.get(sha)
+            if meta and meta["valid"]:
+                out.append((sha, self.blob_path(sha)))
+        return out
+
+    # ----------------- curățare -----------------
+    def prune_refs(self, ref_grace: int = REF_GRACE) -> int:
+        """Șterge referințele proprietarilor urmăriți (track_owners) care nu mai există."""
+        conn = self._conn()
+        cutoff = time.time() - ref_grace
+        removed = 0
+        for prefix, exists in self._owner_checks.items():
+            owners = [
+                r["owner"]
+                for r in conn.execute(
+                    "SELECT DISTINCT owner FROM refs WHERE owner >= ? AND owner < ? AND added_at < ?",
+                    (prefix, prefix + "\uffff", cutoff),
+                )
+            ]
+            for owner in owners:
+                if not exists(owner[len(prefix):]):
+                    removed += conn.execute(
+                        "DELETE FROM refs WHERE owner = ? AND added_at < ?", (owner, cutoff)
+                    ).rowcount
+        return removed
+
+    def gc(self, grace: int = GC_GRACE) -> dict:
+        """
+        Șterge blob-urile fără nicio referință, neîncărcate din nou de `grace` secunde,
+        fișierele din blobs/ care nu apar în index și upload-urile .part abandonate.
+        """
+        conn = self._conn()
+        now = time.time()
+        pruned_refs = self.prune_refs()
+        cutoff = (datetime.now() - timedelta(seconds=grace)).strftime(TS_FORMAT)
+        orphans = [
+            r["sha256"]
+            for r in conn.execute(
+                "SELECT sha256 FROM blobs b WHERE last_seen < ?"
+                " AND NOT EXISTS (SELECT 1 FROM refs r WHERE r.sha256 = b.sha256)",
+                (cutoff,),
+            )
+        ]
+        removed_blobs = 0
+        for sha in orphans:
+            conn.execute("DELETE FROM blobs WHERE sha256 = ?", (sha,))
+            removed_blobs += self._remove(self.blob_path(sha))
+            self._notify("removed", {"sha256": sha})
+
+        removed_files = 0
+        for dirpath, _, filenames in os.walk(self.blobs_dir):
+            for name in filenames:
+                path = Path(dirpath) / name
+                try:
+                    age = now - path.stat().st_mtime
+                except OSError:
+                    continue
+                if name.endswith(".part"):
+                    if age > PART_GRACE:
+                        removed_files += self._remove(path)
+                    continue
+                m = _STORED_NAME.match(name)
+                if m and age > grace and self.get(m.group(1)) is None:
+                    removed_files += self._remove(path)
+        return {"refs": pruned_refs, "blobs": removed_blobs, "files": removed_files}
+
+    def claim_gc(self, interval: int = GC_INTERVAL) -> bool:
+        """True pentru un singur worker pe interval (ultima rulare e în SQLite)."""
+        now = time.time()
+        cur = self._conn().execute(
+            "INSERT INTO maintenance (task, owner, last_run) VALUES ('gc', ?, ?)"
+            " ON CONFLICT(task) DO UPDATE SET owner = excluded.owner, last_run = excluded.last_run"
+            " WHERE maintenance.last_run <= ?",
+            (self.owner, now, now - interval),
+        )
+        return cur.rowcount > 0
+
+    def start_gc(self, interval: int = GC_INTERVAL) -> None:
+        """Pornește firul de GC; fiecare worker îl are, dar rulează doar cel care revendică intervalul."""
+        if self._gc_thread is not None:
+            return
+        self._stop.clear()
+        self._gc_thread = threading.Thread(
+            target=self._gc_loop, args=(interval,), name="attachment-gc", daemon=True
+        )
+        self._gc_thread.start()
+
+    def _gc_loop(self, interval: int) -> None:
+        # prima verificare la pornire, apoi la fiecare interval (cu o marjă, ca
+        # workerii să nu se trezească toți în aceeași secundă)
+        wait = 0.0
+        while not self._stop.wait(wait):
+            try:
+                if self.claim_gc(interval):
+                    self.gc()
+            except (sqlite3.Error, OSError):
+                pass
+            wait = interval / 4
+
+    def close(self) -> None:
+        self._stop.set()
+        thread, self._gc_thread = self._gc_thread, None
+        if thread is not None:
+            thread.join(timeout=5)
+
+    @staticmethod
+    def _remove(path: Path) -> int:
+        try:
+            os.remove(path)
+            return 1
+        except OSError:
+            return 0
+
+    def stats(self) -> dict:
+        row = self._conn().execute(
+            "SELECT COUNT(*) AS n, COALESCE(SUM(size), 0) AS bytes, COALESCE(SUM(1 - valid), 0) AS invalid FROM blobs"
+        ).fetchone()
+        return {"blobs": row["n"], "bytes": row["bytes"], "invalid": row["invalid"], "deduplicated": self.deduplicated}
+
+
+def create_store() -> AttachmentStore:
+    return AttachmentStore(db_path=os.environ.get("TRIAGE_ATTACHMENTS_DB", ATTACHMENTS_DB))
+
+
+attachment_store = create_store()
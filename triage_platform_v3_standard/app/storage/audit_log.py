@@ -0,0 +1,206 @@
+import gzip
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+BASE_DIR = Path(__file__).resolve().parents[2]
+AUDIT_DIR = os.environ.get("TRIAGE_AUDIT_DIR", str(BASE_DIR / "data" / "audit"))
+
+# câte decizii așteaptă în memorie; peste această limită cele mai vechi se pierd (și se numără)
+CAPACITY = int(os.environ.get("TRIAGE_AUDIT_CAPACITY", 65536))
+# un segment nou după atâția octeți (necomprimați) sau după atâtea secunde
+SEGMENT_BYTES = int(os.environ.get("TRIAGE_AUDIT_SEGMENT_BYTES", 64 * 1024 * 1024))
+SEGMENT_SECONDS = int(os.environ.get("TRIAGE_AUDIT_SEGMENT_SECONDS", 24 * 3600))
+
+# scriitorul golește coada la cel mult FLUSH_INTERVAL secunde sau când are BATCH_SIZE intrări
+FLUSH_INTERVAL = 0.5
+BATCH_SIZE = 512
+# câte intrări serializează scriitorul înainte să cedeze GIL-ul
+CHUNK_SIZE = 32
+
+
+class AuditLog:
+    """
+    Jurnal de audit append-only, în segmente JSONL comprimate gzip.
+
+    `record` doar pune intrarea (obiectele, neserializate) într-un buffer
+    circular în memorie, deci nu adaugă I/O pe calea cererii. Un fir de
+    fundal golește bufferul pe loturi: serializează (`serialize(ts, *item)`
+    întoarce o linie JSON), scrie în segmentul curent (flush gzip după fiecare
+    lot, ca segmentul să fie lizibil și după o oprire bruscă) și rotește
+    segmentul după mărime sau vechime.
+    Dacă scriitorul nu ține pasul, bufferul pierde cele mai vechi intrări,
+    iar pierderile apar în `stats()`.
+
+    Fiecare proces (worker) scrie în propriile segmente: numele conține pid-ul.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        serialize: Callable[..., str],
+        prefix: str = "audit",
+        capacity: int = CAPACITY,
+        segment_bytes: int = SEGMENT_BYTES,
+        segment_seconds: int = SEGMENT_SECONDS,
+        flush_interval: float = FLUSH_INTERVAL,
+        batch_size: int = BATCH_SIZE,
+    ):
+        self.directory = directory
+        self.prefix = prefix
+        self.capacity = capacity
+        self.segment_bytes = segment_bytes
+        self.segment_seconds = segment_seconds
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self._serialize = serialize
+
+        self._buffer: deque = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._writer: Optional[threading.Thread] = None
+
+        self._file: Optional[gzip.GzipFile] = None
+        self._segment: Optional[str] = None
+        self._segment_started = 0.0
+        self._segment_written = 0
+
+        self.recorded = 0
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.segments = 0
+        self.last_error: Optional[str] = None
+
+    # ----------------- calea cererii -----------------
+    def record(self, *item: Any) -> None:
+        with self._lock:
+            if len(self._buffer) == self.capacity:
+                self.dropped += 1
+            self._buffer.append((time.time(), item))
+            self.recorded += 1
+            pending = len(self._buffer)
+        if self._writer is None:
+            self._start_writer()
+        if pending >= self.batch_size and not self._wake.is_set():
+            self._wake.set()
+
+    # ----------------- scriitorul de fundal -----------------
+    def _start_writer(self) -> None:
+        with self._lock:
+            if self._writer is not None:
+                return
+            self._writer = threading.Thread(target=self._write_loop, name=f"{self.prefix}-audit-writer", daemon=True)
+            self._writer.start()
+
+    def _write_loop(self) -> None:
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.drain()
+
+    def _take(self):
+        with self._lock:
+            batch = list(self._buffer)
+            self._buffer.clear()
+        return batch
+
+    def drain(self) -> int:
+        """Scrie tot ce e în buffer; întoarce numărul de intrări scrise."""
+        batch = self._take()
+        if not batch:
+            self._rotate_if_stale()
+            return 0
+        done = 0
+        for start in range(0, len(batch), CHUNK_SIZE):
+            done += self._write_chunk(batch[start:start + CHUNK_SIZE])
+            # cedăm GIL-ul între bucăți, ca firele care servesc cereri să nu aștepte după scriitor
+            time.sleep(0)
+        return done
+
+    def _write_chunk(self, chunk) -> int:
+        lines = []
+        for ts, item in chunk:
+            try:
+                lines.append(self._serialize(ts, *item))
+            except Exception as e:
+                self.failed += 1
+                self.last_error = f"serializare: {e}"
+        if not lines:
+            return 0
+        data = ("\n".join(lines) + "\n").encode("utf-8")
+        try:
+            f = self._open_segment(len(data))
+            f.write(data)
+            f.flush()
+        except OSError as e:
+            self.failed += len(lines)
+            self.last_error = str(e)
+            self._close_segment()
+            return 0
+        self._segment_written += len(data)
+        self.written += len(lines)
+        return len(lines)
+
+    # ----------------- segmente -----------------
+    def _open_segment(self, incoming: int) -> gzip.GzipFile:
+        if self._file is not None and (
+            self._segment_written + incoming > self.segment_bytes
+            or time.time() - self._segment_started >= self.segment_seconds
+        ):
+            self._close_segment()
+        if self._file is None:
+            os.makedirs(self.directory, exist_ok=True)
+            now = time.time()
+            stamp = datetime.fromtimestamp(now, timezone.utc).strftime("%Y%m%dT%H%M%S")
+            path = os.path.join(self.directory, f"{self.prefix}-{stamp}-{os.getpid()}-{self.segments}.jsonl.gz")
+            self._file = gzip.open(path, "ab", compresslevel=6)
+            self._segment = path
+            self._segment_started = now
+            self._segment_written = 0
+            self.segments += 1
+        return self._file
+
+    def _rotate_if_stale(self) -> None:
+        if self._file is not None and time.time() - self._segment_started >= self.segment_seconds:
+            self._close_segment()
+
+    def _close_segment(self) -> None:
+        f, self._file = self._file, None
+        if f is None:
+            return
+        try:
+            f.close()
+            with open(self._segment, "rb") as raw:
+                os.fsync(raw.fileno())
+        except OSError as e:
+            self.last_error = str(e)
+
+    def close(self) -> None:
+        """Oprește scriitorul, scrie ce a rămas și închide segmentul curent."""
+        self._stop.set()
+        self._wake.set()
+        writer = self._writer
+        if writer is not None and writer is not threading.current_thread():
+            writer.join(timeout=10)
+        self.drain()
+        self._close_segment()
+
+    def stats(self) -> dict:
+        return {
+            "directory": self.directory,
+            "segment": self._segment,
+            "segments": self.segments,
+            "capacity": self.capacity,
+            "queued": len(self._buffer),
+            "recorded": self.recorded,
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "last_error": self.last_error,
+        }
@@ -1,24 +1,130 @@
 import json
 import os
-from typing import Optional, Dict, Any, List
+import threading
+import time
+from typing import Optional, Dict, Any, List, Tuple
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
 DATA_PATH = os.path.join(BASE_DIR, "data", "doctors.json")
 
+# cât de des verificăm (stat) dacă doctors.json s-a schimbat pe disc
+CHECK_INTERVAL = 2.0
+
+
 def _load_all() -> List[Dict[str, Any]]:
     if not os.path.exists(DATA_PATH):
         return []
     with open(DATA_PATH, "r", encoding="utf-8") as f:
         return json.load(f)
 
+
+def _file_signature() -> Optional[Tuple[int, int, int]]:
+    try:
+        st = os.stat(DATA_PATH)
+    except FileNotFoundError:
+        return None
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+class DoctorRegistry:
+    """
+    Registrul medicilor, ținut în memorie cu indexuri după id și pin_hash.
+    Se reconstruiește doar când doctors.json se schimbă (inode/mtime/mărime)
+    sau la `reload()` explicit; căutările nu ating discul.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._by_id: Dict[int, Dict[str, Any]] = {}
+        self._by_pin: Dict[str, Dict[str, Any]] = {}
+        self._signature = None
+        self._loaded = False
+        self._next_check = 0.0
+        self.hits = 0
+        self.misses = 0
+        self.reloads = 0
+
+    def reload(self) -> None:
+        with self._lock:
+            self._reload_locked()
+
+    def _reload_locked(self) -> None:
+        signature = _file_signature()
+        try:
+            doctors = _load_all()
+        except ValueError:
+            # fișier salvat pe jumătate: păstrăm indexul vechi și reîncercăm mai târziu
+            if not self._loaded:
+                raise
+            self._next_check = time.monotonic() + CHECK_INTERVAL
+            return
+        by_id: Dict[int, Dict[str, Any]] = {}
+        by_pin: Dict[str, Dict[str, Any]] = {}
+        for d in doctors:
+            # la duplicate câștigă prima intrare, ca la căutarea liniară
+            by_id.setdefault(d.get("id"), d)
+            if d.get("pin_hash"):
+                by_pin.setdefault(d["pin_hash"], d)
+        self._by_id = by_id
+        self._by_pin = by_pin
+        self._signature = signature
+        self._loaded = True
+        self._next_check = time.monotonic() + CHECK_INTERVAL
+        self.reloads += 1
+
+    def _ensure_fresh(self) -> None:
+        now = time.monotonic()
+        if self._loaded and now < self._next_check:
+            return
+        with self._lock:
+            if self._loaded and now < self._next_check:
+                return
+            if not self._loaded or _file_signature() != self._signature:
+                self._reload_locked()
+            else:
+                self._next_check = now + CHECK_INTERVAL
+
+    def _count(self, found: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        # apelat din firele threadpool-ului: `+=` nu e atomic
+        with self._lock:
+            if found is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return found
+
+    def get_by_id(self, doc_id: int) -> Optional[Dict[str, Any]]:
+        self._ensure_fresh()
+        return self._count(self._by_id.get(doc_id))
+
+    def find_by_pin_hash(self, pin_hash: str) -> Optional[Dict[str, Any]]:
+        self._ensure_fresh()
+        return self._count(self._by_pin.get(pin_hash))
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "doctors": len(self._by_id),
+                "hits": self.hits,
+                "misses": self.misses,
+                "reloads": self.reloads,
+            }
+
+
+_REGISTRY = DoctorRegistry()
+
+
 def get_by_id(doc_id: int) -> Optional[Dict[str, Any]]:
-    for d in _load_all():
-        if d.get("id") == doc_id:
-            return d
-    return None
+    return _REGISTRY.get_by_id(doc_id)
+
 
 def find_by_pin_hash(pin_hash: str) -> Optional[Dict[str, Any]]:
-    for d in _load_all():
-        if d.get("pin_hash") == pin_hash:
-            return d
-    return None
+    return _REGISTRY.find_by_pin_hash(pin_hash)
+
+
+def reload() -> None:
+    _REGISTRY.reload()
+
+
+def stats() -> Dict[str, int]:
+    return _REGISTRY.stats()
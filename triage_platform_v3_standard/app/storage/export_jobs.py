@@ -0,0 +1,171 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+# lângă cache-ul de PDF-uri (evacuarea atinge doar fișierele externare_*.pdf)
+EXPORT_JOBS_DB = os.path.join(BASE_DIR, "data", "exports", "jobs.db")
+
+# un job care nu mai dă semne de viață de atâta timp a rămas de la un worker oprit
+JOB_STALE = int(os.environ.get("TRIAGE_PDF_JOB_STALE", 15 * 60))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id      TEXT PRIMARY KEY,
+    status      TEXT NOT NULL,
+    error       TEXT,
+    owner       TEXT NOT NULL,
+    created_at  REAL NOT NULL,
+    updated_at  REAL NOT NULL,
+    finished_at REAL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status, updated_at);
+
+-- progresul exporturilor în masă (documentul întors de GET .../bulk/{id})
+CREATE TABLE IF NOT EXISTS bulk_exports (
+    export_id   TEXT PRIMARY KEY,
+    progress    TEXT NOT NULL,
+    started_at  REAL NOT NULL,
+    finished_at REAL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_bulk_exports_finished ON bulk_exports(finished_at);
+"""
+
+
+class ExportJobStore:
+    """
+    Starea joburilor de randare (în așteptare, în lucru, eșuate) și progresul
+    exporturilor în masă, comune tuturor workerilor: un job sau un export
+    pornit pe un worker poate fi urmărit de pe oricare altul. Joburile
+    terminate nu sunt ținute aici, se recunosc după fișierul din cache.
+    Fiecare fir are propria conexiune SQLite (WAL).
+    """
+
+    def __init__(self, path: str = EXPORT_JOBS_DB, stale_after: int = JOB_STALE):
+        self.path = path
+        self.stale_after = stale_after
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(_SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10.0, isolation_level=None, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, job_id: str) -> Optional[dict]:
+        row = self._conn().execute(
+            "SELECT status, error, created_at, updated_at, finished_at FROM jobs WHERE job_id = ?", (job_id,)
+        ).fetchone()
+        return dict(row) if row else None
+
+    def claim(self, job_id: str, owner: str) -> bool:
+        """
+        Înregistrează jobul ca „queued” pentru `owner`. Reușește doar dacă
+        jobul nu există, a eșuat sau a fost abandonat; altfel îl randează
+        deja alt worker (sau fir) și nu trebuie pornit a doua oară.
+        """
+        now = time.time()
+        cur = self._conn().execute(
+            "INSERT INTO jobs (job_id, status, owner, created_at, updated_at) VALUES (?, 'queued', ?, ?, ?)"
+            " ON CONFLICT(job_id) DO UPDATE SET status = 'queued', error = NULL, owner = excluded.owner,"
+            " created_at = excluded.created_at, updated_at = excluded.updated_at, finished_at = NULL"
+            " WHERE jobs.status = 'failed' OR jobs.updated_at < ?",
+            (job_id, owner, now, now, now - self.stale_after),
+        )
+        return cur.rowcount > 0
+
+    def set_status(self, job_id: str, owner: str, status: str, error: Optional[str] = None) -> None:
+        """Actualizează jobul (și semnul de viață), doar dacă îi aparține încă lui `owner`."""
+        now = time.time()
+        self._conn().execute(
+            "UPDATE jobs SET status = ?, error = ?, updated_at = ?, finished_at = ? WHERE job_id = ? AND owner = ?",
+            (status, error, now, now if status == "failed" else None, job_id, owner),
+        )
+
+    def touch(self, job_id: str, owner: str) -> None:
+        self._conn().execute(
+            "UPDATE jobs SET updated_at = ? WHERE job_id = ? AND owner = ?", (time.time(), job_id, owner)
+        )
+
+    def finish(self, job_id: str, owner: str) -> None:
+        # rezultatul e în cache; rândul nu mai e necesar
+        self._conn().execute("DELETE FROM jobs WHERE job_id = ? AND owner = ?", (job_id, owner))
+
+    def pending(self) -> int:
+        """Joburile în așteptare sau în lucru, la toți workerii (fără cele abandonate)."""
+        return self._conn().execute(
+            "SELECT COUNT(*) FROM jobs WHERE status != 'failed' AND updated_at >= ?",
+            (time.time() - self.stale_after,),
+        ).fetchone()[0]
+
+    def count(self) -> int:
+        return self._conn().execute("SELECT COUNT(*) FROM jobs").fetchone()[0]
+
+    def prune(self, max_tracked: int) -> int:
+        """Păstrează cel mult `max_tracked` joburi: șterge întâi cele eșuate, cele mai vechi primele."""
+        excess = self.count() - max_tracked
+        if excess <= 0:
+            return 0
+        cur = self._conn().execute(
+            "DELETE FROM jobs WHERE job_id IN ("
+            " SELECT job_id FROM jobs WHERE status = 'failed' ORDER BY finished_at LIMIT ?)",
+            (excess,),
+        )
+        return cur.rowcount
+
+    # ----------------- exporturi în masă -----------------
+    def save_export(self, progress: dict) -> None:
+        self._conn().execute(
+            "INSERT OR REPLACE INTO bulk_exports (export_id, progress, started_at, finished_at) VALUES (?, ?, ?, ?)",
+            (progress["export_id"], json.dumps(progress, ensure_ascii=False),
+             progress["started_at"], progress.get("finished_at")),
+        )
+
+    def get_export(self, export_id: str) -> Optional[dict]:
+        row = self._conn().execute(
+            "SELECT progress FROM bulk_exports WHERE export_id = ?", (export_id,)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def running_exports(self, abandoned_after: float) -> int:
+        return self._conn().execute(
+            "SELECT COUNT(*) FROM bulk_exports WHERE finished_at IS NULL AND started_at >= ?",
+            (time.time() - abandoned_after,),
+        ).fetchone()[0]
+
+    def prune_exports(self, max_tracked: int, abandoned_after: float) -> int:
+        """
+        Șterge exporturile neterminate de mai mult de `abandoned_after` secunde
+        (workerul lor s-a oprit), apoi pe cele terminate, cele mai vechi
+        primele, până rămân cel mult `max_tracked`.
+        """
+        conn = self._conn()
+        removed = conn.execute(
+            "DELETE FROM bulk_exports WHERE finished_at IS NULL AND started_at < ?",
+            (time.time() - abandoned_after,),
+        ).rowcount
+        excess = conn.execute("SELECT COUNT(*) FROM bulk_exports").fetchone()[0] - max_tracked
+        if excess > 0:
+            removed += conn.execute(
+                "DELETE FROM bulk_exports WHERE export_id IN ("
+                " SELECT export_id FROM bulk_exports WHERE finished_at IS NOT NULL ORDER BY finished_at LIMIT ?)",
+                (excess,),
+            ).rowcount
+        return removed
+
+
+def create_job_store() -> ExportJobStore:
+    return ExportJobStore(os.environ.get("TRIAGE_EXPORT_JOBS_DB", EXPORT_JOBS_DB))
+
+
+export_jobs = create_job_store()
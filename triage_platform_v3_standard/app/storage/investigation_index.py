@@ -0,0 +1,392 @@
+import os
+import re
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from ..services.pdf_pool import PoolSaturated, RenderPool, render_pool
+from ..services.pdf_text import extract_document
+from .attachment_store import TS_FORMAT, AttachmentStore, attachment_store, stored_name_for
+
+BASE_DIR = Path(__file__).resolve().parents[2]
+SEARCH_DB = str(BASE_DIR / "data" / "investigations_index.db")
+
+# câte pagini / caractere dintr-o investigație intră în index
+MAX_PAGES = int(os.environ.get("TRIAGE_SEARCH_MAX_PAGES", 200))
+MAX_CHARS = int(os.environ.get("TRIAGE_SEARCH_MAX_CHARS", 1_000_000))
+
+# rowid-ul unei pagini în FTS = id_document * PAGE_SLOTS + pagina
+# (ștergerea unui document e un interval de rowid, nu o scanare a indexului)
+PAGE_SLOTS = 10000
+
+# câți termeni din interogare folosim
+MAX_TERMS = 12
+
+# o revendicare mai veche de atât a rămas de la un worker oprit în timpul indexării
+CLAIM_STALE = int(os.environ.get("TRIAGE_SEARCH_CLAIM_STALE", 10 * 60))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id            INTEGER PRIMARY KEY,
+    sha256        TEXT NOT NULL UNIQUE,
+    original_name TEXT,
+    uploader      TEXT,
+    uploaded_at   TEXT,
+    page_count    INTEGER,
+    chars         INTEGER NOT NULL DEFAULT 0,
+    indexed_at    TEXT NOT NULL,
+    error         TEXT
+);
+
+-- o linie per pagină; diacriticele sunt ignorate la căutare ("troponina" = "troponină")
+CREATE VIRTUAL TABLE IF NOT EXISTS pages USING fts5(
+    text,
+    name,
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+
+-- documentul pe care îl indexează acum un worker (ceilalți îl sar)
+CREATE TABLE IF NOT EXISTS claims (
+    sha256     TEXT PRIMARY KEY,
+    owner      TEXT NOT NULL,
+    claimed_at REAL NOT NULL
+) WITHOUT ROWID;
+"""
+
+_TERM = re.compile(r"\w+", re.UNICODE)
+
+
+def fts_query(q: str) -> Optional[str]:
+    """
+    Textul introdus de medic -> interogare FTS5: fiecare cuvânt e căutat ca
+    prefix ("tropon" găsește "troponina"), toate cuvintele trebuie să apară.
+    Ghilimelele evită interpretarea operatorilor FTS (AND, NEAR, "-", ...).
+    """
+    terms = _TERM.findall((q or "").lower())[:MAX_TERMS]
+    if not terms:
+        return None
+    return " ".join(f'"{t}"*' for t in terms)
+
+
+class InvestigationIndex:
+    """
+    Index full-text (SQLite FTS5, pe disc) peste investigațiile încărcate.
+
+    Upload-ul doar pune blob-ul nou în coadă (ascultător pe store-ul de
+    atașamente); un fir de fundal trimite extragerea textului (PyPDF2) în
+    pool-ul de randare, când are un proces liber, și scrie rezultatul în index
+    împreună cu metadatele (nume original, cine l-a încărcat, când). Blob-urile
+    șterse la GC ies din index tot prin coadă, ca toate scrierile să vină din
+    același fir.
+
+    Cu mai mulți workeri, fiecare rulează `backfill` la pornire: înainte de
+    extragere, documentul e revendicat în tabela `claims`, deci e extras o
+    singură dată; ceilalți îl sar. Întârzierea indexării (cât așteaptă cel
+    mai vechi upload din coadă) apare în `stats()`.
+    """
+
+    def __init__(self, db_path: str, store: AttachmentStore, pool: Optional[RenderPool] = None,
+                 claim_stale: int = CLAIM_STALE):
+        self.path = db_path
+        self.store = store
+        self.pool = pool
+        self.claim_stale = claim_stale
+        # identitatea acestui worker în tabela `claims`
+        self.owner = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(_SCHEMA)
+
+        # sha256 -> (eveniment, meta, momentul intrării în coadă)
+        self._queue: "OrderedDict[str, Tuple[str, dict, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._worker: Optional[threading.Thread] = None
+        self._current_since: Optional[float] = None
+
+        self.indexed = 0
+        self.removed = 0
+        self.failed = 0
+        # documente lăsate altui worker (revendicate de el sau deja indexate)
+        self.skipped = 0
+        self.last_lag: Optional[float] = None
+        self.max_lag = 0.0
+        self.last_error: Optional[str] = None
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10.0, isolation_level=None, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    # ----------------- coada (calea upload-ului) -----------------
+    def on_attachment(self, event: str, meta: dict) -> None:
+        """Ascultătorul înregistrat în store-ul de atașamente."""
+        if event == "added" and not meta.get("valid"):
+            return
+        self._enqueue(event, meta)
+
+    def _enqueue(self, event: str, meta: dict, since: Optional[float] = None) -> None:
+        with self._lock:
+            # un blob adăugat și șters înainte de indexare: rămâne doar ultimul eveniment
+            self._queue.pop(meta["sha256"], None)
+            self._queue[meta["sha256"]] = (event, meta, since or time.time())
+        if self._worker is None:
+            self._start_worker()
+        self._wake.set()
+
+    def backfill(self) -> int:
+        """
+        La pornire: pune în coadă blob-urile valide neindexate (upload-uri din
+        timpul unei opriri, index nou) și scoate documentele fără blob.
+        """
+        known = {r["sha256"] for r in self._conn().execute("SELECT sha256 FROM documents")}
+        blobs = {b["sha256"]: b for b in self.store.list_blobs() if b["valid"]}
+        queued = 0
+        for sha, meta in blobs.items():
+            if sha not in known:
+                self._enqueue("added", meta)
+                queued += 1
+        for sha in known - blobs.keys():
+            self._enqueue("removed", {"sha256": sha})
+        return queued
+
+    # ----------------- firul de indexare -----------------
+    def _start_worker(self) -> None:
+        with self._lock:
+            if self._worker is not None:
+                return
+            self._worker = threading.Thread(target=self._work_loop, name="investigation-indexer", daemon=True)
+            self._worker.start()
+
+    def _take(self) -> Optional[Tuple[str, dict, float]]:
+        with self._lock:
+            if not self._queue:
+                return None
+            _, item = self._queue.popitem(last=False)
+            self._current_since = item[2]
+            return item
+
+    def _work_loop(self) -> None:
+        while not self._stop.is_set():
+            item = self._take()
+            if item is None:
+                self._wake.wait(1.0)
+                self._wake.clear()
+                continue
+            event, meta, since = item
+            try:
+                if event == "added":
+                    if not self._index(meta):
+                        continue
+                    lag = time.time() - since
+                    self.last_lag = lag
+                    self.max_lag = max(self.max_lag, lag)
+                else:
+                    self._remove(meta["sha256"])
+            except Exception as e:
+                self.failed += 1
+                self.last_error = f"{meta['sha256'][:12]}: {type(e).__name__}: {e}"[:200]
+            finally:
+                self._current_since = None
+
+    def _claim(self, sha: str) -> bool:
+        """
+        Revendică documentul pentru acest worker. Nu reușește dacă e deja
+        indexat sau dacă îl indexează alt worker (revendicare nu mai veche
+        de `claim_stale`).
+        """
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if conn.execute("SELECT 1 FROM documents WHERE sha256 = ?", (sha,)).fetchone():
+                claimed = False
+            else:
+                now = time.time()
+                claimed = conn.execute(
+                    "INSERT INTO claims (sha256, owner, claimed_at) VALUES (?, ?, ?)"
+                    " ON CONFLICT(sha256) DO UPDATE SET owner = excluded.owner, claimed_at = excluded.claimed_at"
+                    " WHERE claims.owner = excluded.owner OR claims.claimed_at < ?",
+                    (sha, self.owner, now, now - self.claim_stale),
+                ).rowcount > 0
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return claimed
+
+    def _release(self, sha: str) -> None:
+        self._conn().execute("DELETE FROM claims WHERE sha256 = ? AND owner = ?", (sha, self.owner))
+
+    def _extract(self, sha: str) -> List[str]:
+        args = (str(self.store.blob_path(sha)), MAX_PAGES, MAX_CHARS)
+        if self.pool is None:
+            return extract_document(*args)[0]
+        while True:
+            try:
+                return self.pool.run_background(extract_document, *args)
+            except PoolSaturated as e:
+                # randările cerute de medici au prioritate
+                if self._stop.wait(min(e.retry_after, 5)):
+                    raise
+
+    def _index(self, meta: dict) -> bool:
+        sha = meta["sha256"]
+        if not self._claim(sha):
+            self.skipped += 1
+            return False
+        try:
+            return self._index_claimed(sha, meta)
+        finally:
+            self._release(sha)
+
+    def _index_claimed(self, sha: str, meta: dict) -> bool:
+        texts: List[str] = []
+        error = None
+        try:
+            texts = self._extract(sha)
+        except FileNotFoundError:
+            # șters între timp (GC)
+            return False
+        except PoolSaturated:
+            # oprire în timp ce pool-ul era ocupat: reluat de `backfill` la pornire
+            return False
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"[:200]
+            self.failed += 1
+            self.last_error = f"{sha[:12]}: {error}"
+
+        name = meta.get("original_name") or ""
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            doc_id = self._delete_locked(conn, sha)
+            cur = conn.execute(
+                "INSERT INTO documents"
+                " (id, sha256, original_name, uploader, uploaded_at, page_count, chars, indexed_at, error)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (doc_id, sha, name, meta.get("uploader"), meta.get("first_seen"), meta.get("page_count"),
+                 sum(map(len, texts)), datetime.now().strftime(TS_FORMAT), error),
+            )
+            doc_id = cur.lastrowid
+            # și investigațiile fără text (scanate) se găsesc după nume
+            rows = [(doc_id * PAGE_SLOTS + i, text, name) for i, text in enumerate(texts or [""])]
+            conn.executemany("INSERT INTO pages (rowid, text, name) VALUES (?, ?, ?)", rows)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        self.indexed += 1
+        return True
+
+    def _delete_locked(self, conn: sqlite3.Connection, sha: str) -> Optional[int]:
+        row = conn.execute("SELECT id FROM documents WHERE sha256 = ?", (sha,)).fetchone()
+        if row is None:
+            return None
+        doc_id = row["id"]
+        conn.execute(
+            "DELETE FROM pages WHERE rowid BETWEEN ? AND ?",
+            (doc_id * PAGE_SLOTS, doc_id * PAGE_SLOTS + PAGE_SLOTS - 1),
+        )
+        conn.execute("DELETE FROM documents WHERE id = ?", (doc_id,))
+        return doc_id
+
+    def _remove(self, sha: str) -> None:
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if self._delete_locked(conn, sha) is not None:
+                self.removed += 1
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def close(self) -> None:
+        """Oprește firul; ce a rămas în coadă e reluat de `backfill` la pornire."""
+        self._stop.set()
+        self._wake.set()
+        worker = self._worker
+        if worker is not None and worker is not threading.current_thread():
+            worker.join(timeout=10)
+
+    # ----------------- căutare -----------------
+    def search(self, q: str, limit: int = 20, days: Optional[int] = None) -> List[dict]:
+        """
+        Investigațiile care conțin toți termenii, ordonate după relevanță
+        (BM25; potrivirile în nume cântăresc mai mult). Pentru fiecare,
+        paginile găsite cu un fragment de text (termenii între « »).
+        """
+        match = fts_query(q)
+        if match is None:
+            return []
+        since = (datetime.now() - timedelta(days=days)).strftime(TS_FORMAT) if days else ""
+        rows = self._conn().execute(
+            "SELECT d.*, pages.rowid % ? AS page, bm25(pages, 1.0, 4.0) AS score,"
+            " snippet(pages, 0, '«', '»', '…', 16) AS snippet"
+            " FROM pages JOIN documents d ON d.id = pages.rowid / ?"
+            " WHERE pages MATCH ? AND COALESCE(d.uploaded_at, '') >= ?"
+            " ORDER BY score LIMIT ?",
+            (PAGE_SLOTS, PAGE_SLOTS, match, since, limit * 5),
+        ).fetchall()
+
+        results: "OrderedDict[str, dict]" = OrderedDict()
+        for r in rows:
+            doc = results.get(r["sha256"])
+            if doc is None:
+                if len(results) >= limit:
+                    continue
+                doc = results[r["sha256"]] = {
+                    "stored_name": stored_name_for(r["sha256"]),
+                    "sha256": r["sha256"],
+                    "original_name": r["original_name"],
+                    "uploader": r["uploader"],
+                    "uploaded_at": r["uploaded_at"],
+                    "page_count": r["page_count"],
+                    "score": round(-r["score"], 3),
+                    "hits": [],
+                }
+            doc["hits"].append({"page": r["page"] + 1, "snippet": r["snippet"]})
+        return list(results.values())
+
+    def stats(self) -> dict:
+        with self._lock:
+            pending = len(self._queue)
+            oldest = next(iter(self._queue.values()))[2] if self._queue else None
+        current = self._current_since
+        if current is not None and (oldest is None or current < oldest):
+            oldest = current
+        row = self._conn().execute("SELECT COUNT(*) AS n, COALESCE(SUM(chars), 0) AS chars FROM documents").fetchone()
+        return {
+            "documents": row["n"],
+            "chars": row["chars"],
+            "pending": pending + (1 if current is not None else 0),
+            "lag_seconds": round(time.time() - oldest, 3) if oldest is not None else 0.0,
+            "last_lag_seconds": round(self.last_lag, 3) if self.last_lag is not None else None,
+            "max_lag_seconds": round(self.max_lag, 3),
+            "indexed": self.indexed,
+            "removed": self.removed,
+            "failed": self.failed,
+            "skipped": self.skipped,
+            "last_error": self.last_error,
+        }
+
+
+def create_index() -> InvestigationIndex:
+    index = InvestigationIndex(os.environ.get("TRIAGE_SEARCH_DB", SEARCH_DB), attachment_store, render_pool)
+    attachment_store.add_listener(index.on_attachment)
+    return index
+
+
+investigation_index = create_index()
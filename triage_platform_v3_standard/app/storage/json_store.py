@@ -1,30 +1,80 @@
 import json
+import sys
 from pathlib import Path
-from datetime import datetime
+from typing import Any, Iterator, List, Optional, Tuple
 
+from .record_log import RecordLog
+
+# formatul vechi (un singur document JSON), importat o dată în jurnal
 DB_PATH = Path("data/db.json")
+LOG_PATH = Path("data/db.jsonl")
+
+COLLECTIONS = ("patients", "admissions")
 
 def _empty_db():
     return {"patients": {}, "admissions": {}, "last_ids": {"patients": 0, "admissions": 0}}
 
-def load_db():
+def _load_legacy() -> Optional[dict]:
     if not DB_PATH.exists():
-        DB_PATH.parent.mkdir(parents=True, exist_ok=True)
-        db = _empty_db()
-        save_db(db)
-        return db
+        return None
     with DB_PATH.open("r", encoding="utf-8") as f:
         return json.load(f)
 
-def save_db(db: dict):
-    with DB_PATH.open("w", encoding="utf-8") as f:
-        json.dump(db, f, ensure_ascii=False, indent=2, default=_json_default)
+_LOG = RecordLog(str(LOG_PATH), legacy_loader=_load_legacy)
+
+# 🔹 API-ul vechi: documentul întreg (scrie doar înregistrările modificate)
+def load_db():
+    db = _LOG.load(COLLECTIONS)
+    for key, value in _empty_db()["last_ids"].items():
+        db["last_ids"].setdefault(key, value)
+    return db
 
-def _json_default(obj):
-    if isinstance(obj, datetime):
-        return obj.isoformat()
-    return str(obj)
+def save_db(db: dict):
+    _LOG.save(db)
 
 def get_next_id(db: dict, key: str) -> str:
-    db["last_ids"][key] += 1
-    return str(db["last_ids"][key])
+    # secvența e alocată atomic în jurnal; dict-ul e actualizat pentru compatibilitate
+    n = _LOG.next_id(key)
+    db.setdefault("last_ids", {})[key] = n
+    return str(n)
+
+# 🔹 API pe înregistrări: citirea/scrierea atinge doar înregistrarea respectivă
+def get_record(collection: str, record_id: str) -> Optional[Any]:
+    return _LOG.get(collection, record_id)
+
+def put_record(collection: str, record_id: str, value: Any) -> None:
+    _LOG.put(collection, record_id, value)
+
+def put_record_if_absent(collection: str, record_id: str, value: Any) -> Optional[Any]:
+    return _LOG.put_if_absent(collection, record_id, value)
+
+def delete_record(collection: str, record_id: str) -> bool:
+    return _LOG.delete(collection, record_id)
+
+def list_ids(collection: str) -> List[str]:
+    return _LOG.ids(collection)
+
+def iter_records(collection: str) -> Iterator[Tuple[str, Any]]:
+    return _LOG.iter_records(collection)
+
+def next_id(key: str) -> str:
+    return str(_LOG.next_id(key))
+
+# 🔹 Versiunea jurnalului, pentru indexurile în memorie ale fiecărui worker
+def position() -> Tuple[int, int]:
+    return _LOG.position()
+
+def changes_since(collection: str, position: Tuple[int, int]) -> Optional[Tuple[Tuple[int, int], List[Tuple[str, Any]]]]:
+    return _LOG.changes_since(collection, position)
+
+def compact() -> Tuple[int, int]:
+    return _LOG.compact()
+
+
+# 🔹 Compactare offline: python -m app.storage.json_store compact
+if __name__ == "__main__":
+    if sys.argv[1:] != ["compact"]:
+        print("Utilizare: python -m app.storage.json_store compact")
+        sys.exit(2)
+    before, after = compact()
+    print(f"{LOG_PATH}: {before} -> {after} octeți")
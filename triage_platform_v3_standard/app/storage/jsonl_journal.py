@@ -0,0 +1,293 @@
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from .file_lock import FileLock
+
+
+def _fsync_dir(path: str) -> None:
+    # pe POSIX, redenumirile devin durabile doar după fsync pe director
+    if os.name != "posix":
+        return
+    fd = os.open(os.path.dirname(path) or ".", os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _parse_lines(raw: bytes) -> List[Dict[str, Any]]:
+    rows = []
+    for line in raw.splitlines():
+        if not line.strip():
+            continue
+        try:
+            rows.append(json.loads(line))
+        except ValueError:
+            # ultima linie poate fi incompletă după o oprire bruscă
+            continue
+    return rows
+
+
+class JsonlJournal:
+    """
+    Jurnal append-only (JSON Lines) cu snapshot periodic.
+
+    - `append` scrie o singură linie, sub un lock între procese, deci costul
+      nu crește cu istoricul și workerii nu își pierd intrările unul altuia;
+    - fsync-ul se face pe loturi (la `fsync_batch` scrieri sau la cel mult
+      `fsync_interval` secunde, dintr-un fir de fundal);
+    - când jurnalul depășește `compact_bytes`, conținutul e compactat în
+      snapshot și jurnalul e înlocuit cu unul gol;
+    - la prima pornire, un fișier JSON vechi (array) e importat în snapshot.
+    """
+
+    def __init__(
+        self,
+        journal_path: str,
+        snapshot_path: str,
+        legacy_path: Optional[str] = None,
+        fsync_interval: float = 0.5,
+        fsync_batch: int = 32,
+        compact_bytes: int = 4 * 1024 * 1024,
+    ):
+        self.journal_path = journal_path
+        self.snapshot_path = snapshot_path
+        self.legacy_path = legacy_path
+        self.fsync_interval = fsync_interval
+        self.fsync_batch = fsync_batch
+        self.compact_bytes = compact_bytes
+
+        self._lock = FileLock(journal_path + ".lock")
+        self._fd: Optional[int] = None
+        self._ino: Optional[int] = None
+        self._pending = 0
+        self._prepared = False
+        self._flusher: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    # ----------------- migrare + deschidere -----------------
+    def _prepare(self) -> None:
+        """Migrarea unică din formatul vechi (apelată sub lock)."""
+        if self._prepared:
+            return
+        os.makedirs(os.path.dirname(self.journal_path) or ".", exist_ok=True)
+        if (
+            self.legacy_path
+            and os.path.exists(self.legacy_path)
+            and not os.path.exists(self.snapshot_path)
+            and not os.path.exists(self.journal_path)
+        ):
+            try:
+                with open(self.legacy_path, "r", encoding="utf-8") as f:
+                    rows = json.load(f)
+                if not isinstance(rows, list):
+                    rows = []
+            except Exception:
+                rows = []
+            self._write_snapshot(rows, None, 0)
+        self._prepared = True
+
+    def _ensure_fd(self) -> int:
+        """Redeschide jurnalul dacă alt proces l-a înlocuit (compactare)."""
+        try:
+            ino = os.stat(self.journal_path).st_ino
+        except FileNotFoundError:
+            ino = None
+        if self._fd is None or ino != self._ino:
+            self._close_fd()
+            flags = os.O_RDWR | os.O_APPEND | os.O_CREAT | getattr(os, "O_BINARY", 0)
+            self._fd = os.open(self.journal_path, flags, 0o644)
+            self._ino = os.fstat(self._fd).st_ino
+        return self._fd
+
+    @staticmethod
+    def _repair_tail(fd: int) -> None:
+        """
+        Taie o linie incompletă de la finalul jurnalului (apelată sub lock, deci
+        nu poate fi o scriere în curs, doar rămășița unei opriri bruște).
+        Altfel următoarea linie s-ar lipi de ea și s-ar pierde la citire.
+        """
+        size = os.fstat(fd).st_size
+        if not size:
+            return
+        os.lseek(fd, size - 1, os.SEEK_SET)
+        if os.read(fd, 1) == b"\n":
+            return
+        end = size
+        while end > 0:
+            start = max(0, end - 4096)
+            os.lseek(fd, start, os.SEEK_SET)
+            nl = os.read(fd, end - start).rfind(b"\n")
+            if nl >= 0:
+                os.ftruncate(fd, start + nl + 1)
+                return
+            end = start
+        os.ftruncate(fd, 0)
+
+    def _close_fd(self) -> None:
+        if self._fd is not None:
+            if self._pending:
+                os.fsync(self._fd)
+                self._pending = 0
+            os.close(self._fd)
+            self._fd = None
+            self._ino = None
+
+    # ----------------- scriere -----------------
+    def append(self, entry: Dict[str, Any]) -> None:
+        data = (json.dumps(entry, ensure_ascii=False) + "\n").encode("utf-8")
+        with self._lock.hold():
+            self._prepare()
+            fd = self._ensure_fd()
+            self._repair_tail(fd)
+            view = memoryview(data)
+            while view:
+                written = os.write(fd, view)
+                view = view[written:]
+            self._pending += 1
+            if self._pending >= self.fsync_batch:
+                os.fsync(fd)
+                self._pending = 0
+            size = os.fstat(fd).st_size
+        self._start_flusher()
+        if size >= self.compact_bytes:
+            self.compact()
+
+    def flush(self) -> None:
+        with self._lock.hold():
+            if self._fd is not None and self._pending:
+                os.fsync(self._fd)
+                self._pending = 0
+
+    def _start_flusher(self) -> None:
+        if self._flusher is not None:
+            return
+        self._flusher = threading.Thread(target=self._flush_loop, name="jsonl-journal-fsync", daemon=True)
+        self._flusher.start()
+
+    def _flush_loop(self) -> None:
+        while not self._stop.wait(self.fsync_interval):
+            if self._pending:
+                try:
+                    self.flush()
+                except OSError:
+                    pass
+
+    def close(self) -> None:
+        self._stop.set()
+        with self._lock.hold():
+            self._close_fd()
+
+    # ----------------- citire -----------------
+    def _read_snapshot(self) -> Tuple[List[Dict[str, Any]], Optional[int], int]:
+        if not os.path.exists(self.snapshot_path):
+            return [], None, 0
+        with open(self.snapshot_path, "rb") as f:
+            header = f.readline()
+            rows = _parse_lines(f.read())
+        try:
+            meta = json.loads(header).get("_snapshot", {})
+        except (ValueError, AttributeError):
+            meta = {}
+        return rows, meta.get("journal_ino"), meta.get("journal_size", 0)
+
+    def _load_unlocked(self) -> Tuple[List[Dict[str, Any]], Tuple[Optional[int], int]]:
+        rows, absorbed_ino, absorbed_size = self._read_snapshot()
+        position: Tuple[Optional[int], int] = (None, 0)
+        if os.path.exists(self.journal_path):
+            with open(self.journal_path, "rb") as f:
+                ino = os.fstat(f.fileno()).st_ino
+                # dacă s-a oprit între snapshot și înlocuirea jurnalului,
+                # sărim peste partea deja absorbită în snapshot
+                if absorbed_ino is not None and ino == absorbed_ino:
+                    f.seek(absorbed_size)
+                start = f.tell()
+                raw = f.read()
+                rows.extend(_parse_lines(raw))
+                # poziția rămâne la capăt de linie (o linie ruptă e tăiată la următorul append)
+                position = (ino, start + raw.rfind(b"\n") + 1)
+        return rows, position
+
+    def load(self) -> List[Dict[str, Any]]:
+        return self.load_with_position()[0]
+
+    def load_with_position(self) -> Tuple[List[Dict[str, Any]], Tuple[Optional[int], int]]:
+        """Conținutul complet plus (inode, offset) al jurnalului până unde a fost citit."""
+        with self._lock.hold():
+            self._prepare()
+            return self._load_unlocked()
+
+    def state(self) -> Tuple[Optional[int], int, Optional[int]]:
+        """
+        (inode jurnal, mărime jurnal, mtime snapshot): se schimbă la orice
+        append sau compactare, a oricărui worker. Doar stat, fără lock.
+        """
+        try:
+            st = os.stat(self.journal_path)
+            ino, size = st.st_ino, st.st_size
+        except FileNotFoundError:
+            ino, size = None, 0
+        try:
+            snapshot = os.stat(self.snapshot_path).st_mtime_ns
+        except FileNotFoundError:
+            snapshot = None
+        return ino, size, snapshot
+
+    def read_tail(self, ino: int, offset: int) -> Optional[Tuple[List[Dict[str, Any]], int]]:
+        """
+        Liniile complete adăugate după `offset` și noul offset. None dacă
+        jurnalul a fost înlocuit sau trunchiat între timp (trebuie reîncărcat tot).
+        """
+        try:
+            f = open(self.journal_path, "rb")
+        except FileNotFoundError:
+            return None
+        with f:
+            st = os.fstat(f.fileno())
+            if st.st_ino != ino or st.st_size < offset:
+                return None
+            f.seek(offset)
+            raw = f.read()
+        # o linie fără \n e o scriere în curs: o citim data viitoare
+        end = raw.rfind(b"\n") + 1
+        return _parse_lines(raw[:end]), offset + end
+
+    # ----------------- compactare -----------------
+    def _write_snapshot(self, rows: List[Dict[str, Any]], journal_ino: Optional[int], journal_size: int) -> None:
+        tmp = self.snapshot_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            header = {"_snapshot": {"journal_ino": journal_ino, "journal_size": journal_size, "ts": time.time()}}
+            f.write(json.dumps(header) + "\n")
+            for row in rows:
+                f.write(json.dumps(row, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.snapshot_path)
+        _fsync_dir(self.snapshot_path)
+
+    def compact(self) -> None:
+        """Mută tot conținutul în snapshot și pornește un jurnal gol."""
+        with self._lock.hold():
+            self._prepare()
+            if not os.path.exists(self.journal_path):
+                return
+            # (inode, mărime) din antetul snapshot-ului trebuie să cadă la capăt de linie
+            self._repair_tail(self._ensure_fd())
+            self._close_fd()
+            st = os.stat(self.journal_path)
+            rows = self._load_unlocked()[0]
+            self._write_snapshot(rows, st.st_ino, st.st_size)
+
+            tmp = self.journal_path + ".tmp"
+            open(tmp, "wb").close()
+            try:
+                os.replace(tmp, self.journal_path)
+            except OSError:
+                # pe Windows nu putem înlocui un fișier deschis de alt worker;
+                # snapshot-ul rămâne valid datorită (inode, mărime) din antet
+                os.remove(tmp)
+                return
+            _fsync_dir(self.journal_path)
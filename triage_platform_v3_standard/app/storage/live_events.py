@@ -0,0 +1,93 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+LIVE_DB = os.path.join(BASE_DIR, "data", "live_events.db")
+
+# câte evenimente păstrăm pentru clienții care se reconectează
+HISTORY_SIZE = 2000
+# ștergem istoricul vechi o dată la atâtea publicări
+TRIM_EVERY = 256
+
+
+class LiveEventLog:
+    """
+    Tabela de modificări comună tuturor workerilor (SQLite, WAL).
+
+    Numărul de secvență e cheia AUTOINCREMENT, deci un `Last-Event-ID` primit
+    de la un worker e valabil la oricare altul. Tabela păstrează ultimele
+    `history_size` evenimente; fiecare fir are propria conexiune.
+    """
+
+    def __init__(self, path: str = LIVE_DB, history_size: int = HISTORY_SIZE):
+        self.path = path
+        self.history_size = history_size
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS live_events ("
+            " seq  INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " type TEXT NOT NULL,"
+            " data TEXT,"
+            " ts   REAL NOT NULL"
+            ")"
+        )
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10.0, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def append(self, type: str, data: Any) -> int:
+        conn = self._conn()
+        cur = conn.execute(
+            "INSERT INTO live_events (type, data, ts) VALUES (?, ?, ?)",
+            (type, json.dumps(data, ensure_ascii=False, default=str), time.time()),
+        )
+        seq = cur.lastrowid
+        if seq % TRIM_EVERY == 0:
+            conn.execute("DELETE FROM live_events WHERE seq <= ?", (seq - self.history_size,))
+        return seq
+
+    def since(self, after: int, upto: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Evenimentele cu seq > after (și <= upto), în ordine."""
+        sql = "SELECT seq, type, data FROM live_events WHERE seq > ?"
+        args: List[Any] = [after]
+        if upto is not None:
+            sql += " AND seq <= ?"
+            args.append(upto)
+        rows = self._conn().execute(sql + " ORDER BY seq", args).fetchall()
+        return [{"seq": seq, "type": type, "data": json.loads(data)} for seq, type, data in rows]
+
+    def bounds(self) -> Tuple[int, int]:
+        """(cel mai vechi seq păstrat, ultimul seq); pentru tabela goală, (ultimul + 1, ultimul)."""
+        row = self._conn().execute("SELECT MIN(seq), MAX(seq) FROM live_events").fetchone()
+        if row[1] is None:
+            # după ștergeri, AUTOINCREMENT continuă de la ultima valoare folosită
+            last = self._conn().execute("SELECT seq FROM sqlite_sequence WHERE name = 'live_events'").fetchone()
+            n = last[0] if last else 0
+            return n + 1, n
+        return row[0], row[1]
+
+    def last_seq(self) -> int:
+        return self.bounds()[1]
+
+    def data_version(self) -> int:
+        # se schimbă când altă conexiune (alt fir sau alt worker) a scris în bază
+        return self._conn().execute("PRAGMA data_version").fetchone()[0]
+
+    def count(self) -> int:
+        return self._conn().execute("SELECT COUNT(*) FROM live_events").fetchone()[0]
+
+
+def create_event_log() -> LiveEventLog:
+    return LiveEventLog(os.environ.get("TRIAGE_LIVE_DB", LIVE_DB))
@@ -0,0 +1,350 @@
+import json
+import os
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+from .file_lock import FileLock
+
+
+def _json_default(obj):
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    return str(obj)
+
+
+def _dumps(obj: Any) -> str:
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=_json_default)
+
+
+def _fsync_dir(path: str) -> None:
+    if os.name != "posix":
+        return
+    fd = os.open(os.path.dirname(path) or ".", os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class LoadedDb(dict):
+    """
+    Documentul întors de `RecordLog.load()`: un dict obișnuit care ține minte
+    ce înregistrări (și în ce versiune) a văzut, ca `save()` să scrie doar
+    ce s-a schimbat de atunci și să nu șteargă ce au adăugat alți workeri.
+    """
+
+    seen: Dict[Tuple[str, str], int]
+
+
+class RecordLog:
+    """
+    Stocare append-only pentru colecții de înregistrări JSON (data/db.jsonl).
+
+    Fiecare linie e o versiune a unei înregistrări (`{"c", "id", "v"}`, cu
+    `v = null` pentru ștergere) sau o valoare de secvență (`{"seq", "n"}`).
+    În memorie ținem doar offset-ul și lungimea ultimei versiuni, deci o
+    citire e un singur seek + read, iar o scriere adaugă o linie, indiferent de
+    mărimea bazei. Toate operațiile se fac sub un lock între procese; liniile
+    scrise de alți workeri sunt citite incremental înainte de fiecare operație.
+    """
+
+    def __init__(self, path: str, legacy_loader: Optional[Callable[[], Optional[dict]]] = None):
+        self.path = path
+        self.legacy_loader = legacy_loader
+        self._lock = FileLock(path + ".lock")
+        self._fd: Optional[int] = None
+        self._ino: Optional[int] = None
+        self._end = 0
+        # colecție -> id -> (offset, lungime, hash al valorii)
+        self._index: Dict[str, Dict[str, Tuple[int, int, int]]] = {}
+        self._seqs: Dict[str, int] = {}
+
+    # ----------------- deschidere + sincronizare -----------------
+    def _open(self) -> None:
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        fresh = not os.path.exists(self.path)
+        # O_BINARY: pe Windows os.open deschide implicit în mod text
+        self._fd = os.open(self.path, os.O_RDWR | os.O_APPEND | os.O_CREAT | getattr(os, "O_BINARY", 0), 0o644)
+        self._ino = os.fstat(self._fd).st_ino
+        self._end = 0
+        self._index = {}
+        self._seqs = {}
+        if fresh and self.legacy_loader:
+            legacy = self.legacy_loader()
+            if legacy:
+                self._import(legacy)
+
+    def _import(self, db: dict) -> None:
+        lines = []
+        for collection, records in db.items():
+            if collection == "last_ids":
+                continue
+            for record_id, value in (records or {}).items():
+                lines.append({"c": collection, "id": str(record_id), "v": value})
+        for key, n in (db.get("last_ids") or {}).items():
+            lines.append({"seq": key, "n": int(n)})
+        self._append_lines(lines)
+
+    def _read_at(self, offset: int, length: int) -> bytes:
+        """
+        Citire de la un offset (apelată sub lock). seek + read în loc de
+        os.pread, care nu există pe Windows; scrierile sunt O_APPEND, deci
+        poziția descriptorului nu le afectează.
+        """
+        os.lseek(self._fd, offset, os.SEEK_SET)
+        chunks = []
+        while length > 0:
+            chunk = os.read(self._fd, length)
+            if not chunk:
+                break
+            chunks.append(chunk)
+            length -= len(chunk)
+        return b"".join(chunks)
+
+    def _sync(self) -> None:
+        """Aduce indexul la zi cu fișierul (apelată sub lock)."""
+        if self._fd is not None:
+            try:
+                st = os.stat(self.path)
+            except FileNotFoundError:
+                st = None
+            if st is None or st.st_ino != self._ino:
+                # fișierul a fost compactat (înlocuit) de alt proces
+                os.close(self._fd)
+                self._fd = None
+        if self._fd is None:
+            self._open()
+
+        size = os.fstat(self._fd).st_size
+        if size <= self._end:
+            return
+        raw = self._read_at(self._end, size - self._end)
+        pos = 0
+        while True:
+            nl = raw.find(b"\n", pos)
+            if nl < 0:
+                # linie incompletă (scriere în curs sau oprire bruscă): o reluăm data viitoare
+                break
+            self._apply(raw[pos:nl], self._end + pos)
+            pos = nl + 1
+        self._end += pos
+
+    def _apply(self, line: bytes, offset: int) -> None:
+        if not line.strip():
+            return
+        try:
+            entry = json.loads(line)
+        except ValueError:
+            return
+        if "seq" in entry:
+            self._seqs[entry["seq"]] = max(self._seqs.get(entry["seq"], 0), int(entry["n"]))
+            return
+        records = self._index.setdefault(entry["c"], {})
+        if entry.get("v") is None:
+            records.pop(entry["id"], None)
+        else:
+            records[entry["id"]] = (offset, len(line), hash(_dumps(entry["v"])))
+
+    def _append_lines(self, entries: List[dict]) -> None:
+        if not entries:
+            return
+        # sub lock, o linie incompletă la final nu poate fi o scriere în curs, ci doar
+        # rămășița unei opriri bruște: o tăiem, altfel linia nouă s-ar lipi de ea
+        # (offset-urile din index ar fi greșite, iar la recitire ambele s-ar pierde)
+        if os.fstat(self._fd).st_size > self._end:
+            os.ftruncate(self._fd, self._end)
+        chunks = [(_dumps(e) + "\n").encode("utf-8") for e in entries]
+        os.write(self._fd, b"".join(chunks))
+        os.fsync(self._fd)
+        offset = self._end
+        for entry, chunk in zip(entries, chunks):
+            self._apply(chunk[:-1], offset)
+            offset += len(chunk)
+        self._end = offset
+
+    # ----------------- API pe înregistrări -----------------
+    def get(self, collection: str, record_id: str) -> Optional[Any]:
+        with self._lock.hold():
+            self._sync()
+            loc = self._index.get(collection, {}).get(str(record_id))
+            if loc is None:
+                return None
+            raw = self._read_at(loc[0], loc[1])
+        return json.loads(raw)["v"]
+
+    def put(self, collection: str, record_id: str, value: Any) -> None:
+        with self._lock.hold():
+            self._sync()
+            self._append_lines([{"c": collection, "id": str(record_id), "v": value}])
+
+    def put_if_absent(self, collection: str, record_id: str, value: Any) -> Optional[Any]:
+        """Scrie doar dacă cheia nu există; altfel întoarce valoarea existentă (cheie unică între procese)."""
+        with self._lock.hold():
+            self._sync()
+            loc = self._index.get(collection, {}).get(str(record_id))
+            if loc is not None:
+                return json.loads(self._read_at(loc[0], loc[1]))["v"]
+            self._append_lines([{"c": collection, "id": str(record_id), "v": value}])
+            return None
+
+    def delete(self, collection: str, record_id: str) -> bool:
+        with self._lock.hold():
+            self._sync()
+            if str(record_id) not in self._index.get(collection, {}):
+                return False
+            self._append_lines([{"c": collection, "id": str(record_id), "v": None}])
+            return True
+
+    def ids(self, collection: str) -> List[str]:
+        with self._lock.hold():
+            self._sync()
+            return list(self._index.get(collection, {}))
+
+    def iter_records(self, collection: str) -> Iterator[Tuple[str, Any]]:
+        for record_id in self.ids(collection):
+            value = self.get(collection, record_id)
+            if value is not None:
+                yield record_id, value
+
+    def next_id(self, key: str) -> int:
+        """Următoarea valoare din secvența `key`, alocată atomic între procese."""
+        with self._lock.hold():
+            self._sync()
+            n = self._seqs.get(key, 0) + 1
+            self._append_lines([{"seq": key, "n": n}])
+            return n
+
+    def seqs(self) -> Dict[str, int]:
+        with self._lock.hold():
+            self._sync()
+            return dict(self._seqs)
+
+    # ----------------- modificări între workeri -----------------
+    def position(self) -> Tuple[int, int]:
+        """(inode, offset) al finalului jurnalului; se schimbă la orice scriere a oricărui worker."""
+        with self._lock.hold():
+            self._sync()
+            return self._ino, self._end
+
+    def changes_since(
+        self, collection: str, position: Tuple[int, int]
+    ) -> Optional[Tuple[Tuple[int, int], List[Tuple[str, Any]]]]:
+        """
+        Versiunile (id, valoare sau None la ștergere) scrise în `collection`
+        după `position`, în ordine, plus noua poziție. None dacă fișierul a
+        fost compactat între timp: apelantul trebuie să reîncarce tot.
+        """
+        with self._lock.hold():
+            self._sync()
+            ino, offset = position
+            if ino != self._ino or offset > self._end:
+                return None
+            changes = []
+            if offset < self._end:
+                for line in self._read_at(offset, self._end - offset).splitlines():
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue
+                    if entry.get("c") == collection:
+                        changes.append((entry["id"], entry.get("v")))
+            return (self._ino, self._end), changes
+
+    # ----------------- API pe document întreg (compatibilitate) -----------------
+    def load(self, collections: Tuple[str, ...] = ()) -> LoadedDb:
+        db = LoadedDb()
+        db.seen = {}
+        with self._lock.hold():
+            self._sync()
+            names = list(dict.fromkeys(list(collections) + list(self._index)))
+            for collection in names:
+                records = db[collection] = {}
+                for record_id, (offset, length, digest) in self._index.get(collection, {}).items():
+                    records[record_id] = json.loads(self._read_at(offset, length))["v"]
+                    db.seen[(collection, record_id)] = digest
+            db["last_ids"] = dict(self._seqs)
+        return db
+
+    def save(self, db: dict) -> int:
+        """
+        Scrie doar înregistrările schimbate față de versiunea încărcată.
+        Întoarce numărul de linii adăugate.
+        """
+        seen = getattr(db, "seen", None)
+        with self._lock.hold():
+            self._sync()
+            entries = []
+            present: Set[Tuple[str, str]] = set()
+            for collection, records in db.items():
+                if collection == "last_ids":
+                    continue
+                known = self._index.get(collection, {})
+                for record_id, value in (records or {}).items():
+                    record_id = str(record_id)
+                    present.add((collection, record_id))
+                    digest = hash(_dumps(value))
+                    baseline = seen.get((collection, record_id)) if seen is not None else None
+                    current = known.get(record_id)
+                    if digest == baseline or (current is not None and current[2] == digest):
+                        continue
+                    entries.append({"c": collection, "id": record_id, "v": value})
+
+            # ștergem doar ce exista la încărcare (sau tot ce lipsește, pentru un dict simplu)
+            if seen is not None:
+                removed = [k for k in seen if k not in present]
+            else:
+                removed = [
+                    (c, i) for c in db if c != "last_ids" for i in self._index.get(c, {}) if (c, i) not in present
+                ]
+            for collection, record_id in removed:
+                if record_id in self._index.get(collection, {}):
+                    entries.append({"c": collection, "id": record_id, "v": None})
+
+            for key, n in (db.get("last_ids") or {}).items():
+                # secvențele nu scad niciodată
+                if int(n) > self._seqs.get(key, 0):
+                    entries.append({"seq": key, "n": int(n)})
+
+            self._append_lines(entries)
+
+            if seen is not None:
+                for entry in entries:
+                    if "c" in entry:
+                        key = (entry["c"], entry["id"])
+                        if entry["v"] is None:
+                            seen.pop(key, None)
+                        else:
+                            seen[key] = self._index[entry["c"]][entry["id"]][2]
+            return len(entries)
+
+    # ----------------- compactare -----------------
+    def compact(self) -> Tuple[int, int]:
+        """
+        Rescrie fișierul doar cu ultima versiune a fiecărei înregistrări.
+        Întoarce (mărimea înainte, mărimea după), în octeți.
+        """
+        with self._lock.hold():
+            self._sync()
+            before = self._end
+            tmp = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp, "wb") as out:
+                for collection, records in self._index.items():
+                    for record_id, (offset, length, _) in records.items():
+                        out.write(self._read_at(offset, length) + b"\n")
+                for key, n in self._seqs.items():
+                    out.write((_dumps({"seq": key, "n": n}) + "\n").encode("utf-8"))
+                out.flush()
+                os.fsync(out.fileno())
+            os.replace(tmp, self.path)
+            _fsync_dir(self.path)
+            os.close(self._fd)
+            self._fd = None
+            self._sync()
+            return before, self._end
+
+    def close(self) -> None:
+        with self._lock.hold():
+            if self._fd is not None:
+                os.fsync(self._fd)
+                os.close(self._fd)
+                self._fd = None
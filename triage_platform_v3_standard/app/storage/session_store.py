@@ -0,0 +1,152 @@
+import abc
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Dict, Optional, Tuple
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+SESSIONS_DB = os.path.join(BASE_DIR, "data", "sessions.db")
+
+SESSION_TTL = 60 * 60 * 12  # 12h, la fel ca max_age al cookie-ului
+EVICT_INTERVAL = 60.0
+
+
+class SessionStore(abc.ABC):
+    """Interfața comună pentru backend-urile de sesiuni (session_id -> doctor_id)."""
+
+    ttl: int = SESSION_TTL
+
+    @abc.abstractmethod
+    def create(self, doctor_id: int) -> str:
+        """Creează o sesiune nouă și întoarce session_id-ul."""
+
+    @abc.abstractmethod
+    def get(self, session_id: str) -> Optional[int]:
+        """doctor_id-ul sesiunii, sau None dacă nu există ori a expirat."""
+
+    @abc.abstractmethod
+    def delete(self, session_id: str) -> None:
+        """Închide sesiunea (logout)."""
+
+    @abc.abstractmethod
+    def purge_expired(self) -> int:
+        """Șterge sesiunile expirate; întoarce câte au fost șterse."""
+
+    def _start_evictor(self) -> None:
+        t = threading.Thread(target=self._evict_loop, name="session-evictor", daemon=True)
+        t.start()
+
+    def _evict_loop(self) -> None:
+        while True:
+            time.sleep(EVICT_INTERVAL)
+            try:
+                self.purge_expired()
+            except Exception:
+                pass
+
+
+class MemorySessionStore(SessionStore):
+    """Sesiuni în memoria procesului, cu expirare (un singur worker)."""
+
+    def __init__(self, ttl: int = SESSION_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._sessions: Dict[str, Tuple[int, float]] = {}
+        self._start_evictor()
+
+    def create(self, doctor_id: int) -> str:
+        sid = uuid.uuid4().hex
+        with self._lock:
+            self._sessions[sid] = (doctor_id, time.time() + self.ttl)
+        return sid
+
+    def get(self, session_id: str) -> Optional[int]:
+        item = self._sessions.get(session_id)
+        if item is None:
+            return None
+        doctor_id, expires_at = item
+        if expires_at <= time.time():
+            self.delete(session_id)
+            return None
+        return doctor_id
+
+    def delete(self, session_id: str) -> None:
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def purge_expired(self) -> int:
+        now = time.time()
+        with self._lock:
+            expired = [sid for sid, (_, exp) in self._sessions.items() if exp <= now]
+            for sid in expired:
+                del self._sessions[sid]
+        return len(expired)
+
+
+class SqliteSessionStore(SessionStore):
+    """
+    Sesiuni partajate între workeri și reporniri, într-un fișier SQLite (WAL).
+    Fiecare fir are propria conexiune; căutarea e o citire după cheie primară.
+    """
+
+    def __init__(self, path: str = SESSIONS_DB, ttl: int = SESSION_TTL):
+        self.path = path
+        self.ttl = ttl
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            " sid TEXT PRIMARY KEY,"
+            " doctor_id INTEGER NOT NULL,"
+            " expires_at REAL NOT NULL"
+            ") WITHOUT ROWID"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_expires ON sessions(expires_at)")
+        self._start_evictor()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def create(self, doctor_id: int) -> str:
+        sid = uuid.uuid4().hex
+        self._conn().execute(
+            "INSERT INTO sessions (sid, doctor_id, expires_at) VALUES (?, ?, ?)",
+            (sid, doctor_id, time.time() + self.ttl),
+        )
+        return sid
+
+    def get(self, session_id: str) -> Optional[int]:
+        row = self._conn().execute(
+            "SELECT doctor_id FROM sessions WHERE sid = ? AND expires_at > ?",
+            (session_id, time.time()),
+        ).fetchone()
+        return row[0] if row else None
+
+    def delete(self, session_id: str) -> None:
+        self._conn().execute("DELETE FROM sessions WHERE sid = ?", (session_id,))
+
+    def purge_expired(self) -> int:
+        cur = self._conn().execute("DELETE FROM sessions WHERE expires_at <= ?", (time.time(),))
+        return cur.rowcount
+
+
+def create_store(backend: Optional[str] = None) -> SessionStore:
+    """
+    Alege backend-ul după TRIAGE_SESSION_BACKEND: "sqlite" (implicit,
+    funcționează cu mai mulți workeri) sau "memory" (un singur proces).
+    """
+    backend = (backend or os.environ.get("TRIAGE_SESSION_BACKEND", "sqlite")).lower()
+    if backend == "memory":
+        return MemorySessionStore()
+    if backend == "sqlite":
+        return SqliteSessionStore(os.environ.get("TRIAGE_SESSION_DB", SESSIONS_DB))
+    raise ValueError(f"Backend de sesiuni necunoscut: {backend}")
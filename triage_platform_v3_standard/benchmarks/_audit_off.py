@@ -0,0 +1,5 @@
+"""Aplicația cu jurnalul de audit al triajului oprit (referința pentru triage_audit.py)."""
+from app.api import triage
+from app.main import app  # noqa: F401
+
+triage.triage_audit.record = lambda *item: None
@@ -0,0 +1,61 @@
+"""Pornește aplicația într-un proces uvicorn separat, cu bazele într-un director temporar."""
+import contextlib
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Iterator, List, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def bench_env(tmp: str) -> dict:
+    env = dict(os.environ)
+    env.update({
+        "TRIAGE_ADMISSIONS_DB": os.path.join(tmp, "admissions.db"),
+        "TRIAGE_SESSION_DB": os.path.join(tmp, "sessions.db"),
+        "TRIAGE_ATTACHMENTS_DB": os.path.join(tmp, "attachments.db"),
+        "TRIAGE_SEARCH_DB": os.path.join(tmp, "search.db"),
+        "TRIAGE_LIVE_DB": os.path.join(tmp, "live_events.db"),
+        "TRIAGE_EXPORT_JOBS_DB": os.path.join(tmp, "export_jobs.db"),
+        "TRIAGE_AUDIT_DIR": os.path.join(tmp, "audit"),
+        "TRIAGE_EXPORTS_DIR": os.path.join(tmp, "exports"),
+        "TRIAGE_PDF_WORKERS": "1",
+        "PYTHONPATH": ROOT,
+    })
+    return env
+
+
+@contextlib.contextmanager
+def running_server(prefix: str, extra_args: List[str] = (), app: str = "app.main:app") -> Iterator[Tuple[str, dict]]:
+    """(URL de bază, mediul serverului); serverul e oprit la ieșire."""
+    tmp = tempfile.mkdtemp(prefix=prefix)
+    env = bench_env(tmp)
+    port = free_port()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", app, "--port", str(port), "--workers", "1",
+         "--log-level", "warning", *extra_args],
+        cwd=ROOT, env=env,
+    )
+    try:
+        deadline = time.time() + 30
+        while True:
+            try:
+                socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+                break
+            except OSError:
+                if time.time() > deadline or server.poll() is not None:
+                    sys.exit("serverul nu a pornit")
+                time.sleep(0.1)
+        yield f"http://127.0.0.1:{port}", env
+    finally:
+        server.terminate()
+        server.wait(10)
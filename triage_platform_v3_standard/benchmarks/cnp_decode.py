@@ -0,0 +1,102 @@
+"""
+Micro-benchmark pentru decodarea CNP (services/cnp_utils): parsarea de
+dinainte (felii + int() + date() + date.today() la fiecare apel, fără
+validare) față de decode_cnp fără memo, cu memo și decode_many pe un lot cu
+CNP-uri repetate (reveniri, importuri).
+
+    python benchmarks/cnp_decode.py --distinct 20000 --batch 5000
+"""
+import argparse
+import random
+import sys
+import timeit
+from datetime import date
+from operator import mul
+
+from _server import ROOT
+
+sys.path.insert(0, ROOT)
+
+from app.services.cnp_utils import _WEIGHTS, decode_cnp, decode_many, sex_age  # noqa: E402
+
+
+def _legacy_sex_age(cnp):
+    # sex_age_from_cnp din versiunea anterioară a app/api/triage.py
+    if not cnp or len(cnp) != 13 or not cnp.isdigit():
+        return {"age": None, "sex": None}
+    s = int(cnp[0])
+    yy = int(cnp[1:3])
+    mm = int(cnp[3:5])
+    dd = int(cnp[5:7])
+    if s in (1, 2):
+        year = 1900 + yy
+    elif s in (3, 4):
+        year = 1800 + yy
+    elif s in (5, 6):
+        year = 2000 + yy
+    else:
+        year = 1900 + yy
+    sex = "M" if s % 2 == 1 else "F"
+    try:
+        birth_date = date(year, mm, dd)
+        today = date.today()
+        age = today.year - birth_date.year - ((today.month, today.day) < (birth_date.month, birth_date.day))
+        return {"age": age, "sex": sex}
+    except ValueError:
+        return {"age": None, "sex": None}
+
+
+def _cnps(n: int, seed: int = 11) -> list:
+    rng = random.Random(seed)
+    out = []
+    while len(out) < n:
+        first12 = "%d%02d%02d%02d%02d%03d" % (
+            rng.choice([1, 2, 5, 6]), rng.randint(0, 99), rng.randint(1, 12), rng.randint(1, 28),
+            rng.randint(1, 46), rng.randint(1, 999),
+        )
+        rest = sum(map(mul, map(int, first12), _WEIGHTS)) % 11
+        out.append(first12 + str(1 if rest == 10 else rest))
+    return out
+
+
+def _per_call(stmt, number: int) -> float:
+    return min(timeit.repeat(stmt, number=1, repeat=5)) / number * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--distinct", type=int, default=20000)
+    parser.add_argument("--batch", type=int, default=5000)
+    args = parser.parse_args()
+
+    cnps = _cnps(args.distinct)
+    uncached = decode_cnp.__wrapped__
+
+    def legacy():
+        for cnp in cnps:
+            _legacy_sex_age(cnp)
+
+    def cold():
+        for cnp in cnps:
+            uncached(cnp)
+
+    def warm():
+        for cnp in cnps:
+            sex_age(cnp)
+
+    for cnp in cnps:
+        decode_cnp(cnp)
+    rng = random.Random(3)
+    batch = [rng.choice(cnps[: args.batch // 5]) for _ in range(args.batch)]
+
+    print(f"CNP-uri distincte: {args.distinct}")
+    print(f"parsare veche (fără validare):    {_per_call(legacy, len(cnps)):.2f} µs/CNP")
+    print(f"decode_cnp fără memo (validare):  {_per_call(cold, len(cnps)):.2f} µs/CNP")
+    print(f"sex_age cu memo (vârstă inclusă): {_per_call(warm, len(cnps)):.2f} µs/CNP")
+    print(f"decode_many, lot {args.batch} (~5 apariții/CNP): "
+          f"{_per_call(lambda: decode_many(batch), len(batch)):.2f} µs/CNP")
+    print(f"memo: {decode_cnp.cache_info()}")
+
+
+if __name__ == "__main__":
+    main()
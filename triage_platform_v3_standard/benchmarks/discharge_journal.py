@@ -0,0 +1,135 @@
+"""
+Latența unei confirmări de externare în funcție de mărimea istoricului:
+formatul vechi (tot array-ul JSON citit și rescris la fiecare confirmare)
+față de jurnalul append-only (storage/jsonl_journal), cu parametrii impliciți
+(fsync pe loturi, compactare la 4 MiB).
+
+    python benchmarks/discharge_journal.py --history 1000 10000 50000 --appends 200
+
+La final, câteva procese scriu în paralel în același jurnal și se verifică
+faptul că nu s-a pierdut nicio intrare.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from _server import ROOT
+
+sys.path.insert(0, ROOT)
+
+from app.storage.jsonl_journal import JsonlJournal  # noqa: E402
+
+
+def _entry(i: int) -> dict:
+    return {
+        "triage_level": 3 + i % 3,
+        "reason": f"durere abdominală {i % 97}",
+        "diagnosis_final": "Colică abdominală, fără semne de abdomen acut chirurgical.",
+        "evolution_final": "Evoluție favorabilă sub tratament simptomatic, afebril, hemodinamic stabil.",
+        "recommendations_final": "Regim alimentar, hidratare, control la medicul de familie în 7 zile.",
+    }
+
+
+def _pct(samples, p: float) -> float:
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(p * len(samples)))] * 1000
+
+
+def _legacy_append(path: str, entry: dict) -> None:
+    # _append_learning din versiunea anterioară
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    data.append(entry)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+
+
+def _measure(append, start: int, count: int) -> list:
+    samples = []
+    for i in range(start, start + count):
+        t0 = time.perf_counter()
+        append(_entry(i))
+        samples.append(time.perf_counter() - t0)
+    return samples
+
+
+def _report(name: str, samples: list) -> None:
+    print(f"  {name:<9} p50 {_pct(samples, 0.5):8.3f} ms   p99 {_pct(samples, 0.99):8.3f} ms"
+          f"   max {max(samples) * 1000:8.3f} ms")
+
+
+def _bench_size(tmp: str, history: int, appends: int, legacy_appends: int) -> None:
+    legacy = os.path.join(tmp, f"legacy-{history}.json")
+    with open(legacy, "w", encoding="utf-8") as f:
+        json.dump([_entry(i) for i in range(history)], f, ensure_ascii=False, indent=2)
+    print(f"istoric {history} intrări ({os.path.getsize(legacy) / 1e6:.1f} MB în formatul vechi)")
+
+    journal_dir = os.path.join(tmp, f"journal-{history}")
+    os.makedirs(journal_dir)
+    # jurnalul pornește din același fișier vechi (migrarea unică)
+    journal = JsonlJournal(
+        os.path.join(journal_dir, "learning.jsonl"),
+        os.path.join(journal_dir, "learning.snapshot.jsonl"),
+        legacy_path=legacy,
+    )
+    journal.load()
+    journal_samples = _measure(journal.append, history, appends)
+    assert len(journal.load()) == history + appends
+    journal.close()
+
+    legacy_samples = _measure(lambda e: _legacy_append(legacy, e), history, legacy_appends)
+    _report("vechi", legacy_samples)
+    _report("jurnal", journal_samples)
+
+
+def _writer(args) -> None:
+    directory, worker, count = args
+    journal = JsonlJournal(os.path.join(directory, "learning.jsonl"), os.path.join(directory, "learning.snapshot.jsonl"),
+                           compact_bytes=64 * 1024)
+    for i in range(count):
+        journal.append({**_entry(i), "worker": worker, "i": i})
+    journal.close()
+
+
+def _concurrent(tmp: str, workers: int, count: int) -> bool:
+    directory = os.path.join(tmp, "concurrent")
+    os.makedirs(directory)
+    t0 = time.perf_counter()
+    with multiprocessing.get_context("spawn").Pool(workers) as pool:
+        pool.map(_writer, [(directory, w, count) for w in range(workers)])
+    elapsed = time.perf_counter() - t0
+    rows = JsonlJournal(os.path.join(directory, "learning.jsonl"), os.path.join(directory, "learning.snapshot.jsonl")).load()
+    seen = {(row["worker"], row["i"]) for row in rows}
+    ok = len(rows) == len(seen) == workers * count
+    print(f"{workers} procese x {count} intrări (compactare la 64 KiB): {len(seen)}/{workers * count}"
+          f" distincte, {len(rows)} citite, {elapsed:.2f}s -> {'ok' if ok else 'PIERDERI/DUPLICATE'}")
+    return ok
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--history", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--appends", type=int, default=200)
+    parser.add_argument("--legacy-appends", type=int, default=20, help="formatul vechi e lent la istoric mare")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--per-worker", type=int, default=2000)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="discharge-journal-")
+    try:
+        for history in args.history:
+            _bench_size(tmp, history, args.appends, args.legacy_appends)
+        ok = _concurrent(tmp, args.workers, args.per_worker)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
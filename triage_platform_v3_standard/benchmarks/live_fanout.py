@@ -0,0 +1,95 @@
+"""
+Test de încărcare pentru /api/live/stream: un singur worker uvicorn cu sute
+de clienți SSE conectați. Evenimentele sunt publicate din procesul testului,
+printr-o altă instanță LiveBus pe aceeași bază (adică „alt worker”), deci se
+măsoară și drumul între workeri: tabela comună -> firul workerului -> clienți.
+
+    python benchmarks/live_fanout.py --clients 500 --events 200
+
+Raportează latența de livrare (p50 / p99 / max) și verifică faptul că fiecare
+client a primit toate evenimentele, în ordine, o singură dată.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+from _server import ROOT, running_server
+
+
+async def _client(http, url: str, ready: asyncio.Event, counter: list, expected: int, received: list) -> None:
+    async with http.stream("GET", url) as resp:
+        async for line in resp.aiter_lines():
+            if not line.startswith("data: "):
+                continue
+            event = json.loads(line[6:])
+            if event["type"] == "snapshot":
+                counter[0] += 1
+                if counter[0] == counter[1]:
+                    ready.set()
+                continue
+            received.append((event["seq"], time.time() - event["data"]["ts"]))
+            if len(received) >= expected:
+                return
+
+
+async def _run(args, base_url: str, bus) -> None:
+    import httpx
+
+    limits = httpx.Limits(max_connections=args.clients + 10, max_keepalive_connections=0)
+    timeout = httpx.Timeout(60.0)
+    ready = asyncio.Event()
+    counter = [0, args.clients]
+    received = [[] for _ in range(args.clients)]
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=timeout) as http:
+        t0 = time.perf_counter()
+        tasks = [
+            asyncio.create_task(_client(http, "/api/live/stream", ready, counter, args.events, received[i]))
+            for i in range(args.clients)
+        ]
+        await asyncio.wait_for(ready.wait(), 120)
+        connect_s = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        first_seq = None
+        for i in range(args.events):
+            seq = await asyncio.to_thread(bus.publish, "bench", {"i": i, "ts": time.time()})
+            first_seq = first_seq or seq
+            await asyncio.sleep(1.0 / args.rate)
+        await asyncio.wait_for(asyncio.gather(*tasks), 120)
+        total_s = time.perf_counter() - t0
+
+    expected = list(range(first_seq, first_seq + args.events))
+    complete = sum(1 for r in received if [seq for seq, _ in r] == expected)
+    latencies = sorted(lat for r in received for _, lat in r)
+    pct = lambda p: latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000  # noqa: E731
+
+    print(f"clienți:           {args.clients} (conectați în {connect_s:.2f}s)")
+    print(f"evenimente:        {args.events} la {args.rate}/s, {len(latencies)} livrări în {total_s:.2f}s")
+    print(f"compleți, în ordine: {complete}/{args.clients}")
+    print(f"latență livrare:   p50 {pct(0.50):.1f} ms, p99 {pct(0.99):.1f} ms, max {latencies[-1] * 1000:.1f} ms")
+    if complete != args.clients:
+        sys.exit(1)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--clients", type=int, default=500)
+    parser.add_argument("--events", type=int, default=200)
+    parser.add_argument("--rate", type=float, default=50.0, help="evenimente pe secundă")
+    args = parser.parse_args()
+
+    with running_server("live-fanout-", ["--limit-concurrency", str(args.clients + 50)]) as (base_url, env):
+        os.environ.update(env)
+        sys.path.insert(0, ROOT)
+        from app.services.live_updates import LiveBus
+        from app.storage.live_events import LiveEventLog
+
+        bus = LiveBus(LiveEventLog(env["TRIAGE_LIVE_DB"]))
+        asyncio.run(_run(args, base_url, bus))
+
+
+if __name__ == "__main__":
+    main()
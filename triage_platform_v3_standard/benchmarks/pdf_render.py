@@ -0,0 +1,88 @@
+"""
+Randarea foii de externare pe un singur nucleu (în proces, fără pool):
+PDF-uri pe secundă cu imaginile desenate ca înainte (`c.drawImage`, care
+decodează logo-ul, parafa și semnătura la fiecare document) față de
+cache-ul de imagini din services/pdf_assets.
+
+    python benchmarks/pdf_render.py --docs 100
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from _server import ROOT
+
+sys.path.insert(0, ROOT)
+
+from app.services import pdf_render  # noqa: E402
+from app.services.pdf_assets import image_cache  # noqa: E402
+
+DOCTOR = {
+    "full_name": "Dr. Vintu Ioan",
+    "specialty": "Medicină de urgență",
+    "stamp_url": "/static/img/parafa_vintu.png",
+    "signature_url": "/static/img/semnatura_vintu.png",
+}
+
+
+def _sheet(i: int) -> dict:
+    return {
+        "patient_name": f"Pacient Test {i}",
+        "cnp": "1850315400010",
+        "age": 40,
+        "sex": "M",
+        "diagnosis": "Colică renală dreaptă, fără semne de complicație. " * 3,
+        "evolution": "Evoluție favorabilă sub tratament antispastic și analgezic, afebril. " * 6,
+        "recommendations": "Hidratare, control urologic în 7 zile, revine la nevoie. " * 4,
+        "triage_level": 3,
+        "triage_color": "yellow",
+        "reason": "durere lombară",
+    }
+
+
+def _draw_image_uncached(c, path, x, y, width, height, preserveAspectRatio=True) -> bool:
+    # desenarea de dinainte de cache (ReportLab decodează fișierul pentru fiecare document)
+    c.drawImage(path, x, y, width=width, height=height, preserveAspectRatio=preserveAspectRatio, mask="auto")
+    return True
+
+
+def _run(tmp: str, docs: int) -> tuple:
+    sizes = []
+    t0 = time.perf_counter()
+    for i in range(docs):
+        size, _ = pdf_render.render_externare(_sheet(i), DOCTOR, [], os.path.join(tmp, f"{i % 8}.pdf"))
+        sizes.append(size)
+    return time.perf_counter() - t0, sum(sizes) / len(sizes)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--docs", type=int, default=100)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="pdf-render-")
+    cached = pdf_render.draw_cached_image
+    try:
+        pdf_render.render_externare(_sheet(0), DOCTOR, [], os.path.join(tmp, "warmup.pdf"))  # fonturi, imagini
+
+        pdf_render.draw_cached_image = _draw_image_uncached
+        before_s, before_size = _run(tmp, args.docs)
+        pdf_render.draw_cached_image = cached
+        after_s, after_size = _run(tmp, args.docs)
+    finally:
+        pdf_render.draw_cached_image = cached
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    print(f"documente:    {args.docs}, un nucleu")
+    print(f"fără cache:   {args.docs / before_s:6.1f} PDF/s ({before_s / args.docs * 1000:.1f} ms/doc,"
+          f" {before_size / 1024:.0f} KiB/doc)")
+    print(f"cu cache:     {args.docs / after_s:6.1f} PDF/s ({after_s / args.docs * 1000:.1f} ms/doc,"
+          f" {after_size / 1024:.0f} KiB/doc)  -> {before_s / after_s:.1f}x")
+    print(f"cache imagini: {image_cache.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Mărimea PDF-urilor de externare și costul optimizării: aceleași documente
+scrise fără optimizări (imaginile la rezoluția sursei, fluxurile atașate
+necomprimate, obiecte identice dublate) și cu optimizările din
+services/pdf_assets (reducere la PRINT_DPI) și pdf_render.optimize_writer
+(FlateDecode + partajarea fluxurilor identice).
+
+    python benchmarks/pdf_size.py --docs 20 --attachments 3
+
+Raportează octeți pe document (foaie singură, foaie cu investigații,
+export în masă cu toate foile) și timpul CPU suplimentar pe document.
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from _server import ROOT
+
+sys.path.insert(0, ROOT)
+
+from reportlab.lib.pagesizes import A4  # noqa: E402
+from reportlab.pdfgen import canvas  # noqa: E402
+
+from app.services import pdf_assets, pdf_render  # noqa: E402
+from pdf_render import DOCTOR, _sheet  # noqa: E402  (benchmarks/pdf_render.py, nu app.services)
+
+
+def _investigation(path: str, pages: int) -> None:
+    # ca un PDF exportat de un aparat: fluxuri necomprimate, același logo pe fiecare pagină
+    c = canvas.Canvas(path, pagesize=A4, pageCompression=0)
+    for page in range(pages):
+        c.drawImage(str(pdf_render.LOGO_PATH), 40, 700, width=120, height=120, mask="auto")
+        y = 660
+        for row in range(40):
+            c.drawString(50, y, f"Hemoleucogramă {page}.{row}: HGB 13.{row % 10} g/dL, WBC 7.{row % 7} x10^3/µL")
+            y -= 14
+        c.showPage()
+    c.save()
+
+
+def _no_optimize(writer):
+    return {"compressed": 0, "shared": 0}
+
+
+def _measure(tmp: str, docs: int, attachments: list, label: str) -> dict:
+    sheet_sizes, full_sizes, cpu = [], [], 0.0
+    rendered = []
+    for i in range(docs):
+        size, _ = pdf_render.render_externare(_sheet(i), DOCTOR, [], os.path.join(tmp, f"{label}-s{i}.pdf"))
+        sheet_sizes.append(size)
+        path = os.path.join(tmp, f"{label}-f{i}.pdf")
+        t0 = time.process_time()
+        size, _ = pdf_render.render_externare(_sheet(i), DOCTOR, attachments, path)
+        cpu += time.process_time() - t0
+        full_sizes.append(size)
+        rendered.append(os.path.join(tmp, f"{label}-s{i}.pdf"))
+    t0 = time.process_time()
+    bulk, _ = pdf_render.concat_pdfs(rendered, os.path.join(tmp, f"{label}-bulk.pdf"))
+    bulk_cpu = time.process_time() - t0
+    return {
+        "sheet": sum(sheet_sizes) / docs,
+        "full": sum(full_sizes) / docs,
+        "bulk": bulk / docs,
+        "cpu_ms": cpu / docs * 1000,
+        "bulk_cpu_ms": bulk_cpu / docs * 1000,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--docs", type=int, default=20)
+    parser.add_argument("--attachments", type=int, default=3, help="investigații atașate fiecărei foi")
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="pdf-size-")
+    optimize, cache = pdf_render.optimize_writer, pdf_assets.image_cache
+    try:
+        attachments = []
+        for i in range(args.attachments):
+            path = os.path.join(tmp, f"investigatie-{i}.pdf")
+            _investigation(path, pages=2)
+            attachments.append(path)
+
+        # fără optimizări: imaginile la rezoluția sursei, nimic comprimat sau partajat la scriere
+        pdf_render.optimize_writer = _no_optimize
+        pdf_assets.image_cache = pdf_assets.ImageCache(dpi=0)
+        pdf_render.render_externare(_sheet(0), DOCTOR, attachments, os.path.join(tmp, "warmup.pdf"))
+        before = _measure(tmp, args.docs, attachments, "before")
+
+        pdf_render.optimize_writer = optimize
+        pdf_assets.image_cache = pdf_assets.ImageCache()
+        pdf_render.render_externare(_sheet(0), DOCTOR, attachments, os.path.join(tmp, "warmup.pdf"))
+        after = _measure(tmp, args.docs, attachments, "after")
+    finally:
+        pdf_render.optimize_writer, pdf_assets.image_cache = optimize, cache
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    kib = lambda n: f"{n / 1024:8.1f} KiB"  # noqa: E731
+    print(f"documente: {args.docs}, câte {args.attachments} investigații (2 pagini) fiecare")
+    print(f"{'':26}{'fără optimizări':>16}{'optimizat':>14}")
+    print(f"{'foaie singură':<26}{kib(before['sheet']):>16}{kib(after['sheet']):>14}")
+    print(f"{'foaie + investigații':<26}{kib(before['full']):>16}{kib(after['full']):>14}")
+    print(f"{'export în masă (per foaie)':<26}{kib(before['bulk']):>16}{kib(after['bulk']):>14}")
+    print(f"{'CPU foaie+investigații':<26}{before['cpu_ms']:>13.1f} ms{after['cpu_ms']:>11.1f} ms"
+          f"   ({after['cpu_ms'] - before['cpu_ms']:+.1f} ms/doc)")
+    print(f"{'CPU export în masă':<26}{before['bulk_cpu_ms']:>13.1f} ms{after['bulk_cpu_ms']:>11.1f} ms"
+          f"   ({after['bulk_cpu_ms'] - before['bulk_cpu_ms']:+.1f} ms/foaie)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Costul auditului pe calea POST /api/triage: aceeași încărcare (rată fixă,
+cereri trimise indiferent dacă cele anterioare au răspuns) pe un worker
+uvicorn, cu jurnalul de audit oprit și pornit. Raportează p50 / p99 / max
+și statisticile jurnalului (scrise, pierdute). Rata trebuie să rămână sub
+saturația workerului (clientul rulează pe aceeași mașină), altfel se măsoară
+coada de cereri, nu auditul.
+
+    python benchmarks/triage_audit.py --rate 150 --seconds 10
+"""
+import argparse
+import asyncio
+import random
+import time
+
+from _server import running_server
+
+
+def _payload(rng: random.Random) -> dict:
+    return {
+        "cnp": "1850315400010",
+        "sbp": rng.choice([75, 88, 120]),
+        "spo2": rng.choice([89.0, 92.0, 98.0]),
+        "rr": rng.choice([16, 26]),
+        "gcs": 15,
+        "pain": rng.randint(0, 10),
+        "temp": 37.2,
+        "resources_expected": rng.randint(0, 3),
+        "red_flags": {"chest_pain": rng.random() < 0.1},
+    }
+
+
+async def _load(base_url: str, rate: float, seconds: float) -> list:
+    import httpx
+
+    rng = random.Random(5)
+    latencies = []
+    errors = 0
+
+    async def one(http):
+        nonlocal errors
+        t0 = time.perf_counter()
+        r = await http.post("/api/triage", json=_payload(rng))
+        if r.status_code != 200:
+            errors += 1
+        latencies.append(time.perf_counter() - t0)
+
+    limits = httpx.Limits(max_connections=200, max_keepalive_connections=200)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as http:
+        for _ in range(200):
+            await one(http)  # încălzire
+        latencies.clear()
+        tasks = []
+        start = time.perf_counter()
+        n = int(rate * seconds)
+        for i in range(n):
+            delay = start + i / rate - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(one(http)))
+        await asyncio.gather(*tasks)
+        stats = (await http.get("/api/triage/audit/stats")).json()
+    return sorted(latencies), errors, stats
+
+
+def _report(name: str, latencies: list, errors: int, stats: dict) -> None:
+    pct = lambda p: latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000  # noqa: E731
+    print(f"{name:<12} p50 {pct(0.5):6.2f} ms   p99 {pct(0.99):6.2f} ms   max {latencies[-1] * 1000:7.2f} ms"
+          f"   erori {errors}   audit: scrise {stats['written']}, pierdute {stats['dropped']}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rate", type=float, default=150.0, help="cereri pe secundă (sub saturația workerului)")
+    parser.add_argument("--seconds", type=float, default=10.0)
+    args = parser.parse_args()
+
+    print(f"încărcare: {args.rate:.0f} cereri/s timp de {args.seconds:.0f}s")
+    for name, app in (("fără audit", "benchmarks._audit_off:app"), ("cu audit", "app.main:app")):
+        with running_server("triage-audit-", app=app) as (base_url, _env):
+            latencies, errors, stats = asyncio.run(_load(base_url, args.rate, args.seconds))
+        _report(name, latencies, errors, stats)
+
+
+if __name__ == "__main__":
+    main()
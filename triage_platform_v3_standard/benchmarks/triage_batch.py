@@ -0,0 +1,76 @@
+"""
+Debitul triajului în masă: aceiași pacienți trimiși unul câte unul la
+POST /api/triage (o cerere HTTP per pacient, pe o conexiune keep-alive)
+față de POST /api/triage/batch (array JSON și NDJSON), pe un worker uvicorn.
+
+    python benchmarks/triage_batch.py --patients 2000 --batch 500
+
+Verifică și că ambele căi întorc aceleași rezultate.
+"""
+import argparse
+import json
+import random
+import time
+
+from _server import running_server
+
+
+def _patients(n: int, seed: int = 7) -> list:
+    rng = random.Random(seed)
+    flags = ("active_bleeding", "severe_dyspnea", "postictal_altered", "chest_pain", "major_trauma")
+    return [
+        {
+            "sbp": rng.choice([None, 70, 85, 110, 130]),
+            "spo2": rng.choice([None, 88.0, 92.0, 97.0]),
+            "rr": rng.choice([None, 6, 16, 26, 34]),
+            "gcs": rng.choice([None, 7, 11, 15]),
+            "pain": rng.randint(0, 10),
+            "temp": rng.choice([None, 36.8, 38.5, 40.1]),
+            "resources_expected": rng.randint(0, 3),
+            "red_flags": {f: True for f in flags if rng.random() < 0.03},
+        }
+        for _ in range(n)
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--patients", type=int, default=2000)
+    parser.add_argument("--batch", type=int, default=500, help="pacienți per cerere de lot")
+    args = parser.parse_args()
+
+    import httpx
+
+    patients = _patients(args.patients)
+    chunks = [patients[i:i + args.batch] for i in range(0, len(patients), args.batch)]
+    with running_server("triage-batch-") as (base_url, _env), httpx.Client(base_url=base_url, timeout=60) as http:
+        http.post("/api/triage", json=patients[0])  # încălzire
+
+        t0 = time.perf_counter()
+        single = [http.post("/api/triage", json=p).json() for p in patients]
+        single_s = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        batch = [out for chunk in chunks for out in http.post("/api/triage/batch", json=chunk).json()]
+        batch_s = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        ndjson = []
+        for chunk in chunks:
+            body = "\n".join(json.dumps(p) for p in chunk)
+            r = http.post("/api/triage/batch", content=body, headers={"Content-Type": "application/x-ndjson"})
+            ndjson.extend(r.json())
+        ndjson_s = time.perf_counter() - t0
+
+    print(f"pacienți:          {args.patients} (loturi de {args.batch})")
+    print(f"POST /triage:      {single_s:.2f}s, {args.patients / single_s:,.0f} pacienți/s")
+    print(f"batch (JSON):      {batch_s:.2f}s, {args.patients / batch_s:,.0f} pacienți/s ({single_s / batch_s:.1f}x)")
+    print(f"batch (NDJSON):    {ndjson_s:.2f}s, {args.patients / ndjson_s:,.0f} pacienți/s ({single_s / ndjson_s:.1f}x)")
+    same = batch == single and ndjson == single
+    print(f"rezultate identice: {'da' if same else 'NU'}")
+    if not same:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Latența POST /api/triage cât timp rulează exporturi PDF: aceeași încărcare
+cu rată fixă ca în triage_audit.py, o dată singură și o dată cu câțiva
+clienți care cer în buclă foi de externare noi (necache-uite). Randarea
+rulează în pool-ul de procese, deci p99 pe triaj nu ar trebui să crească
+mult; exporturile peste capacitatea pool-ului primesc 429. La final se
+afișează metricile pool-ului (locuri ocupate, randări, respingeri).
+
+    python benchmarks/triage_pdf_load.py --rate 150 --seconds 10 --exporters 4
+"""
+import argparse
+import asyncio
+import itertools
+import time
+
+from _server import running_server
+from triage_audit import _load, _report
+
+
+def _sheet(i: int) -> dict:
+    return {
+        "patient_name": f"Pacient Încărcare {i}",
+        "cnp": "1850315400010",
+        "age": 40,
+        "sex": "M",
+        "diagnosis": "Colică renală dreaptă, fără semne de complicație. " * 3,
+        "evolution": "Evoluție favorabilă sub tratament antispastic și analgezic, afebril. " * 6,
+        "recommendations": "Hidratare, control urologic în 7 zile, revine la nevoie. " * 4,
+        "triage_level": 3,
+        "triage_color": "yellow",
+        "reason": "durere lombară",
+    }
+
+
+async def _exports(base_url: str, clients: int, stop: asyncio.Event) -> dict:
+    import httpx
+
+    counter = itertools.count()
+    statuses: dict = {}
+
+    async def client(http):
+        while not stop.is_set():
+            r = await http.post("/api/pdf/externare", json=_sheet(next(counter)))
+            statuses[r.status_code] = statuses.get(r.status_code, 0) + 1
+            if r.status_code == 429:
+                await asyncio.sleep(0.05)
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=60) as http:
+        r = await http.post("/api/auth/login", json={"pin": "1234"})
+        r.raise_for_status()
+        await asyncio.gather(*(client(http) for _ in range(clients)))
+        deadline = time.time() + 30
+        while True:
+            metrics = (await http.get("/api/pdf/metrics")).json()
+            if metrics["in_flight"] == 0 or time.time() > deadline:
+                break
+            await asyncio.sleep(0.1)
+    return {"statuses": statuses, "metrics": metrics}
+
+
+async def _with_exports(base_url: str, rate: float, seconds: float, clients: int):
+    stop = asyncio.Event()
+    exporters = asyncio.create_task(_exports(base_url, clients, stop))
+    await asyncio.sleep(1.0)  # procesele de randare pornesc (spawn)
+    try:
+        result = await _load(base_url, rate, seconds)
+    finally:
+        stop.set()
+    return result, await exporters
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rate", type=float, default=150.0, help="cereri de triaj pe secundă")
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--exporters", type=int, default=4, help="clienți care exportă PDF în paralel")
+    args = parser.parse_args()
+
+    print(f"încărcare: {args.rate:.0f} cereri/s timp de {args.seconds:.0f}s, {args.exporters} clienți PDF")
+    with running_server("triage-pdf-") as (base_url, _env):
+        latencies, errors, stats = asyncio.run(_load(base_url, args.rate, args.seconds))
+    _report("fără PDF", latencies, errors, stats)
+
+    with running_server("triage-pdf-") as (base_url, _env):
+        (latencies, errors, stats), exports = asyncio.run(
+            _with_exports(base_url, args.rate, args.seconds, args.exporters)
+        )
+    _report("cu PDF", latencies, errors, stats)
+    m = exports["metrics"]
+    codes = ", ".join(f"{code}: {n}" for code, n in sorted(exports["statuses"].items()))
+    print(f"exporturi    {codes}   pool: randate {m['completed']}, respinse {m['rejected']},"
+          f" în lucru la final {m['in_flight']}, randare p95 {m['render_ms_p95']} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,23 +1,43 @@
 // static/admissions.js
 
+function renderAdmissionRow(adm) {
+  const tbody = document.querySelector("#admissionTable tbody");
+  let row = tbody.querySelector(`tr[data-id="${adm.id}"]`);
+  if (!row) {
+    row = document.createElement("tr");
+    row.dataset.id = adm.id;
+    tbody.appendChild(row);
+  }
+  row.innerHTML = `
+    <td>${adm.id}</td>
+    <td>${adm.first_name}</td>
+    <td>${adm.last_name}</td>
+    <td>${adm.reason || "-"}</td>
+    <td>${adm.triage_color.toUpperCase()}</td>
+    <td>${adm.timestamp}</td>
+  `;
+}
+
 async function loadAdmissions() {
   const res = await fetch("/api/admissions");
   const list = await res.json();
-  const tbody = document.querySelector("#admissionTable tbody");
-  tbody.innerHTML = "";
-
-  list.forEach(adm => {
-    const row = document.createElement("tr");
-    row.innerHTML = `
-      <td>${adm.id}</td>
-      <td>${adm.first_name}</td>
-      <td>${adm.last_name}</td>
-      <td>${adm.reason || "-"}</td>
-      <td>${adm.triage_color.toUpperCase()}</td>
-      <td>${adm.timestamp}</td>
-    `;
-    tbody.appendChild(row);
+  document.querySelector("#admissionTable tbody").innerHTML = "";
+  list.forEach(renderAdmissionRow);
+}
+
+// 🔴 actualizări live (SSE) în loc de reîncărcarea listei
+function subscribeAdmissions() {
+  if (!window.EventSource) return;
+  const source = new EventSource("/api/live/stream");
+
+  source.addEventListener("snapshot", (ev) => {
+    const { data } = JSON.parse(ev.data);
+    document.querySelector("#admissionTable tbody").innerHTML = "";
+    (data.admissions || []).forEach(renderAdmissionRow);
   });
+  source.addEventListener("admission.created", (ev) => renderAdmissionRow(JSON.parse(ev.data).data));
+  source.addEventListener("admission.updated", (ev) => renderAdmissionRow(JSON.parse(ev.data).data));
+  // la "resync" serverul închide fluxul, iar EventSource se reconectează singur
 }
 
 document.addEventListener("DOMContentLoaded", () => {
@@ -42,11 +62,12 @@ document.addEventListener("DOMContentLoaded", () => {
 
     if (res.ok) {
       alert("Pacient internat cu succes!");
-      await loadAdmissions();
+      if (!window.EventSource) await loadAdmissions();
     } else {
       alert("Eroare la internare!");
     }
   });
 
   loadListBtn.addEventListener("click", loadAdmissions);
+  subscribeAdmissions();
 });
@@ -0,0 +1,24 @@
+import os
+import sys
+import tempfile
+
+# bazele și jurnalele aplicației merg într-un director temporar, înainte de
+# importul modulelor app.* (singletoanele citesc TRIAGE_* la import)
+_TMP = tempfile.mkdtemp(prefix="triage-tests-")
+for _name, _file in (
+    ("TRIAGE_ADMISSIONS_DB", "admissions.db"),
+    ("TRIAGE_SESSION_DB", "sessions.db"),
+    ("TRIAGE_ATTACHMENTS_DB", "attachments.db"),
+    ("TRIAGE_SEARCH_DB", "search.db"),
+    ("TRIAGE_LIVE_DB", "live_events.db"),
+    ("TRIAGE_EXPORT_JOBS_DB", "export_jobs.db"),
+    ("TRIAGE_AUDIT_DIR", "audit"),
+    ("TRIAGE_EXPORTS_DIR", "exports"),
+):
+    os.environ.setdefault(_name, os.path.join(_TMP, _file))
+os.environ.setdefault("TRIAGE_PDF_WORKERS", "1")
+# json_store folosește căi relative (data/db.jsonl)
+os.makedirs(os.path.join(_TMP, "data"), exist_ok=True)
+os.chdir(_TMP)
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
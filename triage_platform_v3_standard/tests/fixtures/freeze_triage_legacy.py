@@ -0,0 +1,97 @@
+"""
+Generează triage_legacy_outcomes.jsonl: rezultatele regulilor de triaj
+scrise de mână (if-chain-ul din versiunea inițială a app/api/triage.py,
+copiat mai jos neschimbat) pentru un set fix de cazuri. Fișierul e înghețat
+în repo; testele de paritate compară motorul compilat cu el.
+
+    python tests/fixtures/freeze_triage_legacy.py
+"""
+import itertools
+import json
+import os
+import random
+from types import SimpleNamespace
+
+OUT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "triage_legacy_outcomes.jsonl")
+
+FLAGS = (
+    "active_bleeding", "chest_pain", "severe_dyspnea", "anaphylaxis", "seizure_now",
+    "postictal_altered", "stroke_signs", "pregnancy_3rd_trimester", "major_trauma",
+)
+
+# valorile de la marginile pragurilor (inclusiv 0, pe care regulile vechi îl tratau ca „lipsă”)
+BOUNDARIES = {
+    "sbp": [None, 0, 60, 79, 80, 85, 89, 90, 120, 200],
+    "spo2": [None, 0, 85.0, 89.9, 90.0, 92.0, 93.0, 93.5, 98.0, 100.0],
+    "rr": [None, 0, 5, 7, 8, 16, 23, 24, 27, 30, 31, 40],
+    "gcs": [None, 0, 3, 8, 9, 10, 12, 13, 15],
+    "pain": [None, 0, 5, 7, 8, 10],
+    "temp": [None, 0, 35.0, 37.0, 39.4, 39.5, 41.0],
+    "resources_expected": [0, 1, 2, 5],
+}
+NEUTRAL = {"sbp": 120, "spo2": 98.0, "rr": 16, "gcs": 15, "pain": 2, "temp": 37.0, "resources_expected": 0}
+
+
+# ---- regulile vechi, neschimbate ----
+def triage_rules(p):
+    reasons = []
+    advice = []
+    p.resources_expected = p.resources_expected or 0
+
+    # --- Pas A: ROȘU (Nivel I)
+    def any_true(*vals): return any(bool(v) for v in vals)
+    if (p.sbp and p.sbp < 80) or (p.spo2 and p.spo2 < 90) or (p.rr and (p.rr < 8 or p.rr > 30)) or (p.gcs and p.gcs <= 8) or \
+       any_true(p.red_flags.active_bleeding, p.red_flags.severe_dyspnea, p.red_flags.anaphylaxis, p.red_flags.seizure_now, p.red_flags.major_trauma):
+        reasons.append("Condiție vitală critică")
+        advice = ["Anunță echipa de resuscitare", "Oxigen", "Acces venos", "Monitorizare"]
+        return 1, "red", "Roșu (Nivel I - Resuscitare)", "imediat", reasons, advice
+
+    # --- Pas B: PORTOCALIU (Nivel II)
+    if (p.pain and p.pain >= 8) or (p.gcs and 9 <= p.gcs <= 12) or (p.sbp and 80 <= p.sbp < 90) or \
+       (p.rr and 24 <= p.rr <= 30) or (p.spo2 and 90 <= p.spo2 <= 93) or (p.temp and p.temp >= 39.5) or p.red_flags.postictal_altered:
+        reasons.append("Risc vital moderat")
+        advice = ["Evaluare rapidă", "Analgezie", "Monitorizare", "Acces venos"]
+        return 2, "orange", "Portocaliu (Nivel II - Critic)", "≤10 minute", reasons, advice
+
+    # --- Pas C: Galben / Verde / Albastru
+    if p.resources_expected >= 2:
+        return 3, "yellow", "Galben (Nivel III - ≥2 resurse)", "≤30 minute", reasons, advice
+    elif p.resources_expected == 1:
+        return 4, "green", "Verde (Nivel IV - 1 resursă)", "≤60 minute", reasons, advice
+    else:
+        return 5, "blue", "Albastru (Nivel V - fără resurse)", "≤120 minute", reasons, advice
+
+
+def cases():
+    # fiecare prag, pe rând, pornind de la un pacient stabil
+    for field, values in BOUNDARIES.items():
+        for value in values:
+            yield {**NEUTRAL, field: value, "red_flags": {}}
+    # fiecare semn de alarmă, singur
+    for flag in FLAGS:
+        yield {**NEUTRAL, "red_flags": {flag: True}}
+    # perechi de câmpuri vitale la margini
+    vitals = ["sbp", "spo2", "rr", "gcs", "pain", "temp"]
+    for a, b in itertools.combinations(vitals, 2):
+        for va, vb in itertools.product(BOUNDARIES[a], BOUNDARIES[b]):
+            yield {**NEUTRAL, a: va, b: vb, "resources_expected": 1, "red_flags": {}}
+    # combinații aleatoare (sămânță fixă)
+    rng = random.Random(20251118)
+    for _ in range(1500):
+        case = {field: rng.choice(values) for field, values in BOUNDARIES.items()}
+        case["red_flags"] = {f: True for f in FLAGS if rng.random() < 0.04}
+        yield case
+
+
+def main() -> None:
+    with open(OUT, "w", encoding="utf-8") as f:
+        for case in cases():
+            p = SimpleNamespace(**{**case, "red_flags": SimpleNamespace(**{f: case["red_flags"].get(f, False) for f in FLAGS})})
+            level, color, label, time_target, reasons, advice = triage_rules(p)
+            expected = {"level": level, "color": color, "label": label, "time_target": time_target,
+                        "reasons": reasons, "advice": advice}
+            f.write(json.dumps({"input": case, "expected": expected}, ensure_ascii=False, separators=(",", ":")) + "\n")
+
+
+if __name__ == "__main__":
+    main()
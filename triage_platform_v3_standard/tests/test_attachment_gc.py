@@ -0,0 +1,104 @@
+import sqlite3
+
+import pytest
+from reportlab.pdfgen import canvas
+
+from app.services.pdf_cache import ExportCache
+from app.storage.attachment_store import AttachmentStore
+
+KEY = "c" * 64
+# blob-urile sunt „vechi” imediat (last_seen are rezoluție de o secundă)
+NOW = -2
+
+
+def _pdf(path, text):
+    c = canvas.Canvas(str(path))
+    c.drawString(72, 760, text)
+    c.showPage()
+    c.save()
+    return path
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = AttachmentStore(tmp_path / "attachments", str(tmp_path / "attachments.db"))
+    yield store
+    store.close()
+
+
+@pytest.fixture
+def cache(tmp_path, store):
+    cache = ExportCache(tmp_path / "exports")
+    cache.add_listener(lambda key: store.remove_refs("externare:" + key))
+    return cache
+
+
+def _cached_export(cache, key):
+    tmp = cache.temp_path(key)
+    tmp.write_bytes(b"%PDF-1.4 foaie")
+    return cache.commit(key, tmp)
+
+
+def test_evicted_export_releases_its_attachments(tmp_path, store, cache):
+    sha = store.add_file(_pdf(tmp_path / "ecg.pdf", "ECG"))["sha256"]
+    store.add_refs([sha], "externare:" + KEY)
+    _cached_export(cache, KEY)
+
+    assert store.gc(grace=NOW)["blobs"] == 0
+    cache.max_age = -1
+    assert cache.evict() == 1
+    assert store.gc(grace=NOW)["blobs"] == 1
+    assert store.get(sha) is None and not store.blob_path(sha).exists()
+
+
+def test_failed_render_releases_its_attachments(tmp_path, store, cache):
+    sha = store.add_file(_pdf(tmp_path / "ecg.pdf", "ECG"))["sha256"]
+    store.add_refs([sha], "externare:" + KEY)
+    tmp = cache.temp_path(KEY)
+    tmp.write_bytes(b"partial")
+    cache.discard(tmp)
+    assert store.gc(grace=NOW)["blobs"] == 1
+
+
+def test_stale_refs_are_pruned_for_missing_exports(tmp_path, store, cache):
+    kept, gone = store.add_file(_pdf(tmp_path / "a.pdf", "A"))["sha256"], store.add_file(_pdf(tmp_path / "b.pdf", "B"))["sha256"]
+    other = "d" * 64
+    _cached_export(cache, KEY)
+    store.add_refs([kept], "externare:" + KEY)
+    # referința unei foi care nu mai e în cache (evacuată de un worker oprit între timp)
+    store.add_refs([gone], "externare:" + other)
+    store.track_owners("externare:", lambda key: cache.path_for(key).exists())
+
+    assert store.prune_refs(ref_grace=0) == 1
+    assert store.gc(grace=NOW)["blobs"] == 1
+    assert store.get(kept) is not None and store.get(gone) is None
+
+
+def test_legacy_imports_are_collectable_and_not_reimported(tmp_path, store):
+    legacy = tmp_path / "uploads"
+    legacy.mkdir()
+    _pdf(legacy / "analize.pdf", "Analize")
+    assert store.import_legacy([legacy]) == 1
+    sha = store.resolve_sha("analize.pdf")
+
+    assert store.gc(grace=NOW)["blobs"] == 1
+    assert store.import_legacy([legacy]) == 0
+    assert store.get(sha) is None
+
+
+def test_old_permanent_legacy_refs_are_migrated(tmp_path, store):
+    sha = store.add_file(_pdf(tmp_path / "ecg.pdf", "ECG"), "vechi.pdf")["sha256"]
+    store.add_refs([sha], "legacy:vechi.pdf")
+    reopened = AttachmentStore(tmp_path / "attachments", store.path)
+    conn = sqlite3.connect(store.path)
+    assert conn.execute("SELECT COUNT(*) FROM refs").fetchone()[0] == 0
+    assert conn.execute("SELECT name FROM legacy_imports").fetchall() == [("vechi.pdf",)]
+    reopened.close()
+
+
+def test_only_one_worker_runs_gc_per_interval(tmp_path, store):
+    other = AttachmentStore(tmp_path / "attachments", store.path)
+    assert store.claim_gc(3600)
+    assert not other.claim_gc(3600)
+    assert not store.claim_gc(3600)
+    assert other.claim_gc(0)
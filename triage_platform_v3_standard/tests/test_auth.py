@@ -0,0 +1,11 @@
+from fastapi.testclient import TestClient
+
+from app.main import app
+
+
+def test_doctor_stats_require_a_session():
+    with TestClient(app) as client:
+        assert client.get("/api/auth/doctors/stats").status_code == 401
+        assert client.post("/api/auth/login", json={"pin": "1234"}).status_code == 200
+        stats = client.get("/api/auth/doctors/stats").json()
+        assert stats["hits"] >= 1 and stats["doctors"] >= 1
@@ -0,0 +1,60 @@
+import pytest
+
+from app.api import discharge
+from app.api.discharge import DischargeConfirmIn, DischargeSuggestIn, confirm_discharge, suggest_discharge
+from app.storage.jsonl_journal import JsonlJournal
+
+
+@pytest.fixture
+def journals(tmp_path, monkeypatch):
+    """Jurnalul acestui worker și același jurnal deschis de un alt worker."""
+    paths = (str(tmp_path / "learning.jsonl"), str(tmp_path / "learning.snapshot.jsonl"))
+    monkeypatch.setattr(discharge, "_JOURNAL", JsonlJournal(*paths))
+    monkeypatch.setattr(discharge, "_INDEX", None)
+    other = JsonlJournal(*paths)
+    yield discharge._JOURNAL, other
+    other.close()
+    discharge._JOURNAL.close()
+
+
+def _entry(reason: str, diagnosis: str, level: int = 3) -> dict:
+    return {"triage_level": level, "reason": reason, "diagnosis_final": diagnosis,
+            "evolution_final": "favorabilă", "recommendations_final": "control la 7 zile"}
+
+
+def _suggest(reason: str, level: int = 3) -> str:
+    return suggest_discharge(DischargeSuggestIn(triage_level=level, reason=reason)).diagnosis
+
+
+def test_confirmed_case_is_suggested_next(journals):
+    confirm_discharge(DischargeConfirmIn(**_entry("durere toracică", "Angină pectorală")))
+    assert _suggest("Durere toracică") == "Angină pectorală"
+
+
+def test_cases_confirmed_on_another_worker_are_picked_up(journals):
+    _, other = journals
+    default = _suggest("fractură antebraț")
+    other.append(_entry("fractură antebraț stâng", "Fractură radius"))
+    assert _suggest("fractură antebraț") == "Fractură radius"
+    assert default != "Fractură radius"
+    # doar liniile noi sunt citite; intrarea nu e adăugată de două ori
+    assert len(discharge.get_suggestion_index()) == 1
+
+
+def test_index_is_rebuilt_after_compaction(journals):
+    _, other = journals
+    other.append(_entry("cefalee", "Migrenă"))
+    assert _suggest("cefalee") == "Migrenă"
+    other.compact()
+    other.append(_entry("cefalee", "Cefalee tensională"))
+    assert _suggest("cefalee") == "Cefalee tensională"
+    assert len(discharge.get_suggestion_index()) == 2
+
+
+def test_torn_line_is_read_once_complete(journals):
+    _, other = journals
+    with open(other.journal_path, "ab") as f:
+        f.write(b'{"triage_level": 3, "reason": "dispnee"')
+    assert _suggest("dispnee") != "Astm"
+    other.append(_entry("dispnee", "Astm"))
+    assert _suggest("dispnee") == "Astm"
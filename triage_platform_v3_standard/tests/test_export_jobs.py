@@ -0,0 +1,100 @@
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.storage.export_jobs import ExportJobStore
+
+JOB = "a" * 64
+
+
+@pytest.fixture
+def stores(tmp_path):
+    # două instanțe pe aceeași bază = doi workeri
+    path = str(tmp_path / "jobs.db")
+    return ExportJobStore(path), ExportJobStore(path)
+
+
+def test_only_one_worker_claims_a_job(stores):
+    a, b = stores
+    assert a.claim(JOB, "worker-a")
+    assert not b.claim(JOB, "worker-b")
+    assert b.get(JOB)["status"] == "queued"
+
+
+def test_status_written_by_owner_is_seen_by_other_workers(stores):
+    a, b = stores
+    a.claim(JOB, "worker-a")
+    a.set_status(JOB, "worker-a", "running")
+    assert b.get(JOB)["status"] == "running"
+    # un worker care nu deține jobul nu îi poate schimba starea
+    b.set_status(JOB, "worker-b", "failed", "x")
+    assert a.get(JOB)["status"] == "running"
+    a.finish(JOB, "worker-a")
+    assert b.get(JOB) is None
+
+
+def test_failed_or_abandoned_jobs_can_be_claimed_again(tmp_path):
+    path = str(tmp_path / "jobs.db")
+    a, b = ExportJobStore(path), ExportJobStore(path, stale_after=0)
+    a.claim(JOB, "worker-a")
+    a.set_status(JOB, "worker-a", "failed", "randare eșuată")
+    assert a.get(JOB)["error"] == "randare eșuată"
+    assert a.claim(JOB, "worker-a")
+
+    time.sleep(0.01)
+    # workerul a s-a oprit în timpul randării
+    assert b.claim(JOB, "worker-b")
+    assert b.pending() == 0 and a.pending() == 1
+
+
+def test_prune_drops_oldest_failed_jobs(stores):
+    a, _ = stores
+    for i in range(5):
+        job = f"{i:064x}"
+        a.claim(job, "w")
+        a.set_status(job, "w", "failed", "x")
+    a.claim(JOB, "w")
+    assert a.prune(3) == 3
+    assert a.count() == 3
+    assert a.get(JOB) is not None
+
+
+def test_job_api_reports_jobs_started_on_another_worker():
+    from app.main import app
+    from app.storage.export_jobs import create_job_store
+
+    other = create_job_store()
+    other.claim(JOB, "other-worker")
+    other.set_status(JOB, "other-worker", "running")
+    with TestClient(app) as client:
+        assert client.post("/api/auth/login", json={"pin": "1234"}).status_code == 200
+        r = client.get(f"/api/pdf/externare/jobs/{JOB}")
+        assert r.json() == {"job_id": JOB, "status": "running", "error": None}
+        assert client.get(f"/api/pdf/externare/jobs/{JOB}/result").status_code == 409
+        other.finish(JOB, "other-worker")
+        assert client.get(f"/api/pdf/externare/jobs/{JOB}").status_code == 404
+
+
+def test_bulk_pdf_with_no_rendered_sheet_is_an_error():
+    from app.main import app
+    from app.storage.export_jobs import create_job_store
+
+    keys = ["b" * 64, "c" * 64]
+    with TestClient(app) as client:
+        assert client.post("/api/auth/login", json={"pin": "1234"}).status_code == 200
+        r = client.post("/api/pdf/externare/bulk", json={"keys": keys, "format": "pdf"})
+        assert r.status_code == 422
+        assert len(r.json()["detail"]["errors"]) == 2
+        export_id = r.headers["X-Export-Id"]
+
+        # progresul e în baza comună: îl vede și alt worker
+        progress = create_job_store().get_export(export_id)
+        assert progress["status"] == "failed"
+        assert (progress["done"], progress["failed"]) == (0, 2)
+        assert client.get(f"/api/pdf/externare/bulk/{export_id}").json() == progress
+
+        # arhiva ZIP rămâne un răspuns valid, cu erori.txt
+        r = client.post("/api/pdf/externare/bulk", json={"keys": keys, "format": "zip"})
+        assert r.status_code == 200
+        assert r.content[:2] == b"PK"
@@ -0,0 +1,86 @@
+import time
+
+import pytest
+from reportlab.pdfgen import canvas
+
+from app.services.pdf_pool import RenderPool
+from app.storage.attachment_store import AttachmentStore
+from app.storage.investigation_index import InvestigationIndex
+
+
+def _pdf(path, lines):
+    c = canvas.Canvas(str(path))
+    for i, line in enumerate(lines):
+        c.drawString(72, 760 - 20 * i, line)
+    c.showPage()
+    c.save()
+    return path
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = AttachmentStore(tmp_path / "blobs", str(tmp_path / "attachments.db"))
+    store.add_file(_pdf(tmp_path / "ecg.pdf", ["Troponina crescuta", "ECG sinusal"]), uploader="Dr. Test")
+    store.add_file(_pdf(tmp_path / "rx.pdf", ["Radiografie toracica normala"]), uploader="Dr. Test")
+    return store
+
+
+@pytest.fixture
+def pool():
+    pool = RenderPool(workers=1, queue_depth=0)
+    yield pool
+    pool.shutdown()
+
+
+def _wait(*indexes, total, timeout=30.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if sum(i.indexed for i in indexes) >= total and all(i.stats()["pending"] == 0 for i in indexes):
+            return
+        time.sleep(0.05)
+    raise AssertionError([i.stats() for i in indexes])
+
+
+def test_extraction_runs_in_the_render_pool(tmp_path, store, pool):
+    index = InvestigationIndex(str(tmp_path / "search.db"), store, pool)
+    try:
+        assert index.backfill() == 2
+        _wait(index, total=2)
+    finally:
+        index.close()
+    assert index.indexed == 2
+    assert pool.metrics()["completed"] == 2
+    hits = index.search("troponina")
+    assert [h["original_name"] for h in hits] == ["ecg.pdf"]
+
+
+def test_backfill_on_several_workers_extracts_each_document_once(tmp_path, store):
+    path = str(tmp_path / "search.db")
+    workers = [InvestigationIndex(path, store) for _ in range(3)]
+    try:
+        for w in workers:
+            w.backfill()
+        _wait(*workers, total=2)
+        time.sleep(0.2)
+    finally:
+        for w in workers:
+            w.close()
+    # ceilalți workeri au sărit documentele (revendicate sau deja indexate)
+    assert sum(w.indexed for w in workers) == 2
+    assert workers[0].stats()["documents"] == 2
+
+
+def test_claims_block_other_workers_until_released_or_stale(tmp_path, store):
+    path = str(tmp_path / "search.db")
+    sha = store.list_blobs()[0]["sha256"]
+    a = InvestigationIndex(path, store)
+    b = InvestigationIndex(path, store)
+    stale = InvestigationIndex(path, store, claim_stale=0)
+
+    assert a._claim(sha)
+    assert not b._claim(sha)
+    a._release(sha)
+    assert b._claim(sha)
+    # workerul b s-a oprit fără să elibereze revendicarea
+    time.sleep(0.01)
+    assert stale._claim(sha)
@@ -0,0 +1,103 @@
+import asyncio
+
+from app.services.live_updates import LiveBus
+from app.storage.live_events import LiveEventLog
+
+
+def _workers(tmp_path, history_size=2000):
+    # două instanțe pe aceeași bază = doi workeri uvicorn
+    path = str(tmp_path / "live.db")
+    return (
+        LiveBus(LiveEventLog(path, history_size), poll_seconds=0.01),
+        LiveBus(LiveEventLog(path, history_size), poll_seconds=0.01),
+    )
+
+
+async def _drain(sub, n, timeout=2.0):
+    out = []
+    while len(out) < n:
+        out.append(await asyncio.wait_for(sub.queue.get(), timeout))
+    return out
+
+
+def test_seq_is_shared_between_workers(tmp_path):
+    a, b = _workers(tmp_path)
+    assert [a.publish("x", 1), b.publish("x", 2), a.publish("x", 3)] == [1, 2, 3]
+
+
+def test_events_published_by_one_worker_reach_clients_of_another(tmp_path):
+    a, b = _workers(tmp_path)
+
+    async def run():
+        sub, backlog, _ = b.subscribe()
+        assert backlog is None
+        a.publish("admission.created", {"id": "INT-0001"})
+        a.publish("bed.updated", {"bed": "A-101-1"})
+        return await _drain(sub, 2)
+
+    try:
+        events = asyncio.run(run())
+    finally:
+        a.close()
+        b.close()
+    assert [(e["seq"], e["type"]) for e in events] == [(1, "admission.created"), (2, "bed.updated")]
+    assert events[0]["data"] == {"id": "INT-0001"}
+
+
+def test_last_event_id_from_another_worker_replays_only_missed_events(tmp_path):
+    a, b = _workers(tmp_path)
+    for i in range(5):
+        a.publish("x", i)
+
+    async def run():
+        sub, backlog, seq = b.subscribe(since=2)
+        return backlog, seq
+
+    try:
+        backlog, seq = asyncio.run(run())
+    finally:
+        a.close()
+        b.close()
+    assert seq == 5
+    assert [e["seq"] for e in backlog] == [3, 4, 5]
+
+
+def test_client_ahead_of_this_worker_gets_no_duplicates(tmp_path):
+    path = str(tmp_path / "live.db")
+    a = LiveBus(LiveEventLog(path), poll_seconds=0.01)
+    # workerul b nu a verificat încă tabela
+    b = LiveBus(LiveEventLog(path), poll_seconds=60)
+
+    async def run():
+        b.subscribe()
+        for i in range(3):
+            a.publish("x", i)
+        # clientul a primit deja 1..2 de la workerul a
+        sub, backlog, seq = b.subscribe(since=2)
+        assert (backlog, seq) == ([], 0)
+        b._wake.set()
+        return await _drain(sub, 1)
+
+    try:
+        events = asyncio.run(run())
+    finally:
+        a.close()
+        b.close()
+    assert [e["seq"] for e in events] == [3]
+
+
+def test_client_too_far_behind_gets_snapshot(tmp_path):
+    a, b = _workers(tmp_path, history_size=10)
+    for i in range(600):
+        a.publish("x", i)
+
+    async def run():
+        return b.subscribe(since=5)
+
+    try:
+        _, backlog, seq = asyncio.run(run())
+    finally:
+        a.close()
+        b.close()
+    assert backlog is None
+    assert seq == 600
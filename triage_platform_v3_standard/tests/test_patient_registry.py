@@ -0,0 +1,75 @@
+import pytest
+
+from app.services import patient_registry
+from app.services.patient_registry import PatientRegistry
+from app.storage import json_store
+from app.storage.record_log import RecordLog
+
+
+def _cnp(first12: str) -> str:
+    total = sum(int(d) * int(w) for d, w in zip(first12, "279146358279")) % 11
+    return first12 + str(1 if total == 10 else total)
+
+
+@pytest.fixture
+def workers(tmp_path, monkeypatch):
+    """Registrul acestui worker și jurnalul văzut de un alt worker (alt proces)."""
+    path = str(tmp_path / "db.jsonl")
+    monkeypatch.setattr(json_store, "_LOG", RecordLog(path))
+    monkeypatch.setattr(patient_registry, "_REGISTRY", None)
+    return patient_registry.get_registry(), RecordLog(path)
+
+
+def _record(pid: str, cnp: str, name: str) -> dict:
+    return {"id": pid, "cnp": cnp, "name": name, "birth_date": "1985-03-12", "sex": "M",
+            "phone": None, "address": None}
+
+
+def test_returning_patient_is_deduplicated_by_cnp(workers):
+    registry, _ = workers
+    cnp = _cnp("185031240001")
+    first, created = registry.register(cnp, "Ion Popescu")
+    again, created_again = registry.register(cnp, "Ion Popescu")
+    assert created and not created_again
+    assert again["id"] == first["id"]
+    assert len(registry) == 1
+
+
+def test_patients_written_by_another_worker_are_visible(workers):
+    registry, other = workers
+    registry.register(_cnp("185031240001"), "Ion Popescu")
+    other.put("patients", "77", _record("77", _cnp("290071540002"), "Maria Ionescu"))
+
+    assert registry.get("77")["name"] == "Maria Ionescu"
+    assert [r["id"] for r in registry.search("ionesc")] == ["77"]
+    assert {r["id"] for r in registry.list()} == {"1", "77"}
+
+
+def test_updates_and_deletes_from_another_worker_are_applied(workers):
+    registry, other = workers
+    cnp = _cnp("290071540002")
+    other.put("patients", "77", _record("77", cnp, "Maria Ionescu"))
+    assert registry.search("maria")
+
+    other.put("patients", "77", _record("77", cnp, "Maria Georgescu"))
+    assert registry.search("ionescu") == []
+    assert [r["id"] for r in registry.search("georgescu")] == ["77"]
+
+    other.delete("patients", "77")
+    assert registry.get("77") is None
+    assert registry.search(cnp[:6]) == []
+
+
+def test_compaction_by_another_worker_reloads_the_index(workers):
+    registry, other = workers
+    other.put("patients", "77", _record("77", _cnp("290071540002"), "Maria Ionescu"))
+    assert registry.get("77") is not None
+    other.put("patients", "78", _record("78", _cnp("185031240001"), "Ion Popescu"))
+    other.compact()
+    assert registry.get("78")["name"] == "Ion Popescu"
+    assert len(registry) == 2
+
+
+def test_registry_without_log_does_not_refresh():
+    registry = PatientRegistry([_record("1", _cnp("185031240001"), "Ion Popescu")])
+    assert [r["id"] for r in registry.search("pop")] == ["1"]
@@ -0,0 +1,17 @@
+from pathlib import Path
+
+from app.services.pdf_cache import ExportCache
+
+SHA_A, SHA_B = "a" * 64, "b" * 64
+
+
+def test_key_uses_the_store_digest_without_reading_attachments(tmp_path):
+    cache = ExportCache(tmp_path)
+    data, doctor = {"patient_name": "X"}, {"id": 1}
+    # căile nu există: cheia se calculează doar din sha256-ul blob-ului
+    a = [(SHA_A, tmp_path / "blobs" / f"{SHA_A}.pdf")]
+    b = [(SHA_B, tmp_path / "blobs" / f"{SHA_B}.pdf")]
+    assert cache.key_for(data, doctor, a) == cache.key_for(data, doctor, list(a))
+    assert cache.key_for(data, doctor, a) != cache.key_for(data, doctor, b)
+    assert cache.key_for(data, doctor, a + b) != cache.key_for(data, doctor, b + a)
+    assert not Path(a[0][1]).exists()
@@ -0,0 +1,66 @@
+from PyPDF2 import PdfReader
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfgen import canvas
+
+from app.services import pdf_render
+
+DOCTOR = {
+    "full_name": "Dr. Test",
+    "specialty": "Medicină de urgență",
+    "stamp_url": "/static/img/parafa_vintu.png",
+    "signature_url": "/static/img/semnatura_vintu.png",
+}
+SHEET = {
+    "patient_name": "Ionescu Maria",
+    "diagnosis": "Colică renală dreaptă.",
+    "evolution": "Evoluție favorabilă.",
+    "recommendations": "Control urologic în 7 zile.",
+}
+
+
+def _investigation(path, pages):
+    # fluxuri necomprimate și același logo pe fiecare pagină: de comprimat și de partajat
+    c = canvas.Canvas(str(path), pagesize=A4, pageCompression=0)
+    for page in range(pages):
+        c.drawImage(str(pdf_render.LOGO_PATH), 40, 700, width=80, height=80, mask="auto")
+        c.drawString(50, 650, f"Investigatie pagina {page + 1}")
+        for row in range(20):
+            c.drawString(50, 630 - row * 14, f"HGB 13.{row} g/dL, WBC 7.{row} x10^3/uL")
+        c.showPage()
+    c.save()
+    return str(path)
+
+
+def test_optimized_export_opens_with_all_pages(tmp_path, monkeypatch):
+    attachments = [_investigation(tmp_path / "a.pdf", 2), _investigation(tmp_path / "b.pdf", 3)]
+    optimized = []
+    original = pdf_render.optimize_writer
+    monkeypatch.setattr(pdf_render, "optimize_writer", lambda w: optimized.append(original(w)) or optimized[-1])
+
+    out = tmp_path / "externare.pdf"
+    pdf_render.render_externare(SHEET, DOCTOR, attachments, str(out))
+
+    assert optimized[0]["compressed"] > 0 and optimized[0]["shared"] > 0
+    reader = PdfReader(str(out), strict=True)
+    assert len(reader.pages) == 1 + 2 + 3
+    assert "Ionescu Maria" in reader.pages[0].extract_text()
+    assert "Investigatie pagina 3" in reader.pages[-1].extract_text()
+    for page in reader.pages:
+        for image in page.images:
+            assert image.data
+
+
+def test_bulk_concat_opens_with_all_sheets(tmp_path):
+    sheets = []
+    for i in range(3):
+        path = tmp_path / f"foaie-{i}.pdf"
+        pdf_render.render_externare({**SHEET, "patient_name": f"Pacient {i}"}, DOCTOR, [], str(path))
+        sheets.append(str(path))
+
+    out = tmp_path / "lot.pdf"
+    size, _ = pdf_render.concat_pdfs(sheets, str(out))
+
+    reader = PdfReader(str(out), strict=True)
+    assert [p.extract_text().count(f"Pacient {i}") > 0 for i, p in enumerate(reader.pages)] == [True] * 3
+    # logo-ul, parafa și semnătura sunt păstrate o singură dată
+    assert size < sum((tmp_path / f"foaie-{i}.pdf").stat().st_size for i in range(3)) / 2
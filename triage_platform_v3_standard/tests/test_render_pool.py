@@ -0,0 +1,67 @@
+import asyncio
+import time
+
+import pytest
+
+from app.services.pdf_pool import PoolSaturated, RenderPool
+
+
+def _slow_write(path, seconds):
+    time.sleep(seconds)
+    with open(path, "w") as f:
+        f.write("%PDF")
+    return path, seconds
+
+
+@pytest.fixture
+def pool():
+    pool = RenderPool(workers=1, queue_depth=0)
+    yield pool
+    pool.shutdown()
+
+
+def test_cancelled_caller_keeps_the_slot_until_the_job_ends(tmp_path, pool):
+    out = tmp_path / "partial.pdf"
+    abandoned = []
+
+    async def scenario():
+        task = asyncio.ensure_future(
+            pool.submit(_slow_write, str(out), 1.5, abandoned=lambda: abandoned.append(out.exists()))
+        )
+        await asyncio.sleep(0.8)  # procesul a pornit (spawn) și „randează”
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        # clientul a plecat, dar procesul lucrează încă: locul rămâne ocupat
+        assert pool.metrics()["in_flight"] == 1
+        with pytest.raises(PoolSaturated):
+            await pool.submit(_slow_write, str(tmp_path / "other.pdf"), 0)
+        assert abandoned == []
+
+    asyncio.run(scenario())
+    deadline = time.time() + 30
+    while (pool.metrics()["in_flight"] or not abandoned) and time.time() < deadline:
+        time.sleep(0.05)
+    assert pool.metrics()["in_flight"] == 0
+    # curățenia rulează abia după ce jobul a terminat de scris
+    assert abandoned == [True]
+
+
+def test_cancelled_thread_job_frees_its_slot_without_a_failure(tmp_path):
+    pool = RenderPool(workers=0, queue_depth=0)
+    try:
+        async def scenario():
+            task = asyncio.ensure_future(pool.submit(_slow_write, str(tmp_path / "a.pdf"), 0.3))
+            await asyncio.sleep(0)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+        asyncio.run(scenario())
+        deadline = time.time() + 5
+        while pool.metrics()["in_flight"] and time.time() < deadline:
+            time.sleep(0.05)
+        assert pool.metrics()["in_flight"] == 0
+        assert pool.metrics()["failed"] == 0
+    finally:
+        pool.shutdown()
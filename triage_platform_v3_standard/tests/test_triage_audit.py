@@ -0,0 +1,36 @@
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api import triage
+from app.main import app
+
+CNP = "1850315400010"
+
+
+@pytest.fixture
+def recorded(monkeypatch):
+    # intrările, serializate ca de firul jurnalului, în momentul în care sunt scrise
+    items = []
+    monkeypatch.setattr(triage.triage_audit, "record", lambda *item: items.append(item))
+    yield items
+
+
+def _audited_inputs(items):
+    return [json.loads(triage._audit_entry(0.0, *item))["input"] for item in items]
+
+
+def test_audit_keeps_the_payload_as_received(recorded):
+    with TestClient(app) as client:
+        r = client.post("/api/triage", json={"cnp": CNP, "sbp": 120})
+        assert r.json()["normalized"]["sex"] == "M"
+        r = client.post("/api/triage/batch", json=[{"cnp": CNP}, {"cnp": CNP, "age": 30}])
+        assert [o["normalized"]["age"] is not None for o in r.json()] == [True, True]
+
+    inputs = _audited_inputs(recorded)
+    assert [i["age"] for i in inputs] == [None, None, 30]
+    assert [i["sex"] for i in inputs] == [None, None, None]
+    assert {i["cnp"] for i in inputs} == {CNP}
+    # rezultatul auditat e cel calculat după completarea din CNP
+    assert all(item[1].normalized["sex"] == "M" for item in recorded)
@@ -0,0 +1,95 @@
+import json
+import os
+
+import pytest
+
+from app.api.triage import TriageIn, rules_engine, triage_rules, triage_rules_batch
+
+# rezultatele regulilor scrise de mână (înainte de motorul compilat), înghețate
+# de tests/fixtures/freeze_triage_legacy.py
+FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "triage_legacy_outcomes.jsonl")
+
+
+def _cases():
+    with open(FIXTURE, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+CASES = _cases()
+
+
+def _case_id(case):
+    flags = "+".join(sorted(case["input"]["red_flags"])) or "-"
+    fields = ",".join(f"{k}={v}" for k, v in case["input"].items() if k != "red_flags")
+    return f"{fields};{flags}"
+
+
+def _outcome(level, color, label, time_target, reasons, advice):
+    return {"level": level, "color": color, "label": label, "time_target": time_target,
+            "reasons": list(reasons), "advice": list(advice)}
+
+
+def test_fixture_covers_every_level():
+    assert {case["expected"]["level"] for case in CASES} == {1, 2, 3, 4, 5}
+
+
+def test_single_patient_rules_match_legacy_outcomes():
+    rules = rules_engine.current()
+    mismatches = []
+    for case in CASES:
+        got = _outcome(*triage_rules(TriageIn(**case["input"]), rules))
+        if got != case["expected"]:
+            mismatches.append((_case_id(case), case["expected"], got))
+    assert not mismatches, f"{len(mismatches)} diferențe, prima: {mismatches[0]}"
+
+
+@pytest.mark.parametrize("chunk", [1, 7, len(CASES)])
+def test_batch_rules_match_legacy_outcomes(chunk):
+    rules = rules_engine.current()
+    mismatches = []
+    for start in range(0, len(CASES), chunk):
+        cases = CASES[start:start + chunk]
+        levels = triage_rules_batch([TriageIn(**case["input"]) for case in cases], rules)
+        for case, level in zip(cases, levels.tolist()):
+            o = rules.by_level[level]
+            got = _outcome(level, o.color, o.label, o.time_target, o.reasons, o.advice)
+            if got != case["expected"]:
+                mismatches.append((_case_id(case), case["expected"], got))
+    assert not mismatches, f"{len(mismatches)} diferențe, prima: {mismatches[0]}"
+
+
+def _cnp(first12: str) -> str:
+    rest = sum(int(c) * w for c, w in zip(first12, (2, 7, 9, 1, 4, 6, 3, 5, 8, 2, 7, 9))) % 11
+    return first12 + str(1 if rest == 10 else rest)
+
+
+def test_batch_endpoint_matches_single_endpoint():
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+
+    # câte un CNP valid, unul cu cifra de control greșită și unul lipsă,
+    # cu și fără vârstă/sex trimise explicit
+    valid = _cnp("185031540001"), _cnp("296121212345"), _cnp("503022812001")
+    identities = [
+        {"cnp": valid[0]}, {"cnp": valid[1], "age": 40}, {"cnp": valid[2], "sex": "M"},
+        {"cnp": valid[0][:12] + str((int(valid[0][12]) + 1) % 10)}, {"cnp": None}, {"cnp": "123"},
+    ]
+    payloads = [
+        {**case["input"], **identities[i % len(identities)]} for i, case in enumerate(CASES[::5])
+    ]
+    with TestClient(app) as client:
+        single = []
+        for payload in payloads:
+            r = client.post("/api/triage", json=payload)
+            assert r.status_code == 200, r.text
+            single.append(r.json())
+
+        r = client.post("/api/triage/batch", json=payloads)
+        assert r.status_code == 200, r.text
+        assert r.json() == single
+
+        ndjson = "\n".join(json.dumps(p) for p in payloads)
+        r = client.post("/api/triage/batch", content=ndjson, headers={"Content-Type": "application/x-ndjson"})
+        assert r.status_code == 200, r.text
+        assert r.json() == single
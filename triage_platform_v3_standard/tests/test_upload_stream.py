@@ -0,0 +1,101 @@
+import asyncio
+import hashlib
+import json
+
+import pytest
+from fastapi import FastAPI, Request
+
+from app.services.upload_stream import receive_pdf_upload
+
+BOUNDARY = "triageboundary"
+PDF = b"%PDF-1.4\n" + b"x" * 5000 + b"\n%%EOF\n"
+
+
+def _form(content: bytes, filename: str = "ecg.pdf", field: str = "file") -> bytes:
+    return (
+        f"--{BOUNDARY}\r\n"
+        f'Content-Disposition: form-data; name="note"\r\n\r\nurgent\r\n'
+        f"--{BOUNDARY}\r\n"
+        f'Content-Disposition: form-data; name="{field}"; filename="{filename}"\r\n'
+        f"Content-Type: application/pdf\r\n\r\n"
+    ).encode() + content + f"\r\n--{BOUNDARY}--\r\n".encode()
+
+
+def _app(directory, max_bytes):
+    app = FastAPI()
+
+    @app.post("/upload")
+    async def upload(request: Request):
+        stored = await receive_pdf_upload(request, directory, max_bytes=max_bytes)
+        return {"name": stored.filename, "size": stored.size, "sha256": stored.sha256,
+                "data": stored.path.read_bytes().decode("latin-1")}
+
+    return app
+
+
+def _call(app, body: bytes, chunk: int = 1000, content_length: bool = True):
+    """Cerere ASGI directă: numără câte bucăți din corp a citit aplicația."""
+    headers = [(b"content-type", f"multipart/form-data; boundary={BOUNDARY}".encode())]
+    if content_length:
+        headers.append((b"content-length", str(len(body)).encode()))
+    scope = {"type": "http", "http_version": "1.1", "method": "POST", "path": "/upload", "raw_path": b"/upload",
+             "root_path": "", "scheme": "http", "query_string": b"", "headers": headers,
+             "client": ("127.0.0.1", 1), "server": ("127.0.0.1", 80)}
+    chunks = [body[i:i + chunk] for i in range(0, len(body), chunk)]
+    read = 0
+    sent = []
+
+    async def receive():
+        nonlocal read
+        if read < len(chunks):
+            read += 1
+            return {"type": "http.request", "body": chunks[read - 1], "more_body": read < len(chunks)}
+        await asyncio.sleep(3600)
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(app(scope, receive, send))
+    status = sent[0]["status"]
+    return status, b"".join(m.get("body", b"") for m in sent[1:]), read
+
+
+def test_upload_is_parsed_from_the_request_stream(tmp_path):
+    status, body, read = _call(_app(tmp_path, 10_000), _form(PDF, filename="dir/ecg.pdf"))
+    assert status == 200
+    out = json.loads(body)
+    assert out["name"] == "dir_ecg.pdf"
+    assert out["size"] == len(PDF)
+    assert out["sha256"] == hashlib.sha256(PDF).hexdigest()
+    assert out["data"].encode("latin-1") == PDF
+
+
+def test_declared_length_over_the_limit_is_rejected_before_reading(tmp_path):
+    status, _, read = _call(_app(tmp_path, 1000), _form(PDF) + b"\0" * 70_000)
+    assert status == 413
+    assert read == 0
+    assert not list(tmp_path.iterdir())
+
+
+def test_chunked_upload_stops_as_soon_as_the_file_exceeds_the_limit(tmp_path):
+    big = PDF + b"y" * 100_000
+    status, _, read = _call(_app(tmp_path, 10_000), _form(big), content_length=False)
+    assert status == 413
+    assert read < 15  # din ~106 bucăți
+    assert not list(tmp_path.iterdir())
+
+
+@pytest.mark.parametrize("content, filename, expected", [
+    (b"GIF89a" + PDF, "ecg.pdf", 400),
+    (PDF, "ecg.png", 400),
+])
+def test_invalid_pdf_is_rejected_on_the_first_chunks(tmp_path, content, filename, expected):
+    status, _, read = _call(_app(tmp_path, 1_000_000), _form(content + b"z" * 50_000, filename), content_length=False)
+    assert status == expected
+    assert read <= 2
+    assert not list(tmp_path.iterdir())
+
+
+def test_missing_file_field(tmp_path):
+    status, _, _ = _call(_app(tmp_path, 10_000), _form(PDF, field="other"))
+    assert status == 422
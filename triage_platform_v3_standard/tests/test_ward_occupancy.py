@@ -0,0 +1,80 @@
+from datetime import datetime
+
+import pytest
+
+from app.models.admission import Intervention
+from app.services.ward_occupancy import OCCUPIED, WardOccupancy
+from app.storage.admission_store import AdmissionRepository
+
+
+def _occupancy(repo):
+    occ = WardOccupancy()
+    for room, bed in (("1", "1"), ("1", "2"), ("2", "1")):
+        occ.add_bed("ATI-A", room, bed, department="Terapie Intensivă")
+    occ.add_bed("ATI-A", "2", "2", status=OCCUPIED, department="Terapie Intensivă")
+    occ.add_bed("ATI-B", "1", "1", department="Terapie Intensivă")
+    occ.attach(repo.occupied_beds, repo.bed_events)
+    return occ
+
+
+@pytest.fixture
+def workers(tmp_path):
+    # două procese (workeri) cu aceeași bază de internări
+    path = str(tmp_path / "admissions.db")
+    repos = [AdmissionRepository(path), AdmissionRepository(path)]
+    return repos, [_occupancy(r) for r in repos]
+
+
+def _admit(repo, occ, ward):
+    label = occ.next_free(ward)
+    return repo.create({"patient_id": "P", "ward": ward, "bed_label": label}), label
+
+
+def test_admissions_in_one_worker_show_up_in_the_other(workers):
+    (repo_a, repo_b), (occ_a, occ_b) = workers
+    assert occ_b.free_beds("Terapie Intensivă") == 4
+
+    admission, label = _admit(repo_a, occ_a, "ATI-A")
+    assert label == "ATI-A-1-1"
+    assert occ_b.free_beds("ATI-A") == 2
+    assert occ_b.ward_status("ATI-A")["current"] == 2  # plus patul blocat din CSV
+    assert occ_b.bed(label)[3] == OCCUPIED
+    assert occ_b.next_free("ATI-A") == "ATI-A-1-2"
+
+    repo_b.set_status(admission.id, "discharged")
+    assert occ_a.free_beds("ATI-A") == 3
+    # patul eliberat e alocat ultimul
+    assert occ_a.next_free("ATI-A") == "ATI-A-1-2"
+
+
+def test_department_allocates_in_the_emptiest_ward_and_skips_lost_beds(workers):
+    (repo_a, _), (occ_a, occ_b) = workers
+    _admit(repo_a, occ_a, "ATI-A")
+    _admit(repo_a, occ_a, "ATI-A")
+    # ATI-A are 1 pat liber, ATI-B 1: la egalitate rămâne ordinea din CSV
+    assert occ_b.next_free("Terapie Intensivă") == "ATI-A-2-1"
+    assert occ_b.next_free("Terapie Intensivă", exclude=["ATI-A-2-1"]) == "ATI-B-1-1"
+    _admit(repo_a, occ_a, "ATI-B")
+    _admit(repo_a, occ_a, "ATI-A")
+    assert occ_b.next_free("Terapie Intensivă") is None
+    assert occ_b.free_beds("Terapie Intensivă") == 0
+
+
+def test_occupancy_starts_from_the_active_admissions(workers, tmp_path):
+    (repo_a, _), (occ_a, _) = workers
+    first, _ = _admit(repo_a, occ_a, "ATI-A")
+    _admit(repo_a, occ_a, "ATI-A")
+    repo_a.set_status(first.id, "discharged")
+    # un worker pornit mai târziu citește internările active o singură dată
+    late = _occupancy(AdmissionRepository(str(tmp_path / "admissions.db")))
+    assert late.free_beds("ATI-A") == 2
+    assert late.bed("ATI-A-1-2")[3] == OCCUPIED
+
+
+def test_interventions_do_not_touch_the_bed_feed(workers):
+    (repo_a, _), (occ_a, occ_b) = workers
+    admission, _ = _admit(repo_a, occ_a, "ATI-A")
+    cursor = repo_a.bed_events(0)[-1][0]
+    repo_a.add_intervention(admission.id, Intervention(timestamp=datetime.now(), author="Dr. Test", description="EKG"))
+    assert repo_a.bed_events(cursor) == []
+    assert occ_b.free_beds("ATI-A") == 2